@@ -1,12 +1,11 @@
-import pickle
+from backend.models.model_artifact import load_artifact
 
-# Load the saved model from the pickle file
-with open('/O.A.I.S./models/wordllama_model.pkl', 'rb') as file:
-    model_data = pickle.load(file)
+# Load the saved model artifact (the embedding matrix is memory-mapped, not read into RAM)
+model_data = load_artifact('/O.A.I.S./backend/models/wordllama')
 
 # Access the embeddings and tokenizer
 embeddings = model_data['embeddings']
 tokenizer = model_data['tokenizer']
 config = model_data['config']
 
-print(f"Loaded model with dimension: {config['dim']} and binary: {config['binary']}")
+print(f"Loaded model version {model_data['version']} with dimension: {config['dim']} and binary: {config['binary']}")
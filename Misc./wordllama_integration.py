@@ -1,9 +1,9 @@
 import os
-import pickle
 from wordllama import WordLlama
+from backend.models.model_artifact import write_artifact
 
 # Create a directory if it doesn't exist
-save_path = os.path.expanduser('~/O.A.I.S./models')
+save_path = os.path.expanduser('~/O.A.I.S./backend/models/wordllama')
 print(f"Saving model to: {save_path}")
 
 # Load the 1024-dimension model with binary embeddings
@@ -15,16 +15,14 @@ wl_binary = WordLlama.load(trunc_dim=256, binary=True)
 # Extract embeddings
 embeddings = wl.embed(["sample text", "another text"])  # Use the model's embedding method
 
-# Save embeddings, tokenizer, and configuration as a pickle file
-model_data = {
-    'embeddings': embeddings,  # Extract embeddings
-    'tokenizer': wl.tokenizer,  # Save the tokenizer, if needed
-    'config': {
+# Save embeddings, tokenizer, and configuration as a model artifact (see backend/models/model_artifact.py)
+manifest = write_artifact(
+    save_path,
+    embeddings,  # Extract embeddings
+    wl.tokenizer,  # Save the tokenizer, if needed
+    {
         'dim': 1024,  # Store the configuration to reload later
         'binary': True
     }
-}
-
-# Save the model data in a pickle format
-with open(os.path.join(save_path, 'wordllama_model.pkl'), 'wb') as file:
-    pickle.dump(model_data, file)
+)
+print(f"Saved model version {manifest['version']}")
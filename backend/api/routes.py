@@ -1,11 +1,23 @@
 # backend/api/routes.py
 
-from flask import Blueprint, render_template, request, jsonify, session
+from flask import Blueprint, render_template, request, jsonify, session, current_app
 from backend.models.db import db
+from backend.models.batch_writer import batch_writer
+from backend.models.session_store import session_store_stats, client_key
 from backend.models.models import User, UserSession, Interaction, CodeExecutionLog
+from backend.models.model_registry import registry
+from backend.models.observer import gpt2_batcher, wordllama_engine
+from backend.models.model_maintenance import model_maintenance
 from backend.tools.memory import retrieve_memory
-from backend.tools.code_execution import execute_python_code, execute_js_code, execute_bash_code
-from backend.tools.intent_parser import parse_intent_with_gpt2, handle_task
+from backend.tools.vector_memory import vector_memory
+from backend.tools.success_stats import success_counts
+from backend.tools.retention import retention
+from backend.tools.code_execution import sandbox_pool
+from backend.tools.execution_jobs import execution_jobs, JobLimitExceeded
+from backend.tools.llm_streaming import streaming_metrics
+from backend.tools.llm_clients import provider_client_metrics
+from backend.tools.semantic_cache import semantic_cache
+from backend.tools.intent_parser import parse_intent_with_gpt2, handle_task, get_intent_tier_stats
 from backend.tools.file_operations import read_file, write_file
 from datetime import datetime
 import logging
@@ -22,8 +34,8 @@ def gpt2_interact():
 
     try:
         session_id = session.get('session_id')
-        past_interactions = retrieve_memory(session.get('user_id'), session_id)
-        memory_prompt = input_text if not past_interactions else f"{input_text} {past_interactions[-1].prompt}"
+        past_interactions = retrieve_memory(session.get('user_id'), session_id, limit=1)
+        memory_prompt = input_text if not past_interactions else f"{input_text} {past_interactions[0]['prompt']}"
         # GPT-2 interaction logic here
         # ...
         decoded_output = "Sample GPT-2 response"  # Replace with actual logic
@@ -35,13 +47,108 @@ def gpt2_interact():
 @api_bp.route('/gpt2_status', methods=['GET'])
 def gpt2_status():
     try:
-        # GPT-2 status check logic here
-        status = "operational"  # Replace with actual status check
-        return jsonify({'status': status})
+        stats = registry.stats().get('gpt2', {})
+        status = "operational" if stats.get('loaded') else "not_loaded"
+        return jsonify({'status': status, 'stats': stats, 'batching': gpt2_batcher.metrics()})
     except Exception as e:
         logging.error(f"Error loading GPT-2 model: {str(e)}")
         return jsonify({'status': 'error', 'error': str(e)})
 
+@api_bp.route('/models', methods=['GET'])
+def model_status():
+    return jsonify(registry.stats())
+
+@api_bp.route('/models/<name>/warm', methods=['POST'])
+def warm_model(name):
+    try:
+        registry.warm(name)
+        return jsonify({'success': True, 'stats': registry.stats().get(name)})
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logging.error(f"Error warming model {name}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/models/<name>/unload', methods=['POST'])
+def unload_model(name):
+    unloaded = registry.unload(name)
+    return jsonify({'success': bool(unloaded)})
+
+@api_bp.route('/wordllama_status', methods=['GET'])
+def wordllama_status():
+    """Serving model version and the state of background training/pruning."""
+    return jsonify({'engine': wordllama_engine.stats(), 'maintenance': model_maintenance.stats()})
+
+@api_bp.route('/intent_stats', methods=['GET'])
+def intent_stats():
+    return jsonify(get_intent_tier_stats())
+
+@api_bp.route('/streaming_stats', methods=['GET'])
+def streaming_stats():
+    return jsonify({
+        'providers': streaming_metrics.snapshot(),
+        'clients': provider_client_metrics(),
+        'semantic_cache': semantic_cache.stats()
+    })
+
+@api_bp.route('/db_status', methods=['GET'])
+def db_status():
+    return jsonify({
+        'backend': db.engine.dialect.name,
+        'pool': db.engine.pool.status(),
+        'batch_writer': batch_writer.stats(),
+        'retention': retention.stats(),
+        'sessions': session_store_stats(current_app),
+    })
+
+@api_bp.route('/archive', methods=['GET'])
+def archive():
+    """Archived interactions or code executions of the current user (?table=, ?since=, ?until=, ?limit=)."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'User not logged in'}), 401
+    table = request.args.get('table', 'interactions')
+    # code_execution_logs stores user ids as strings
+    owners = {'interactions': user_id, 'code_execution_logs': str(user_id)}
+    if table not in owners:
+        return jsonify({'error': f'Unknown archive table: {table}'}), 400
+    try:
+        since = datetime.fromisoformat(request.args['since']) if 'since' in request.args else None
+        until = datetime.fromisoformat(request.args['until']) if 'until' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'since/until must be ISO timestamps'}), 400
+    limit = request.args.get('limit', 100, type=int)
+    rows = list(retention.archive.query(table, since=since, until=until, limit=limit, user_id=owners[table]))
+    return jsonify({'table': table, 'rows': rows})
+
+@api_bp.route('/memory', methods=['GET'])
+def memory():
+    """Page through past interactions, or search them with ?q=..."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'User not logged in'}), 401
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    interactions = retrieve_memory(user_id, query=request.args.get('q'), limit=limit, offset=offset)
+    return jsonify({'interactions': interactions, 'offset': offset, 'index': vector_memory.stats()})
+
+@api_bp.route('/success_rate', methods=['GET'])
+def success_rate():
+    """Success rate of the current user, optionally per ?intent= and over the last ?window= days."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'User not logged in'}), 401
+    intent = request.args.get('intent')
+    window = request.args.get('window', type=int)
+    total, successes = success_counts(user_id, intent=intent, window_days=window)
+    return jsonify({
+        'intent': intent or 'all',
+        'window_days': window,
+        'total': total,
+        'successes': successes,
+        'success_rate': successes / total if total else None
+    })
+
 @api_bp.route('/toggle_memory', methods=['POST'])
 def toggle_memory():
     data = request.get_json()
@@ -124,26 +231,71 @@ def execute_code_route():
     data = request.get_json()
     code = data.get('code', '')
     language = data.get('language', 'python')
+    wait = data.get('wait', True)
 
     if not code:
         return jsonify({'error': 'No code provided'}), 400
+    if language not in ('python', 'javascript', 'bash'):
+        return jsonify({'error': 'Unsupported language'}), 400
 
-    user_id = session.get('user_id', 'anonymous')
+    # Jobs belong to the signed-in user or, for anonymous clients, to their own session
+    user_id = client_key(session)
 
-    if language == 'python':
-        result = execute_python_code(code)
-    elif language == 'javascript':
-        result = execute_js_code(code)
-    elif language == 'bash':
-        result = execute_bash_code(code)
-    else:
-        return jsonify({'error': 'Unsupported language'}), 400
+    try:
+        job = execution_jobs.submit(
+            code, language, user_id, use_cache=data.get('cache'), deterministic=data.get('deterministic')
+        )
+    except JobLimitExceeded as e:
+        return jsonify({'error': str(e)}), 429
 
     # Log the execution
     # Assuming you have a logging function
     # log_task_execution(user_id, language, code, result.get('output', ''), result.get('status', 'error'))
 
-    return jsonify(result)
+    # `wait: false` returns the job id immediately; poll /api/jobs/<job_id> for output
+    if not wait:
+        return jsonify({'job_id': job.id, 'status': job.status}), 202
+    job.done.wait()
+    return jsonify({'job_id': job.id, **job.result})
+
+@api_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json()
+    code = data.get('code', '')
+    language = data.get('language', 'python')
+    if not code:
+        return jsonify({'error': 'No code provided'}), 400
+    if language not in ('python', 'javascript', 'bash'):
+        return jsonify({'error': 'Unsupported language'}), 400
+
+    try:
+        job = execution_jobs.submit(
+            code, language, client_key(session),
+            use_cache=data.get('cache'), deterministic=data.get('deterministic')
+        )
+    except JobLimitExceeded as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify({'job_id': job.id, 'status': job.status}), 202
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    # Other clients' jobs are reported as unknown
+    job = execution_jobs.get(job_id, owner=client_key(session))
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    offset = request.args.get('offset', 0, type=int)
+    return jsonify(job.snapshot(offset))
+
+@api_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    owner = client_key(session)
+    if execution_jobs.get(job_id, owner=owner) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify({'job_id': job_id, 'cancelled': execution_jobs.cancel(job_id, owner=owner)})
+
+@api_bp.route('/sandbox_status', methods=['GET'])
+def sandbox_status():
+    return jsonify({'sandbox': sandbox_pool.metrics(), 'jobs': execution_jobs.metrics()})
 
 def init_user(username):
     from ..models.models import User
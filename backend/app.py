@@ -1,16 +1,22 @@
 # backend/app.py
 
 from flask import Flask, render_template, send_from_directory
-from flask_session import Session
 from flask_cors import CORS
 from flask_socketio import SocketIO
 from .config import Config
 from .models.db import db, migrate
+from .models.batch_writer import batch_writer
+from .models.session_store import init_session_store
+from .tools.retention import retention
+from .models.model_maintenance import model_maintenance
 from .api.routes import api_bp
 from .socketio.handlers import socketio_handlers
+from .models.model_registry import registry
+from .tools.code_execution import sandbox_pool
+from .tools import offload
 import os
 
-socketio = SocketIO(cors_allowed_origins="*")
+socketio = SocketIO(cors_allowed_origins="*", async_mode=Config.SOCKETIO_ASYNC_MODE)
 
 def create_app():
     app = Flask(__name__, static_folder='static', template_folder='templates')
@@ -18,8 +24,11 @@ def create_app():
 
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
-    Session(app)
+    migrate.init_app(app, db, directory=Config.MIGRATION_DIR)
+    batch_writer.init_app(app)
+    retention.init_app(app)
+    model_maintenance.init_app(app)
+    init_session_store(app)
     CORS(app, resources={r"/*": {"origins": "*"}})  # Adjust CORS as needed
 
     # Register Blueprints
@@ -27,6 +36,7 @@ def create_app():
 
     # Initialize SocketIO
     socketio.init_app(app)
+    offload.configure(socketio.async_mode)
     socketio_handlers(socketio)
 
     # Serve the React frontend from the public folder
@@ -40,4 +50,24 @@ def create_app():
 
     return app
 
+
+def start_background_services(app):
+    """
+    Start the threads and worker processes a serving process needs. Kept out of `create_app` so
+    that importing the app (`flask db upgrade` and other CLI commands) has no side effects.
+    """
+    batch_writer.start()
+    retention.start()
+    model_maintenance.start()
+    if hasattr(app.session_interface, 'start'):
+        app.session_interface.start()
+
+    # Models load lazily on first use; optionally warm them off the startup path
+    if app.config.get('WARM_MODELS'):
+        socketio.start_background_task(registry.warm, *app.config['WARM_MODELS'])
+
+    # Pre-start the Python sandbox workers so the first execution doesn't pay interpreter startup
+    if app.config.get('SANDBOX_POOL_SIZE'):
+        sandbox_pool.start()
+
 app = create_app()
@@ -0,0 +1,108 @@
+# backend/benchmarks/binary_similarity_bench.py
+#
+# Binary (XOR+popcount Hamming) similarity against float cosine on synthetic clustered
+# embeddings: top-k latency and recall of full-code Hamming search, truncated-code coarse search
+# with full-code rerank, and the vector index's coarse shortlist with cosine rerank, plus batch
+# throughput and memory per vector. Recall is measured against exact float cosine top-k; as the
+# synthetic clusters make most neighbours near-ties, "source_found" (the vector each query was
+# derived from is among the results) is reported as well.
+# Usage: python -m backend.benchmarks.binary_similarity_bench [--sizes 10000,100000] [--dim 1024]
+#        [--coarse-bits 256] [--oversample 40] [--batch 64]
+
+import argparse
+import json
+import time
+import numpy as np
+from backend.benchmarks.vector_memory_bench import synthetic_embeddings
+from backend.tools import binary_similarity
+from backend.tools.vector_index import VectorIndex
+
+
+def _latency(run, queries):
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(run(query))
+        latencies.append(time.perf_counter() - started)
+    latencies_ms = np.array(latencies) * 1000
+    return results, {
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def _recall(results, exact, k):
+    return round(float(np.mean([len(set(map(int, r)) & set(map(int, e))) / k for r, e in zip(results, exact)])), 4)
+
+
+def _found(results, picks):
+    return round(float(np.mean([int(pick) in set(map(int, r)) for r, pick in zip(results, picks)])), 4)
+
+
+def _throughput(run, queries, batch):
+    started = time.perf_counter()
+    for start in range(0, len(queries), batch):
+        run(queries[start:start + batch])
+    return round(len(queries) / (time.perf_counter() - started), 1)
+
+
+def run_size(size, dim, k, queries_count, coarse_bits, oversample, batch, rng):
+    vectors = synthetic_embeddings(size, dim, clusters=max(size // 400, 8), rng=rng)
+    picks = rng.integers(0, size, queries_count)
+    queries = vectors[picks] + 0.05 * rng.standard_normal((queries_count, dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    codes = binary_similarity.pack_bits(vectors)
+    query_codes = binary_similarity.pack_bits(queries)
+
+    def cosine_top(query):
+        similarities = vectors @ query
+        top = np.argpartition(-similarities, k - 1)[:k]
+        return top[np.argsort(-similarities[top])]
+
+    exact, cosine = _latency(cosine_top, queries)
+    full, hamming = _latency(lambda code: binary_similarity.search(codes, code, k, dim)[0][0], query_codes)
+    coarse, coarse_latency = _latency(
+        lambda code: binary_similarity.search(codes, code, k, dim, coarse_bits=coarse_bits, oversample=oversample)[0][0],
+        query_codes
+    )
+
+    index = VectorIndex(dim, ivf_min_size=size + 1, binary_min_size=1, coarse_bits=coarse_bits, oversample=oversample)
+    index.add(np.arange(size), vectors, np.zeros(size))
+    shortlisted, shortlist_latency = _latency(lambda query: [item for item, _, _ in index.search(query, k=k)], queries)
+
+    return {
+        "size": size,
+        "float_cosine": {**cosine, "source_found": _found(exact, picks), "bytes_per_vector": dim * 4,
+                         "batch_queries_per_s": _throughput(lambda q: q @ vectors.T, queries, batch)},
+        "hamming": {**hamming, f"recall@{k}": _recall(full, exact, k), "source_found": _found(full, picks),
+                    "bytes_per_vector": codes.shape[1] * 8,
+                    "batch_queries_per_s": _throughput(lambda q: binary_similarity.hamming_distances(codes, q),
+                                                       query_codes, batch)},
+        f"hamming_{coarse_bits}bit_rerank": {**coarse_latency, f"recall@{k}": _recall(coarse, exact, k),
+                                               "source_found": _found(coarse, picks)},
+        f"index_{coarse_bits}bit_shortlist_cosine_rerank": {**shortlist_latency,
+                                                            f"recall@{k}": _recall(shortlisted, exact, k),
+                                                            "source_found": _found(shortlisted, picks)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark binary Hamming similarity against float cosine")
+    parser.add_argument("--sizes", default="10000,100000", help="comma separated matrix sizes")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--coarse-bits", type=int, default=256)
+    parser.add_argument("--oversample", type=int, default=40)
+    parser.add_argument("--batch", type=int, default=64, help="queries per batch for the throughput figures")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = [run_size(int(size), args.dim, args.k, args.queries, args.coarse_bits, args.oversample, args.batch, rng)
+               for size in args.sizes.split(",")]
+    print(json.dumps({"dim": args.dim, "k": args.k, "popcount": "numpy.bitwise_count" if hasattr(np, "bitwise_count")
+                      else "lookup table", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# backend/benchmarks/corpus.py
+
+# Fixed, labelled corpus used by the benchmarks. Bump the version whenever entries change
+# so that reports from different runs are only compared against the same corpus.
+INTENT_CORPUS_VERSION = 1
+
+# (message, expected intent). Phrasings deliberately differ from the router exemplars.
+INTENT_CORPUS = [
+    ('create folder "invoices"', "create_folder"),
+    ("could you set up a new folder for my music", "create_folder"),
+    ("I need a directory called experiments", "create_folder"),
+    ('delete folder "old_builds"', "delete_folder"),
+    ("please remove the downloads directory", "delete_folder"),
+    ('create file "main.py"', "create_file"),
+    ("start a new text file named ideas", "create_file"),
+    ('delete file "debug.log"', "delete_file"),
+    ("throw away the file called backup.zip", "delete_file"),
+    ("execute python code ```print(sum(range(10)))```", "execute_python_code"),
+    ("run this python: print('hello')", "execute_python_code"),
+    ("execute bash code ```ls -la```", "execute_bash_code"),
+    ("run the command df -h in a shell", "execute_bash_code"),
+    ("execute javascript code ```console.log(42)```", "execute_js_code"),
+    ("run this node snippet for me", "execute_js_code"),
+    ("what have we discussed so far", "retrieve_memory"),
+    ("remind me what I asked earlier", "retrieve_memory"),
+    ("how do airplanes stay in the air", "api_request"),
+    ("write a haiku about autumn", "api_request"),
+    ("translate good morning into spanish", "api_request"),
+    ("give me three ideas for dinner", "api_request"),
+]
+
+RETRIEVAL_CORPUS_VERSION = 1
+
+# Past interactions a memory search runs over, and (query, index of the interaction it should
+# find first). Queries paraphrase their target rather than repeating its words.
+RETRIEVAL_DOCUMENTS = [
+    "How do I reverse a list in Python without modifying the original?",
+    "Write a bash one-liner that counts lines in every .log file",
+    "What is the capital of Australia?",
+    "Suggest a vegetarian lasagna recipe for six people",
+    "Explain the difference between TCP and UDP",
+    "Create a folder called tax_returns_2023 on my desktop",
+    "Translate 'where is the train station' into German",
+    "Why is the sky blue during the day and red at sunset?",
+    "Summarise the plot of Pride and Prejudice in three sentences",
+    "Convert 72 degrees Fahrenheit to Celsius",
+    "Give me a weekly running plan for a first half marathon",
+    "How do I undo the last git commit but keep my changes?",
+]
+
+RETRIEVAL_QUERIES = [
+    ("python copy of a list in reverse order", 0),
+    ("shell command to count lines in log files", 1),
+    ("which city is australia's capital", 2),
+    ("meatless lasagne dinner for a group", 3),
+    ("tcp versus udp protocols", 4),
+    ("that directory for my 2023 taxes", 5),
+    ("german for asking the way to the railway station", 6),
+    ("why does the sky change colour at sunset", 7),
+    ("short summary of the jane austen novel", 8),
+    ("fahrenheit to celsius for 72", 9),
+    ("half marathon training schedule for beginners", 10),
+    ("revert my last commit in git without losing work", 11),
+]
@@ -0,0 +1,121 @@
+# backend/benchmarks/db_write_bench.py
+#
+# Insert throughput and read latency of the SQLite database under concurrent writers, comparing
+# default SQLite settings with one commit per row, the tuned pragmas, and tuned pragmas plus the
+# background batch writer. Runs against a temporary database file.
+# Usage: python -m backend.benchmarks.db_write_bench [--writers N] [--rows N]
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from flask import Flask
+from backend.config import Config
+from backend.models.db import db
+from backend.models.batch_writer import BatchWriter
+from backend.models.models import CodeExecutionLog
+
+MODES = [
+    ("default_per_row_commit", False, False),
+    ("tuned_per_row_commit", True, False),
+    ("tuned_batched", True, True),
+]
+
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def log_row(writer_id, i):
+    return CodeExecutionLog(user_id=str(writer_id), language='python', code=f"print({i})", output=str(i), status='success')
+
+
+def run_mode(directory, name, tuned, batched, writers, rows):
+    Config.SQLITE_TUNING = tuned
+    app = make_app(os.path.join(directory, f"{name}.db"))
+    writer = BatchWriter(max_batch=Config.DB_BATCH_MAX_SIZE, flush_interval=Config.DB_BATCH_FLUSH_INTERVAL)
+    if batched:
+        app.config['DB_BATCH_WRITES'] = True
+        writer.init_app(app)
+        writer.start()
+
+    errors, read_latencies = [], []
+    done = threading.Event()
+
+    def write(writer_id):
+        with app.app_context():
+            for i in range(rows):
+                try:
+                    if batched:
+                        writer.add(log_row(writer_id, i))
+                    else:
+                        db.session.add(log_row(writer_id, i))
+                        db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(type(e).__name__)
+
+    def read():
+        with app.app_context():
+            while not done.is_set():
+                started = time.perf_counter()
+                try:
+                    CodeExecutionLog.query.order_by(CodeExecutionLog.id.desc()).limit(20).all()
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(type(e).__name__)
+                read_latencies.append(time.perf_counter() - started)
+                db.session.remove()
+
+    reader = threading.Thread(target=read)
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    started = time.perf_counter()
+    reader.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+    elapsed = time.perf_counter() - started
+    done.set()
+    reader.join()
+
+    with app.app_context():
+        written = CodeExecutionLog.query.count()
+        db.session.remove()
+        db.engines[None].dispose()
+    latencies_ms = np.array(read_latencies or [0.0]) * 1000
+    return {
+        "mode": name,
+        "rows_written": written,
+        "inserts_per_second": round(written / elapsed, 1),
+        "read_p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "read_p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "reads": len(read_latencies),
+        "errors": {error: errors.count(error) for error in set(errors)},
+        "batch_writer": writer.stats() if batched else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite insert throughput and read latency")
+    parser.add_argument("--writers", type=int, default=8, help="concurrent writer threads")
+    parser.add_argument("--rows", type=int, default=250, help="rows inserted per writer")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [run_mode(directory, name, tuned, batched, args.writers, args.rows) for name, tuned, batched in MODES]
+    print(json.dumps({"writers": args.writers, "rows_per_writer": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
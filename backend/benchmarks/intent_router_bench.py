@@ -0,0 +1,54 @@
+# backend/benchmarks/intent_router_bench.py
+#
+# Compare the WordLlama nearest-neighbour router with the GPT-2 keyword parser.
+# Usage: python -m backend.benchmarks.intent_router_bench [--repeat N] [--skip-gpt2]
+
+import argparse
+import json
+import time
+import numpy as np
+from backend.benchmarks.corpus import INTENT_CORPUS, INTENT_CORPUS_VERSION
+from backend.tools.intent_router import intent_router
+from backend.tools.intent_parser import parse_intent_with_gpt2
+
+
+def run_classifier(classify, repeat):
+    """Return accuracy and latency percentiles of `classify(message) -> intent` over the corpus."""
+    latencies, correct = [], 0
+    for message, expected in INTENT_CORPUS:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            intent = classify(message)
+            latencies.append(time.perf_counter() - started)
+        correct += int(intent == expected)
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "accuracy": round(correct / len(INTENT_CORPUS), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WordLlama intent routing against GPT-2")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per message")
+    parser.add_argument("--skip-gpt2", action="store_true", help="only benchmark the WordLlama router")
+    args = parser.parse_args()
+
+    # Build the exemplar matrix (and load the model) outside the timed region
+    intent_router.route("warm up")
+    report = {
+        "corpus_version": INTENT_CORPUS_VERSION,
+        "messages": len(INTENT_CORPUS),
+        "wordllama_router": run_classifier(lambda message: intent_router.route(message)[0] or "api_request", args.repeat),
+    }
+    if not args.skip_gpt2:
+        parse_intent_with_gpt2("warm up")
+        report["gpt2"] = run_classifier(parse_intent_with_gpt2, args.repeat)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# backend/benchmarks/llm_client_bench.py
+#
+# Offline benchmark of the pooled provider clients. Starts a local OpenAI-compatible stub server
+# that streams canned tokens, optionally failing a share of requests, and drives concurrent
+# streaming requests through backend.tools.llm_streaming.openai_tokens.
+# Usage: python -m backend.benchmarks.llm_client_bench [--requests N] [--concurrency N] [--failure-rate F]
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from backend.config import Config
+from backend.tools.llm_clients import provider_client_metrics, reset_provider_clients
+from backend.tools.llm_streaming import openai_tokens
+
+
+class StubState:
+    def __init__(self, tokens, latency, token_interval, failure_rate):
+        self.tokens = tokens
+        self.latency = latency
+        self.token_interval = token_interval
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'injected_failures': 0, 'connections': 0}
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+
+def make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 with chunked responses so clients can keep connections alive
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            state.count('connections')
+
+        def log_message(self, *args):
+            pass
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            state.count('requests')
+            time.sleep(state.latency)
+
+            if random.random() < state.failure_rate:
+                state.count('injected_failures')
+                body = json.dumps({'error': {'message': 'stub overloaded', 'type': 'server_error'}}).encode()
+                self.send_response(503)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(state.tokens):
+                chunk = {
+                    'id': 'stub', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'stub',
+                    'choices': [{'index': 0, 'delta': {'content': f"tok{i} "}, 'finish_reason': None}],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                if state.token_interval:
+                    time.sleep(state.token_interval)
+            # Send the terminating chunk with [DONE]: the SDK closes the response as soon as it
+            # sees [DONE], and the connection is only reusable if the body was read to the end
+            data = b"data: [DONE]\n\n"
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n0\r\n\r\n")
+
+    return StubHandler
+
+
+def start_stub(state):
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentiles_ms(values):
+    if not values:
+        return {"p50_ms": None, "p99_ms": None, "mean_ms": None}
+    values_ms = np.array(values) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(values_ms, 99)), 3),
+        "mean_ms": round(float(values_ms.mean()), 3),
+    }
+
+
+def one_request(prompt):
+    started = time.perf_counter()
+    ttft = None
+    for _ in openai_tokens(prompt, 'stub', Config.TEMPERATURE, 64, Config.TOP_P):
+        if ttft is None:
+            ttft = time.perf_counter() - started
+    return ttft, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pooled LLM provider clients against a local stub")
+    parser.add_argument("--requests", type=int, default=200, help="streaming requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+    parser.add_argument("--tokens", type=int, default=20, help="tokens streamed per response")
+    parser.add_argument("--latency-ms", type=float, default=20, help="stub delay before responding")
+    parser.add_argument("--token-interval-ms", type=float, default=1, help="stub delay between tokens")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+
+    state = StubState(args.tokens, args.latency_ms / 1000, args.token_interval_ms / 1000, args.failure_rate)
+    server = start_stub(state)
+    Config.OPENAI_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or 'stub'
+    # Keep retries short so the benchmark measures the client rather than the backoff policy
+    Config.LLM_RETRY_BACKOFF_BASE = min(Config.LLM_RETRY_BACKOFF_BASE, 0.05)
+    reset_provider_clients()
+
+    ttfts, durations, errors = [], [], {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(one_request, f"prompt {i}") for i in range(args.requests)]
+        for future in futures:
+            try:
+                ttft, duration = future.result()
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            ttfts.append(ttft)
+            durations.append(duration)
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    print(json.dumps({
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "failure_rate": args.failure_rate,
+        "succeeded": len(durations),
+        "errors": errors,
+        "requests_per_second": round(len(durations) / elapsed, 1) if elapsed else 0.0,
+        "ttft": percentiles_ms(ttfts),
+        "total": percentiles_ms(durations),
+        "stub": state.counters,
+        "client": provider_client_metrics().get('openai'),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
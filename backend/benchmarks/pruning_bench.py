@@ -0,0 +1,196 @@
+# backend/benchmarks/pruning_bench.py
+#
+# Quality and cost of a WordLlama model before and after pruning, measured on the fixed corpora
+# in corpus.py: intent routing accuracy, memory retrieval recall@1 / MRR, p50/p99 embedding
+# latency, model size on disk and in memory, and load time. Each model is written to a temporary
+# artifact directory and served by a fresh EmbeddingEngine, exactly as the application would.
+# `pre_and_post_pruning_validation` in tools/pruning_utils.py runs the same comparison.
+# Usage: python -m backend.benchmarks.pruning_bench [--policy threshold|top_k|percentile]
+#        [--threshold X] [--top-k N] [--percentile P] [--min-keep-ratio R] [--repeat N]
+#        [--output report.json] [--baseline previous_report.json]
+
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+import numpy as np
+from backend.config import Config
+from backend.benchmarks.corpus import (
+    INTENT_CORPUS, INTENT_CORPUS_VERSION, RETRIEVAL_CORPUS_VERSION, RETRIEVAL_DOCUMENTS, RETRIEVAL_QUERIES
+)
+from backend.models.embedding_engine import EmbeddingEngine
+from backend.models.model_artifact import write_artifact, read_manifest
+
+# Metrics where a lower value is better (used for the comparison summary)
+_LOWER_IS_BETTER = {'embed_p50_ms', 'embed_p99_ms', 'load_ms', 'matrix_bytes', 'artifact_bytes'}
+
+
+def _percentiles(latencies):
+    latencies_ms = np.array(latencies) * 1000
+    return round(float(np.percentile(latencies_ms, 50)), 3), round(float(np.percentile(latencies_ms, 99)), 3)
+
+
+def measure_load(directory, repeat=3):
+    """Best-of-`repeat` time for a fresh engine to load the model in `directory`."""
+    timings = []
+    for _ in range(repeat):
+        engine = EmbeddingEngine(directory, check_interval=float('inf'))
+        started = time.perf_counter()
+        engine.embeddings
+        timings.append(time.perf_counter() - started)
+    return round(min(timings) * 1000, 3)
+
+
+def intent_accuracy(engine):
+    from backend.tools.intent_router import IntentRouter
+
+    router = IntentRouter(
+        engine,
+        top_k=Config.INTENT_ROUTER_TOP_K,
+        min_similarity=Config.INTENT_ROUTER_MIN_SIMILARITY,
+        min_vote_share=Config.INTENT_ROUTER_MIN_VOTE_SHARE,
+        metric=Config.INTENT_ROUTER_METRIC
+    )
+    correct = sum(int((router.route(message)[0] or "api_request") == expected) for message, expected in INTENT_CORPUS)
+    return round(correct / len(INTENT_CORPUS), 4)
+
+
+def retrieval_quality(engine):
+    """
+    Recall@1 and mean reciprocal rank of the retrieval corpus (cosine over pooled embeddings).
+    Ties are ranked pessimistically: a document scoring the same as the target ranks ahead of it,
+    so a model that collapses documents onto one vector doesn't score a perfect recall.
+    """
+    documents = engine.embed(RETRIEVAL_DOCUMENTS)
+    queries = engine.embed([query for query, _ in RETRIEVAL_QUERIES])
+    targets = np.array([target for _, target in RETRIEVAL_QUERIES])
+    similarities = queries @ documents.T
+    target_scores = similarities[np.arange(len(targets)), targets]
+    ranks = (similarities >= target_scores[:, None]).sum(axis=1)  # Counts the target itself once
+    return round(float(np.mean(ranks == 1)), 4), round(float(np.mean(1.0 / ranks)), 4)
+
+
+def embedding_latency(engine, repeat):
+    texts = [message for message, _ in INTENT_CORPUS] + RETRIEVAL_DOCUMENTS + [query for query, _ in RETRIEVAL_QUERIES]
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            started = time.perf_counter()
+            engine.embed(text)
+            latencies.append(time.perf_counter() - started)
+    return _percentiles(latencies)
+
+
+def evaluate_directory(directory, repeat=5):
+    """Report for the model artifact in `directory`."""
+    load_ms = measure_load(directory)
+    engine = EmbeddingEngine(directory, check_interval=float('inf'))
+    engine.embed("warm up")
+    recall, mrr = retrieval_quality(engine)
+    p50, p99 = embedding_latency(engine, repeat)
+    manifest = read_manifest(directory)
+    index_map = engine.index_map
+    return {
+        'rows': len(engine.embeddings),
+        'intent_accuracy': intent_accuracy(engine),
+        'retrieval_recall_at_1': recall,
+        'retrieval_mrr': mrr,
+        'embed_p50_ms': p50,
+        'embed_p99_ms': p99,
+        'load_ms': load_ms,
+        'matrix_bytes': int(engine.embeddings.nbytes) + (int(index_map.nbytes) if index_map is not None else 0),
+        'artifact_bytes': sum(entry['bytes'] for entry in manifest['files'].values()),
+    }
+
+
+def evaluate_model(embeddings, tokenizer, config, index_map=None, repeat=5):
+    """Report for an in-memory model, served from a temporary artifact directory."""
+    with tempfile.TemporaryDirectory() as directory:
+        write_artifact(directory, embeddings, tokenizer, config, index_map=index_map, version=1)
+        return evaluate_directory(directory, repeat)
+
+
+def compare(before, after):
+    """Per-metric change from `before` to `after`, and whether each change is an improvement."""
+    changes = {}
+    for metric, old in before.items():
+        new = after.get(metric)
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+            continue
+        delta = new - old
+        better = delta < 0 if metric in _LOWER_IS_BETTER else delta > 0
+        changes[metric] = {'delta': round(delta, 4), 'improved': bool(better) if delta else None}
+    return changes
+
+
+def validate_pruning(embeddings, tokenizer, config, index_map=None, repeat=5, signals=None, **policy):
+    """
+    Prune a copy of the model with `policy` (see `prune_wordllama_embeddings`) and evaluate both
+    versions. Returns the report: corpus versions, policy, `before`, `after` and `changes`.
+    """
+    from backend.tools.pruning_utils import get_importance_scores, prune_wordllama_embeddings, compose_index_maps
+
+    importance_scores = get_importance_scores(embeddings, index_map, signals)
+    pruned, pruning_map = prune_wordllama_embeddings(embeddings, importance_scores, **policy)
+    if index_map is not None:
+        pruning_map = compose_index_maps(index_map, pruning_map)
+    before = evaluate_model(embeddings, tokenizer, config, index_map, repeat)
+    after = evaluate_model(pruned, tokenizer, config, pruning_map, repeat)
+    return {
+        'intent_corpus_version': INTENT_CORPUS_VERSION,
+        'retrieval_corpus_version': RETRIEVAL_CORPUS_VERSION,
+        'policy': {key: value for key, value in policy.items() if value is not None},
+        'before': before,
+        'after': after,
+        'changes': compare(before, after),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WordLlama quality and cost before and after pruning")
+    parser.add_argument("--model", default=Config.WORDLLAMA_ARTIFACT_DIR, help="model artifact directory")
+    parser.add_argument("--signals", default=Config.PRUNING_SIGNALS_PATH, help="token signal counts (.npz)")
+    parser.add_argument("--policy", choices=["threshold", "top_k", "percentile"], default=Config.PRUNING_POLICY)
+    parser.add_argument("--threshold", type=float)
+    parser.add_argument("--top-k", type=int)
+    parser.add_argument("--percentile", type=float)
+    parser.add_argument("--min-keep-ratio", type=float, help="override PRUNING_MIN_KEEP_RATIO")
+    parser.add_argument("--repeat", type=int, default=5, help="timed embeddings per corpus text")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--baseline", help="earlier report to compare the pruned model against")
+    args = parser.parse_args()
+
+    from backend.tools.importance import TokenSignals
+
+    engine = EmbeddingEngine(args.model, check_interval=float('inf'))
+    embeddings = engine.embeddings
+    min_keep = int(np.ceil(len(embeddings) * args.min_keep_ratio)) if args.min_keep_ratio is not None else None
+    report = validate_pruning(
+        embeddings, engine.tokenizer, dict(engine.config), engine.index_map,
+        repeat=args.repeat,
+        signals=TokenSignals(args.signals if os.path.exists(args.signals) else None),
+        policy=args.policy, threshold=args.threshold, top_k=args.top_k, percentile=args.percentile,
+        min_keep=min_keep
+    )
+    report['model_version'] = engine.model_version
+    report['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        same_corpus = all(baseline.get(key) == report[key]
+                          for key in ('intent_corpus_version', 'retrieval_corpus_version'))
+        report['vs_baseline'] = compare(baseline['after'], report['after']) if same_corpus else \
+            "baseline used a different corpus version; not compared"
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# backend/benchmarks/query_plan_audit.py
+#
+# Run EXPLAIN QUERY PLAN for the ORM queries on the request path and fail if any of them scans a
+# whole table or sorts its rows instead of reading them in index order. Each query is executed
+# through the same builder functions the application uses, and the plan is captured from the SQL
+# actually sent to the database (SQLite or PostgreSQL).
+# Usage: python -m backend.benchmarks.query_plan_audit [--database sqlite:///path/to/oais.db]
+# Without --database an in-memory database is created from the models and seeded.
+
+import argparse
+import json
+import re
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import Flask
+from sqlalchemy import event, text
+from backend.models.db import db
+from backend.models.models import User, UserSession, Interaction, CodeExecutionLog, InteractionEmbedding
+from backend.tools.memory import todays_session_query, interaction_history_query, latest_interaction_query
+from backend.tools.success_stats import success_counts
+
+# A table scan without an index: "SCAN interactions" (before SQLite 3.36 "SCAN TABLE interactions"),
+# or "Seq Scan on interactions" in a PostgreSQL plan
+_FULL_SCAN = {
+    "sqlite": re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+# A sort of the matching rows: "USE TEMP B-TREE FOR ORDER BY" in SQLite, a Sort node in PostgreSQL
+_SORT = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)"),
+    "postgresql": re.compile(r"^\s*(?:->\s*)?(Sort|Incremental Sort)\b"),
+}
+_EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+HOT_QUERIES = {
+    "todays_session": lambda: todays_session_query(1).first(),
+    "history_by_session": lambda: interaction_history_query(1, session_id=1).limit(20).all(),
+    "history_by_session_and_outcome": lambda: interaction_history_query(1, session_id=1, task_type='failure').limit(1).all(),
+    "history_by_user": lambda: interaction_history_query(1).limit(20).all(),
+    "latest_interaction_of_user": lambda: latest_interaction_query(1).first(),
+    "latest_interaction": lambda: latest_interaction_query().first(),
+    "interactions_by_id": lambda: Interaction.query.filter(Interaction.id.in_([1, 2, 3])).all(),
+    "user_by_username": lambda: User.query.filter_by(username='user0').first(),
+    "embeddings_of_user": lambda: InteractionEmbedding.query.filter_by(user_id=1).all(),
+    "success_rate": lambda: success_counts(1),
+    "success_rate_window": lambda: success_counts(1, window_days=30),
+    "executions_of_user": lambda: (CodeExecutionLog.query.filter_by(user_id='1')
+                                   .order_by(CodeExecutionLog.timestamp.desc()).limit(20).all()),
+}
+
+
+@contextmanager
+def capture_plans(engine):
+    """Record `(sql, plan rows)` for every SELECT executed on `engine` inside the block."""
+    plans = []
+    prefix = _EXPLAIN[engine.dialect.name]
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            cursor.execute(prefix + statement, parameters)
+            plans.append((statement, [row[-1] for row in cursor.fetchall()]))
+
+    event.listen(engine, "before_cursor_execute", explain)
+    try:
+        yield plans
+    finally:
+        event.remove(engine, "before_cursor_execute", explain)
+
+
+def seed(sessions_per_user=20, interactions_per_session=50, users=5):
+    now = datetime.utcnow()
+    for u in range(users):
+        user = User(username=f"user{u}")
+        db.session.add(user)
+        db.session.flush()
+        for s in range(sessions_per_user):
+            user_session = UserSession(user_id=user.id, topic="Default", model_used="gpt-2",
+                                       start_time=now - timedelta(days=s))
+            db.session.add(user_session)
+            db.session.flush()
+            db.session.add_all(
+                Interaction(session_id=user_session.id, user_id=user.id, prompt=f"prompt {i}", response="response",
+                            task_outcome="success" if i % 4 else "failure", intent="create_file",
+                            timestamp=now - timedelta(days=s, minutes=i))
+                for i in range(interactions_per_session)
+            )
+    db.session.commit()
+    db.session.execute(text("ANALYZE"))
+
+
+def audit(queries):
+    """Run each query and return a report entry per query, flagging full table scans and sorts."""
+    report = []
+    engine = db.engine
+    full_scan = _FULL_SCAN[engine.dialect.name]
+    sort = _SORT[engine.dialect.name]
+    for name, run in queries.items():
+        with capture_plans(engine) as plans:
+            run()
+        db.session.rollback()
+        scans = sorted({match.group(1) for _, plan in plans for line in plan
+                        for match in [full_scan.search(line)] if match})
+        sorts = sorted({match.group(1) for _, plan in plans for line in plan
+                        for match in [sort.search(line)] if match})
+        report.append({
+            "query": name,
+            "ok": not scans and not sorts,
+            "full_scans": scans,
+            "sorts": sorts,
+            "plans": [plan for _, plan in plans],
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot ORM query does a full table scan or a sort")
+    parser.add_argument("--database", help="SQLAlchemy URI of an existing (migrated) database")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database or "sqlite://"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        if not args.database:
+            db.create_all()
+            seed()
+        report = audit(HOT_QUERIES)
+
+    failures = [entry["query"] for entry in report if not entry["ok"]]
+    print(json.dumps({"queries": len(report), "failures": failures, "report": report}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
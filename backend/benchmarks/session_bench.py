@@ -0,0 +1,124 @@
+# backend/benchmarks/session_bench.py
+#
+# Per-request overhead of each session backend: a request that only reads the session and one
+# that modifies it, timed through the Flask test client against the same app serving a client
+# without a session cookie (no storage access). Also reports how many storage writes the
+# read-only requests caused (should be 0).
+# Usage: python -m backend.benchmarks.session_bench [--requests N] [--backends sql,memory,filesystem]
+#        [--database postgresql://...] [--redis-url redis://localhost:6379/0]
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+import numpy as np
+from flask import Flask, session
+from backend.models.db import db
+from backend.models.session_store import init_session_store
+
+
+def make_app(backend, directory, database=None, redis_url=None):
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='bench',
+        SQLALCHEMY_DATABASE_URI=database or f"sqlite:///{os.path.join(directory, 'sessions.db')}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SESSION_BACKEND=backend,
+        SESSION_SWEEP_INTERVAL=0,
+        SESSION_FILE_DIR=os.path.join(directory, 'flask_session'),
+        SESSION_REDIS_URL=redis_url or 'redis://localhost:6379/0',
+        SESSION_REFRESH_EACH_REQUEST=False,
+        PERMANENT_SESSION_LIFETIME=timedelta(days=31),
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        init_session_store(app)
+
+    @app.route('/baseline')
+    def baseline():
+        return 'ok'
+
+    @app.route('/read')
+    def read():
+        return str(session.get('user_id'))
+
+    @app.route('/write')
+    def write():
+        session['counter'] = session.get('counter', 0) + 1
+        return str(session['counter'])
+
+    @app.route('/login')
+    def login():
+        session['user_id'] = 1
+        return 'ok'
+
+    return app
+
+
+def time_requests(client, path, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        client.get(path)
+        latencies.append(time.perf_counter() - started)
+    latencies_ms = np.array(latencies) * 1000
+    return float(np.percentile(latencies_ms, 50)), float(np.percentile(latencies_ms, 99))
+
+
+def run_backend(backend, requests, directory, database=None, redis_url=None):
+    app = make_app(backend, directory, database, redis_url)
+    interface = app.session_interface
+    writes = {'count': 0}
+    upsert = interface._upsert_session
+
+    def counting_upsert(*args, **kwargs):
+        writes['count'] += 1
+        return upsert(*args, **kwargs)
+
+    interface._upsert_session = counting_upsert
+    client = app.test_client()
+    client.get('/login')
+    time_requests(client, '/read', 20)  # warm up connections and caches
+
+    baseline_p50, _ = time_requests(app.test_client(), '/baseline', requests)
+    writes['count'] = 0
+    read_p50, read_p99 = time_requests(client, '/read', requests)
+    read_writes = writes['count']
+    write_p50, write_p99 = time_requests(client, '/write', requests)
+
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    return {
+        "backend": backend,
+        "baseline_p50_ms": round(baseline_p50, 3),
+        "read_overhead_p50_ms": round(read_p50 - baseline_p50, 3),
+        "read_p99_ms": round(read_p99, 3),
+        "write_overhead_p50_ms": round(write_p50 - baseline_p50, 3),
+        "write_p99_ms": round(write_p99, 3),
+        "storage_writes_on_reads": read_writes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request session overhead by backend")
+    parser.add_argument("--requests", type=int, default=1000, help="timed requests per route")
+    parser.add_argument("--backends", default="sql,memory,filesystem", help="comma separated backends")
+    parser.add_argument("--database", help="SQLAlchemy URI for the sql backend (default: temporary SQLite file)")
+    parser.add_argument("--redis-url", help="Redis URL; adds the redis backend")
+    args = parser.parse_args()
+
+    backends = args.backends.split(",") + (["redis"] if args.redis_url else [])
+    results = []
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as directory:
+            results.append(run_backend(backend, args.requests, directory, args.database, args.redis_url))
+    print(json.dumps({"requests": args.requests, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
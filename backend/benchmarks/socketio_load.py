@@ -0,0 +1,192 @@
+# backend/benchmarks/socketio_load.py
+#
+# Socket.IO load test: open many concurrent connections, keep them idle, then drive real work
+# through them and report connection and message throughput. Each connection runs `--messages`
+# turns of the chosen scenario:
+#   chat     a `message` event through intent classification and LLM streaming (the server
+#            acknowledges the event once the reply has been streamed)
+#   execute  an `execute_code` job, timed until its `execute_code_response` arrives
+#   mixed    chat and execute turns alternating
+#   ping     `ping_server` round trips only
+# Meanwhile one extra connection sends `ping_server` every `--probe-interval` seconds; its round
+# trip shows how long the server's event loop stalls under the load (under eventlet/gevent a
+# blocking call in any handler delays every connection).
+# Usage: python -m backend.benchmarks.socketio_load [--url URL] [--connections N] [--messages N]
+#        [--scenario mixed] [--provider local] [--model gpt2]
+# Start the server first, e.g. `SOCKETIO_ASYNC_MODE=eventlet python run.py`.
+
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+import socketio
+
+CHAT_PROMPTS = [
+    "tell me a joke about databases",
+    "explain how a hash map works",
+    "write a short poem about the sea",
+    "what is the capital of france",
+]
+EXECUTE_CODE = "print(sum(i * i for i in range(10000)))"
+
+
+class LoadClient:
+    """One connection; collects streamed frames and execution results as they arrive."""
+
+    def __init__(self):
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.frames = 0
+        self.errors = []
+        self.results = {}
+        self.waiters = {}
+        self.sio.on('message', self._on_message)
+        self.sio.on('execute_code_response', self._on_execute_response)
+
+    async def _on_message(self, data):
+        self.frames += 1
+        if isinstance(data, dict) and data.get('error'):
+            self.errors.append(data['error'])
+        return True  # Acknowledge streamed frames, as the web client does
+
+    async def _on_execute_response(self, data):
+        job_id = data.get('job_id')
+        waiter = self.waiters.pop(job_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(data)
+        else:
+            self.results[job_id] = data
+
+    async def chat(self, prompt, provider, model, timeout):
+        payload = json.dumps({'message': prompt, 'provider': provider, 'model': model, 'ack': True})
+        errors = len(self.errors)
+        await self.sio.call('message', payload, timeout=timeout)
+        if len(self.errors) > errors:
+            raise RuntimeError(self.errors[-1])
+
+    async def execute(self, code, timeout):
+        submitted = asyncio.get_running_loop().create_future()
+        self.sio.on('execute_code_submitted', lambda data: submitted.done() or submitted.set_result(data))
+        await self.sio.emit('execute_code', {'code': code, 'language': 'python'})
+        job_id = (await asyncio.wait_for(submitted, timeout)).get('job_id')
+        if job_id in self.results:
+            result = self.results.pop(job_id)
+        else:
+            self.waiters[job_id] = asyncio.get_running_loop().create_future()
+            result = await asyncio.wait_for(self.waiters[job_id], timeout)
+        if result.get('error') or result.get('status') != 'success':
+            raise RuntimeError(result.get('error') or result.get('output'))
+
+
+async def connect_client(url, timeout):
+    client = LoadClient()
+    started = time.perf_counter()
+    await client.sio.connect(url, transports=['websocket'], wait_timeout=timeout)
+    return client, time.perf_counter() - started
+
+
+async def turn_loop(client, args, index, latencies, failures):
+    for i in range(args.messages):
+        kind = args.scenario if args.scenario != 'mixed' else ('chat', 'execute')[(index + i) % 2]
+        started = time.perf_counter()
+        try:
+            if kind == 'chat':
+                await client.chat(CHAT_PROMPTS[(index + i) % len(CHAT_PROMPTS)], args.provider, args.model,
+                                  args.timeout)
+            elif kind == 'execute':
+                await client.execute(EXECUTE_CODE, args.timeout)
+            else:
+                await client.sio.call('ping_server', {'seq': i}, timeout=args.timeout)
+        except Exception:
+            failures.setdefault(kind, []).append(i)
+            continue
+        latencies.setdefault(kind, []).append(time.perf_counter() - started)
+
+
+async def probe_loop(client, interval, timeout, latencies, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            await client.sio.call('ping_server', {'probe': True}, timeout=timeout)
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            latencies.append(timeout)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def percentiles_ms(values):
+    if not values:
+        return {"p50_ms": None, "p99_ms": None, "max_ms": None, "mean_ms": None}
+    values_ms = np.array(values) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(values_ms, 99)), 3),
+        "max_ms": round(float(values_ms.max()), 3),
+        "mean_ms": round(float(values_ms.mean()), 3),
+    }
+
+
+async def run(args):
+    semaphore = asyncio.Semaphore(args.connect_concurrency)
+
+    async def limited_connect():
+        async with semaphore:
+            return await connect_client(args.url, args.timeout)
+
+    results = await asyncio.gather(*(limited_connect() for _ in range(args.connections)), return_exceptions=True)
+    clients = [result[0] for result in results if not isinstance(result, BaseException)]
+    connect_times = [result[1] for result in results if not isinstance(result, BaseException)]
+    probe, _ = await connect_client(args.url, args.timeout)
+
+    # Idle connections still cost the server heartbeats and memory; hold them before messaging
+    await asyncio.sleep(args.idle)
+
+    latencies, failures, probe_latencies = {}, {}, []
+    stop = asyncio.Event()
+    probing = asyncio.create_task(probe_loop(probe, args.probe_interval, args.timeout, probe_latencies, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(turn_loop(client, args, index, latencies, failures)
+                           for index, client in enumerate(clients)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probing
+
+    await asyncio.gather(*(client.sio.disconnect() for client in clients + [probe]), return_exceptions=True)
+    completed = sum(len(values) for values in latencies.values())
+    return {
+        "url": args.url,
+        "scenario": args.scenario,
+        "connections_requested": args.connections,
+        "connections_established": len(clients),
+        "connect": percentiles_ms(connect_times),
+        "turns_sent": len(clients) * args.messages,
+        "turns_failed": {kind: len(failed) for kind, failed in failures.items()},
+        "turns_per_second": round(completed / elapsed, 1) if elapsed else 0.0,
+        "turn_latency": {kind: percentiles_ms(values) for kind, values in latencies.items()},
+        "frames_received": sum(client.frames for client in clients),
+        "event_loop_probe": percentiles_ms(probe_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Socket.IO server with concurrent connections")
+    parser.add_argument("--url", default="http://localhost:5000", help="server URL")
+    parser.add_argument("--connections", type=int, default=100, help="concurrent connections to open")
+    parser.add_argument("--messages", type=int, default=20, help="turns per connection")
+    parser.add_argument("--scenario", choices=["chat", "execute", "mixed", "ping"], default="mixed")
+    parser.add_argument("--provider", default="local", help="LLM provider for chat turns")
+    parser.add_argument("--model", default="gpt2", help="LLM model for chat turns")
+    parser.add_argument("--connect-concurrency", type=int, default=50, help="connections opened in parallel")
+    parser.add_argument("--idle", type=float, default=1.0, help="seconds to hold the connections idle")
+    parser.add_argument("--probe-interval", type=float, default=0.1, help="seconds between event loop probes")
+    parser.add_argument("--timeout", type=float, default=60.0, help="connect and turn timeout in seconds")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
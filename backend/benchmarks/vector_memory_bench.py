@@ -0,0 +1,77 @@
+# backend/benchmarks/vector_memory_bench.py
+#
+# Search latency and recall of the vector memory index (flat vs IVF) on synthetic clustered
+# embeddings, at growing history sizes.
+# Usage: python -m backend.benchmarks.vector_memory_bench [--sizes 10000,100000,1000000] [--dim 256]
+
+import argparse
+import json
+import time
+import numpy as np
+from backend.tools.vector_index import VectorIndex
+
+
+def synthetic_embeddings(size, dim, clusters, rng):
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size)] + 0.5 * rng.standard_normal((size, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def time_searches(index, queries, k):
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append([item_id for item_id, _, _ in index.search(query, k=k)])
+        latencies.append(time.perf_counter() - started)
+    latencies_ms = np.array(latencies) * 1000
+    return results, {
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def run_size(size, dim, k, queries_count, nprobe, rng):
+    vectors = synthetic_embeddings(size, dim, clusters=max(size // 400, 8), rng=rng)
+    ids, timestamps = np.arange(size), np.zeros(size)
+    picks = rng.integers(0, size, queries_count)
+    queries = vectors[picks] + 0.05 * rng.standard_normal((queries_count, dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    flat = VectorIndex(dim, ivf_min_size=size + 1)
+    flat.add(ids, vectors, timestamps)
+    exact, flat_latency = time_searches(flat, queries, k)
+    del flat
+
+    started = time.perf_counter()
+    ivf = VectorIndex(dim, ivf_min_size=1, nprobe=nprobe)
+    ivf.add(ids, vectors, timestamps)
+    build_s = time.perf_counter() - started
+    approximate, ivf_latency = time_searches(ivf, queries, k)
+    recall = np.mean([len(set(a) & set(e)) / k for a, e in zip(approximate, exact)])
+
+    return {
+        "size": size,
+        "flat": flat_latency,
+        "ivf": {**ivf_latency, "build_s": round(build_s, 2), "lists": ivf.stats()["ivf_lists"],
+                f"recall@{k}": round(float(recall), 4)},
+        "index_bytes": ivf.stats()["bytes"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector memory search (flat vs IVF)")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma separated history sizes")
+    parser.add_argument("--dim", type=int, default=256, help="embedding dimension")
+    parser.add_argument("--k", type=int, default=5, help="results per search")
+    parser.add_argument("--queries", type=int, default=100, help="timed searches per size")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF lists probed per search")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    report = [run_size(int(size), args.dim, args.k, args.queries, args.nprobe, rng) for size in args.sizes.split(",")]
+    print(json.dumps({"dim": args.dim, "k": args.k, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
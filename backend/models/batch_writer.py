@@ -0,0 +1,190 @@
+# backend/models/batch_writer.py
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from backend.config import Config
+from backend.models.db import db
+from backend.tools import offload
+
+
+class BatchWriter:
+    """
+    Background writer that groups inserts into shared transactions.
+
+    ORM objects passed to `add` are queued and written by one thread: it waits up to
+    `flush_interval` seconds (or until `max_batch` objects are queued), adds them all and commits
+    once. `on_commit(obj)` callbacks run after that commit, inside the writer's app context, and
+    anything they add to the session is committed with a second commit for the batch. When the
+    writer has not been started with `start()` (or batching is disabled) `add` writes and commits
+    inline.
+
+    Under eventlet/gevent a commit (an fsync on SQLite) would block every green thread, so the
+    writes are handed to a native thread with `offload.run_blocking`. There they go through a
+    separate engine without a connection pool, since the shared pool's locks are green ones a
+    native thread must not wait on. Objects the callbacks add are moved to that engine as well.
+    """
+
+    def __init__(self, app=None, max_batch=500, flush_interval=0.05, max_queue=10000):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._app = None
+        self._enabled = True
+        self._native_engine = None
+        self._thread = None
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._counters = {'queued': 0, 'written': 0, 'batches': 0, 'failed': 0, 'commit_time_s': 0.0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the writer for `app`; the thread is started separately by `start()`."""
+        self.max_batch = app.config.get('DB_BATCH_MAX_SIZE', self.max_batch)
+        self.flush_interval = app.config.get('DB_BATCH_FLUSH_INTERVAL', self.flush_interval)
+        self._enabled = app.config.get('DB_BATCH_WRITES', True)
+        self._app = app
+
+    def start(self):
+        """Start the writer thread if DB_BATCH_WRITES is enabled (a no-op once started)."""
+        if not self._enabled or self._app is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='db-batch-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def add(self, obj, on_commit=None):
+        """Queue an ORM object for insertion (blocks while the queue is full)."""
+        if not self.running:
+            self._write([(obj, on_commit)])
+            return
+        with self._idle:
+            self._pending += 1
+        self._queue.put((obj, on_commit))
+        self._counters['queued'] += 1
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far has been written; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                with self._app.app_context():
+                    self._write(batch)
+            except Exception as e:
+                logging.error(f"Batch writer failed to write {len(batch)} rows: {e}")
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._idle.notify_all()
+
+    def _store(self, objects):
+        """Insert `objects` and commit, on a native thread when running under eventlet/gevent."""
+        if not offload.is_green():
+            db.session.add_all(objects)
+            db.session.commit()
+            return
+        if self._native_engine is None:
+            self._native_engine = create_engine(db.engine.url, poolclass=NullPool)
+        offload.run_blocking(self._store_native, self._native_engine, objects)
+
+    @staticmethod
+    def _store_native(engine, objects):
+        # Attributes stay loaded after the commit so callbacks can read them without a query
+        with Session(engine, expire_on_commit=False) as session:
+            session.add_all(objects)
+            session.commit()
+
+    def _store_follow_ups(self):
+        """Commit what the on_commit callbacks added or changed in `db.session`."""
+        if offload.is_green():
+            added = list(db.session.new)
+            for obj in added:
+                db.session.expunge(obj)
+            if added:
+                self._store(added)
+            if not (db.session.dirty or db.session.deleted):
+                return
+        db.session.commit()
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            self._store([obj for obj, _ in batch])
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                self._counters['failed'] += 1
+                logging.error(f"Failed to write {type(batch[0][0]).__name__}: {e}")
+                return
+            # Isolate the offending row so the rest of the batch is still written
+            for item in batch:
+                self._write([item])
+            return
+
+        callbacks = [(obj, on_commit) for obj, on_commit in batch if on_commit is not None]
+        for obj, on_commit in callbacks:
+            try:
+                on_commit(obj)
+            except Exception as e:
+                logging.error(f"Commit callback for {type(obj).__name__} {getattr(obj, 'id', None)} failed: {e}")
+        if callbacks:
+            try:
+                self._store_follow_ups()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Failed to commit batch follow-up writes: {e}")
+
+        self._counters['written'] += len(batch)
+        self._counters['batches'] += 1
+        self._counters['commit_time_s'] += time.perf_counter() - started
+
+    def stats(self):
+        counters = dict(self._counters)
+        batches = counters['batches']
+        return {
+            **counters,
+            'running': self.running,
+            'queue_depth': self._queue.qsize(),
+            'avg_batch_size': round(counters['written'] / batches, 2) if batches else 0.0,
+            'commit_time_s': round(counters['commit_time_s'], 3),
+        }
+
+
+batch_writer = BatchWriter(
+    max_batch=Config.DB_BATCH_MAX_SIZE,
+    flush_interval=Config.DB_BATCH_FLUSH_INTERVAL,
+    max_queue=Config.DB_BATCH_QUEUE_SIZE
+)
@@ -1,9 +1,8 @@
 from flask import Flask, request, jsonify
-import openai
-from config import Config
+from openai import OpenAIError
+from backend.tools.llm_clients import get_provider_client, ProviderUnavailable
 
 app = Flask(__name__)
-openai.api_key = Config.OPENAI_API_KEY
 
 IMAGE_SIZES = {
     'square': '1024x1024',
@@ -26,17 +25,19 @@ def generate_image():
     image_size = IMAGE_SIZES[ratio]
 
     try:
-        response = openai.Image.create(
-            prompt=prompt,
-            n=1,
-            size=image_size
+        # Shares the pooled OpenAI client (retries, concurrency limit, circuit breaker)
+        response = get_provider_client('openai').call(
+            lambda client: client.images.generate(model="dall-e-3", prompt=prompt, n=1, size=image_size)
         )
-        image_url = response['data'][0]['url']
+        image_url = response.data[0].url
         return jsonify({'image_url': image_url})
-    except openai.error.OpenAIError as e:
+    except ProviderUnavailable as e:
+        return jsonify({'error': f"OpenAI API unavailable: {str(e)}"}), 503
+    except OpenAIError as e:
         return jsonify({'error': f"OpenAI API error: {str(e)}"}), 500
     except Exception as e:
         return jsonify({'error': f"Server error: {str(e)}"}), 500
 
 if __name__ == '__main__':
+    # Run from the repository root: python -m backend.models.dalle_service
     app.run(host='0.0.0.0', port=5000)
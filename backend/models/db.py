@@ -1,7 +1,46 @@
 # backend/models/db.py
 
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from backend.config import Config
 
 db = SQLAlchemy()
 migrate = Migrate()
+
+
+def dialect_insert(connection, table):
+    """INSERT for `table` supporting ON CONFLICT clauses on the connection's backend (SQLite or PostgreSQL)."""
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def sqlite_pragmas():
+    """PRAGMA statements applied to every new SQLite connection (empty when tuning is disabled)."""
+    if not Config.SQLITE_TUNING:
+        return []
+    return [
+        f"PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size={Config.SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size={Config.SQLITE_MMAP_SIZE}",
+        f"PRAGMA busy_timeout={Config.SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+@event.listens_for(Engine, "connect")
+def _tune_sqlite_connection(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
@@ -0,0 +1,227 @@
+# backend/models/embedding_engine.py
+
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+from backend.models.model_artifact import load_artifact, convert_pickle, manifest_path
+
+
+# Everything read from one model version. A reload swaps in a new instance in one assignment, so a
+# reader holding an instance never pairs one version's matrix with another's index map
+LoadedModel = namedtuple('LoadedModel', ['embeddings', 'tokenizer', 'config', 'index_map', 'version'])
+_NOT_LOADED = LoadedModel(None, None, {}, None, None)
+
+
+def _token_ids(encoding):
+    """Return the list of token ids from a tokenizer encoding (HF `Encoding` or plain list)."""
+    return list(getattr(encoding, 'ids', encoding))
+
+
+class EmbeddingEngine:
+    """
+    Memory-resident WordLlama embedding engine.
+
+    The model is a versioned artifact directory (see model_artifact.py) whose embedding
+    matrix is memory-mapped, so workers share pages through the OS cache and loading costs the
+    same for any model size. The manifest is re-checked at most every `check_interval` seconds
+    and the model only reloaded when it changes. If the directory has no model yet, a legacy
+    pickled model at `legacy_path` is converted into it on first load. A pruned model carries an
+    `index_map` (token id -> matrix row, -1 for pruned tokens) that is applied to tokenizer ids
+    before lookup. The loaded version is held as one immutable `LoadedModel`, which embedding
+    calls snapshot once, so a concurrent reload never mixes two versions.
+    """
+
+    def __init__(self, artifact_dir, legacy_path=None, check_interval=5.0, verify=False):
+        self.artifact_dir = artifact_dir
+        self.model_path = manifest_path(artifact_dir)
+        self.legacy_path = legacy_path
+        self.check_interval = check_interval
+        self.verify = verify
+        self._lock = threading.RLock()
+        self._model = _NOT_LOADED
+        self._file_version = None
+        self._last_check = 0.0
+        self._listeners = []
+        self._token_listeners = []
+        self.version = 0
+        self.load_time = None
+
+    def add_listener(self, callback):
+        """Call `callback(version)` after every (re)load of the model."""
+        self._listeners.append(callback)
+
+    def add_token_listener(self, callback):
+        """Call `callback(token_ids)` with the tokenizer ids of every batch of embedded texts."""
+        self._token_listeners.append(callback)
+
+    def _current_file_version(self):
+        stat = os.stat(self.model_path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _ensure_loaded(self):
+        """Return the current `LoadedModel`, (re)loading it first when it is due."""
+        now = time.monotonic()
+        model = self._model
+        if model.embeddings is not None and now - self._last_check < self.check_interval:
+            return model
+        with self._lock:
+            if not os.path.exists(self.model_path):
+                self._convert_legacy()
+            file_version = self._current_file_version()
+            self._last_check = now
+            if self._model.embeddings is None or file_version != self._file_version:
+                self._load(file_version)
+            return self._model
+
+    def _convert_legacy(self):
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            raise FileNotFoundError(f"The WordLlama model {self.model_path} does not exist.")
+        logging.info(f"Converting pickled WordLlama model {self.legacy_path} into {self.artifact_dir}")
+        try:
+            convert_pickle(self.legacy_path, self.artifact_dir)
+        except Exception as e:
+            raise RuntimeError(f"Failed to convert WordLlama model: {e}")
+
+    def _load(self, file_version):
+        start_time = time.perf_counter()
+        try:
+            model_data = load_artifact(self.artifact_dir, verify=self.verify)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load WordLlama model: {e}")
+
+        model = LoadedModel(model_data['embeddings'], model_data['tokenizer'], model_data['config'],
+                            model_data['index_map'], model_data['version'])
+        self._model = model
+        self._file_version = file_version
+        self.version += 1
+        self.load_time = time.perf_counter() - start_time
+        logging.info(
+            f"Loaded WordLlama model v{self.version} with dimension: {model.config.get('dim')} "
+            f"and binary: {model.config.get('binary')} in {self.load_time:.3f}s"
+        )
+
+        for callback in list(self._listeners):
+            try:
+                callback(self.version)
+            except Exception as e:
+                logging.error(f"WordLlama reload listener failed: {e}")
+
+    def reload(self):
+        """Force a reload on the next access (e.g. right after a new version was written)."""
+        with self._lock:
+            self._file_version = None
+            self._last_check = 0.0
+
+    @property
+    def model(self):
+        """The current `LoadedModel`; use it to read several of its parts from the same version."""
+        return self._ensure_loaded()
+
+    @property
+    def embeddings(self):
+        return self._ensure_loaded().embeddings
+
+    @property
+    def tokenizer(self):
+        return self._ensure_loaded().tokenizer
+
+    @property
+    def config(self):
+        return self._ensure_loaded().config
+
+    @property
+    def index_map(self):
+        return self._ensure_loaded().index_map
+
+    @property
+    def model_version(self):
+        """Version number stored in the model file (0 for files written before versioning)."""
+        return self._ensure_loaded().version
+
+    @staticmethod
+    def _float_rows(rows, config):
+        """Return rows as float32, unpacking bit-packed binary embeddings to +/-1 values."""
+        if np.issubdtype(rows.dtype, np.integer) and config.get('binary'):
+            bits = np.unpackbits(np.ascontiguousarray(rows).view(np.uint8), axis=-1)
+            dim = config.get('dim') or bits.shape[-1]
+            return bits[..., :dim].astype(np.float32) * 2.0 - 1.0
+        return np.asarray(rows, dtype=np.float32)
+
+    def token_ids(self, texts, model=None):
+        """Tokenizer ids of each text (one int64 array per text), before any pruning remap."""
+        tokenizer = (model or self._ensure_loaded()).tokenizer
+        if hasattr(tokenizer, 'encode_batch'):
+            encodings = tokenizer.encode_batch(list(texts))
+        else:
+            encodings = [tokenizer.encode(text) for text in texts]
+        return [np.asarray(_token_ids(encoding), dtype=np.int64) for encoding in encodings]
+
+    def _rows_for(self, ids, embeddings, index_map):
+        if index_map is not None:
+            ids = index_map[ids[(ids >= 0) & (ids < len(index_map))]]
+        return ids[(ids >= 0) & (ids < len(embeddings))]
+
+    def _pool(self, texts):
+        """Pooled, normalised embeddings of `texts` and the share of each text's tokens that have a row."""
+        model = self._ensure_loaded()
+        token_ids = self.token_ids(texts, model)
+
+        embeddings, index_map, config = model.embeddings, model.index_map, model.config
+        dim = self._float_rows(embeddings[:1], config).shape[-1]
+        pooled = np.zeros((len(texts), dim), dtype=np.float32)
+        coverage = np.zeros(len(texts), dtype=np.float32)
+        for row, ids in enumerate(token_ids):
+            rows = self._rows_for(ids, embeddings, index_map)
+            if len(rows):
+                pooled[row] = self._float_rows(embeddings[rows], config).mean(axis=0)
+                coverage[row] = len(rows) / len(ids)
+
+        if self._token_listeners and token_ids:
+            used = np.concatenate(token_ids)
+            for callback in list(self._token_listeners):
+                try:
+                    callback(used)
+                except Exception as e:
+                    logging.error(f"WordLlama token listener failed: {e}")
+
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        pooled /= np.where(norms == 0, 1.0, norms)
+        return pooled, coverage
+
+    def embed(self, texts):
+        """
+        Embed a single text (returns a 1-D vector) or a list of texts (returns a 2-D matrix).
+        Token embeddings are average-pooled and L2-normalised.
+        """
+        single = isinstance(texts, str)
+        pooled, _ = self._pool([texts] if single else list(texts))
+        return pooled[0] if single else pooled
+
+    def embed_with_coverage(self, texts):
+        """
+        Like `embed`, but also return the share of each text's tokens that the model has an
+        embedding for (a float, or an array for a list of texts). Texts made mostly of
+        out-of-vocabulary or pruned tokens pool only a few rows and compare unreliably.
+        """
+        single = isinstance(texts, str)
+        pooled, coverage = self._pool([texts] if single else list(texts))
+        return (pooled[0], float(coverage[0])) if single else (pooled, coverage)
+
+    def stats(self):
+        """Return load state and size information for status reporting."""
+        model = self._model
+        loaded = model.embeddings is not None
+        return {
+            'status': 'Operational' if loaded else 'Not loaded',
+            'version': self.version,
+            'model_version': model.version,
+            'load_time_s': round(self.load_time, 3) if self.load_time is not None else None,
+            'rows': len(model.embeddings) if loaded else 0,
+            'memory_mapped': isinstance(model.embeddings, np.memmap),
+            'pruned': model.index_map is not None,
+            'dim': model.config.get('dim'),
+            'binary': model.config.get('binary'),
+        }
@@ -0,0 +1,125 @@
+# backend/models/gpt2_batcher.py
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from backend.models.model_registry import get_gpt2
+from backend.tools.offload import run_blocking
+
+
+class GPT2Batcher:
+    """
+    Micro-batching GPT-2 inference worker.
+
+    Prompts submitted from concurrent requests are collected for up to `max_wait_ms`
+    (or until `max_batch_size` prompts are waiting), padded into a single `generate`
+    call and resolved through per-request futures.
+    """
+
+    def __init__(self, max_batch_size=8, max_wait_ms=10, max_new_tokens=50):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_new_tokens = max_new_tokens
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._metrics = {
+            'requests': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'largest_batch': 0,
+            'generate_time_s': 0.0,
+            'queue_wait_time_s': 0.0,
+        }
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='gpt2-batcher', daemon=True)
+                self._thread.start()
+
+    def submit(self, prompt):
+        """Queue a prompt and return a Future resolving to the decoded generation."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((prompt, future, time.perf_counter()))
+        return future
+
+    def generate(self, prompt, timeout=None):
+        """Blocking helper: submit a prompt and wait for its result."""
+        return self.submit(prompt).result(timeout=timeout)
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if batch:
+                self._generate(batch)
+
+    def _generate(self, batch):
+        prompts = [prompt for prompt, _, _ in batch]
+        started = time.perf_counter()
+        try:
+            gpt2_tokenizer, gpt2_model = get_gpt2()
+            # The forward passes run on a native thread under eventlet/gevent
+            texts = run_blocking(self._generate_texts, gpt2_tokenizer, gpt2_model, prompts)
+        except Exception as e:
+            logging.error(f"GPT-2 batch of {len(batch)} failed: {e}")
+            self._record(batch, started, failed=True)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        self._record(batch, started)
+        for (_, future, _), text in zip(batch, texts):
+            future.set_result(text)
+
+    def _generate_texts(self, gpt2_tokenizer, gpt2_model, prompts):
+        inputs = gpt2_tokenizer(prompts, return_tensors="pt", padding=True)
+        outputs = gpt2_model.generate(
+            inputs['input_ids'],
+            attention_mask=inputs['attention_mask'],
+            pad_token_id=gpt2_tokenizer.eos_token_id,
+            max_new_tokens=self.max_new_tokens
+        )
+        return gpt2_tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def _record(self, batch, started, failed=False):
+        with self._lock:
+            metrics = self._metrics
+            metrics['requests'] += len(batch)
+            metrics['batches'] += 1
+            metrics['failed_batches'] += int(failed)
+            metrics['largest_batch'] = max(metrics['largest_batch'], len(batch))
+            metrics['generate_time_s'] += time.perf_counter() - started
+            metrics['queue_wait_time_s'] += sum(started - enqueued for _, _, enqueued in batch)
+
+    def metrics(self):
+        """Return throughput and batching statistics."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        batches, requests = metrics['batches'], metrics['requests']
+        metrics['queue_depth'] = self._queue.qsize()
+        metrics['avg_batch_size'] = round(requests / batches, 2) if batches else 0.0
+        metrics['avg_queue_wait_ms'] = round(1000 * metrics['queue_wait_time_s'] / requests, 2) if requests else 0.0
+        metrics['prompts_per_second'] = (
+            round(requests / metrics['generate_time_s'], 2) if metrics['generate_time_s'] else 0.0
+        )
+        return metrics
@@ -0,0 +1,250 @@
+# backend/models/model_artifact.py
+#
+# On-disk format of the WordLlama model. Instead of one pickled dict that every process has to
+# deserialize into RAM, a model is a directory of plain files:
+#
+#   manifest.json            current version: dims, binary flag, file names, sizes and checksums
+#   manifest.v<N>.json       manifest of every kept version
+#   embeddings.v<N>.npy      embedding matrix (float, or packed bits when binary), opened with mmap
+#   index_map.v<N>.npy       token id -> matrix row after pruning (absent if never pruned)
+#   tokenizer.v<N>.json|pkl  Hugging Face tokenizer JSON (pickle for other tokenizer objects)
+#
+# A new version is written next to the old one and published by atomically replacing
+# manifest.json, so readers see a complete old or new model. Loading maps the matrix read-only,
+# which makes load time independent of model size and lets all processes share its pages.
+# Usage: python -m backend.models.model_artifact {info,verify,convert} ...
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import time
+import uuid
+import numpy as np
+
+FORMAT = 'wordllama-artifact'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+_VERSIONED = re.compile(r'^(manifest|embeddings|index_map|tokenizer)\.v(\d+)\.(json|npy|pkl)$')
+
+
+class ModelArtifactError(Exception):
+    pass
+
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _publish(directory, name, write):
+    """Write a file under a temporary name, fsync it and rename it into place."""
+    path = os.path.join(directory, name)
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp_path, 'wb') as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {'file': name, 'bytes': os.path.getsize(path), 'sha256': _sha256(path)}
+
+
+def _serialize_tokenizer(tokenizer):
+    if hasattr(tokenizer, 'to_str') and hasattr(type(tokenizer), 'from_str'):
+        return 'tokenizers-json', 'json', tokenizer.to_str().encode('utf-8')
+    return 'pickle', 'pkl', pickle.dumps(tokenizer)
+
+
+def _deserialize_tokenizer(kind, data):
+    if kind == 'tokenizers-json':
+        from tokenizers import Tokenizer
+        return Tokenizer.from_str(data.decode('utf-8'))
+    if kind == 'pickle':
+        return pickle.loads(data)
+    raise ModelArtifactError(f"Unknown tokenizer format: {kind}")
+
+
+def read_manifest(directory, version=None):
+    """The current manifest (or that of `version`), or None if there is none."""
+    name = MANIFEST if version is None else f"manifest.v{version}.json"
+    try:
+        with open(os.path.join(directory, name)) as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        raise ModelArtifactError(f"Corrupt model manifest {name}: {e}")
+    if manifest.get('format') != FORMAT or manifest.get('format_version', 0) > FORMAT_VERSION:
+        raise ModelArtifactError(f"Unsupported model artifact format in {directory}")
+    return manifest
+
+
+def manifest_path(directory):
+    return os.path.join(directory, MANIFEST)
+
+
+def versions(directory):
+    """Versions that still have a manifest, oldest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(int(match.group(2)) for match in map(_VERSIONED.match, names)
+                  if match and match.group(1) == 'manifest')
+
+
+def write_artifact(directory, embeddings, tokenizer, config, index_map=None, version=None, keep_versions=2):
+    """
+    Write a model version and make it current. `version` defaults to the current one plus 1.
+    Files of versions beyond the newest `keep_versions` (besides the new one) are removed.
+    Returns the new manifest.
+    """
+    embeddings = np.asarray(embeddings)
+    if embeddings.dtype == object or embeddings.ndim != 2:
+        raise ModelArtifactError(f"Embeddings must be a 2-D numeric matrix, got {embeddings.dtype} {embeddings.shape}")
+    os.makedirs(directory, exist_ok=True)
+    current = read_manifest(directory)
+    if version is None:
+        version = (current['version'] if current else 0) + 1
+
+    files = {'embeddings': _publish(directory, f"embeddings.v{version}.npy", lambda f: np.save(f, embeddings))}
+    if index_map is not None:
+        index_map = np.asarray(index_map, dtype=np.int64)
+        files['index_map'] = _publish(directory, f"index_map.v{version}.npy", lambda f: np.save(f, index_map))
+
+    # The tokenizer rarely changes; reuse the current file when its content is identical
+    kind, extension, data = _serialize_tokenizer(tokenizer)
+    digest = hashlib.sha256(data).hexdigest()
+    previous = (current or {}).get('files', {}).get('tokenizer')
+    if previous and previous['sha256'] == digest and os.path.exists(os.path.join(directory, previous['file'])):
+        files['tokenizer'] = dict(previous)
+    else:
+        files['tokenizer'] = _publish(directory, f"tokenizer.v{version}.{extension}", lambda f: f.write(data))
+    files['tokenizer']['format'] = kind
+
+    config = dict(config or {})
+    manifest = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'created_at': time.time(),
+        'dim': config.get('dim'),
+        'binary': bool(config.get('binary')),
+        'rows': int(embeddings.shape[0]),
+        'dtype': embeddings.dtype.str,
+        'config': config,
+        'files': files,
+    }
+    encoded = json.dumps(manifest, indent=2, default=str).encode('utf-8')
+    _publish(directory, f"manifest.v{version}.json", lambda f: f.write(encoded))
+    _publish(directory, MANIFEST, lambda f: f.write(encoded))
+    remove_old_versions(directory, keep=keep_versions + 1)
+    return manifest
+
+
+def remove_old_versions(directory, keep):
+    """Delete every versioned file not referenced by the newest `keep` manifests (nor the current one)."""
+    kept = versions(directory)[-keep:] if keep > 0 else []
+    referenced = set()
+    for manifest in [read_manifest(directory)] + [read_manifest(directory, v) for v in kept]:
+        if manifest:
+            referenced.add(f"manifest.v{manifest['version']}.json")
+            referenced.update(entry['file'] for entry in manifest['files'].values())
+    for name in os.listdir(directory):
+        if _VERSIONED.match(name) and name not in referenced:
+            os.remove(os.path.join(directory, name))
+
+
+def verify_artifact(directory, manifest=None, checksums=True):
+    """Raise ModelArtifactError unless every file of the manifest has the recorded size (and checksum)."""
+    manifest = manifest or read_manifest(directory)
+    if manifest is None:
+        raise ModelArtifactError(f"No model manifest in {directory}")
+    for role, entry in manifest['files'].items():
+        path = os.path.join(directory, entry['file'])
+        if not os.path.exists(path):
+            raise ModelArtifactError(f"Model {role} file {entry['file']} is missing")
+        if os.path.getsize(path) != entry['bytes']:
+            raise ModelArtifactError(f"Model {role} file {entry['file']} has the wrong size")
+        if checksums and _sha256(path) != entry['sha256']:
+            raise ModelArtifactError(f"Model {role} file {entry['file']} fails its checksum")
+    return manifest
+
+
+def load_artifact(directory, manifest=None, verify=False):
+    """
+    Load the current model: `{'embeddings', 'index_map', 'tokenizer', 'config', 'version',
+    'manifest'}`. Matrices are memory-mapped read-only. File sizes are always checked; full
+    SHA-256 checksums only with `verify=True`, as they read every byte.
+    """
+    manifest = verify_artifact(directory, manifest, checksums=verify)
+    files = manifest['files']
+    embeddings = np.load(os.path.join(directory, files['embeddings']['file']), mmap_mode='r')
+    index_map = None
+    if 'index_map' in files:
+        index_map = np.load(os.path.join(directory, files['index_map']['file']), mmap_mode='r')
+    with open(os.path.join(directory, files['tokenizer']['file']), 'rb') as file:
+        tokenizer = _deserialize_tokenizer(files['tokenizer']['format'], file.read())
+    config = dict(manifest.get('config') or {})
+    config.setdefault('dim', manifest['dim'])
+    config.setdefault('binary', manifest['binary'])
+    return {
+        'embeddings': embeddings,
+        'index_map': index_map,
+        'tokenizer': tokenizer,
+        'config': config,
+        'version': manifest['version'],
+        'manifest': manifest,
+    }
+
+
+def convert_pickle(pickle_path, directory, keep_versions=2):
+    """Write a legacy pickled `{'embeddings', 'tokenizer', 'config'}` model as an artifact."""
+    with open(pickle_path, 'rb') as file:
+        model_data = pickle.load(file)
+    return write_artifact(
+        directory,
+        model_data['embeddings'],
+        model_data['tokenizer'],
+        model_data.get('config', {}),
+        index_map=model_data.get('index_map'),
+        version=model_data.get('version') or 1,
+        keep_versions=keep_versions,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, verify or create WordLlama model artifacts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="print the current manifest")
+    info.add_argument("directory")
+    verify = commands.add_parser("verify", help="check sizes and SHA-256 checksums of the current version")
+    verify.add_argument("directory")
+    convert = commands.add_parser("convert", help="convert a pickled model into an artifact directory")
+    convert.add_argument("pickle_path")
+    convert.add_argument("directory")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print(json.dumps(read_manifest(args.directory), indent=2))
+    elif args.command == "verify":
+        manifest = verify_artifact(args.directory)
+        print(f"Model version {manifest['version']} in {args.directory} is intact")
+    else:
+        manifest = convert_pickle(args.pickle_path, args.directory)
+        print(f"Wrote model version {manifest['version']} ({manifest['rows']} rows) to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
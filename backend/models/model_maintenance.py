@@ -0,0 +1,336 @@
+# backend/models/model_maintenance.py
+#
+# WordLlama self-training and pruning off the request path. Serving processes only spool
+# triggers (one small JSON file per finished task, plus a single pending prune request) into
+# MODEL_MAINTENANCE_DIR. A separate worker process (`python -m backend.models.model_maintenance`)
+# drains the spool on a cadence, trains on the batch, prunes when asked to or when
+# `should_prune_based_on_size` fires, and saves each result as a new model version (temporary
+# file + rename). Serving processes pick new versions up through EmbeddingEngine's hot reload.
+# Training is not implemented yet (`fine_tune_embeddings` returns the embeddings unchanged), so
+# drained batches are recorded as `untrained_samples` with `last_training.skipped` set and only
+# pruning actually changes the model.
+# The worker also folds the token signal deltas written by serving processes into the signal
+# totals (see tools/importance.py).
+#
+# Each server process starts a worker if none is running (`start_background_services` in app.py;
+# importing the app, e.g. for `flask db upgrade`, starts nothing); a lock file makes sure only one
+# worker per spool directory is active, and a worker started by a server process exits with it.
+# With MODEL_MAINTENANCE_ENABLED=false no worker is started and the module can be run as a
+# standalone service instead.
+
+import argparse
+import fcntl
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from backend.config import Config
+from backend.tools.importance import token_signals
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file, default=str)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+class MaintenanceSpool:
+    """File layout shared by the serving processes and the worker."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.train_dir = os.path.join(directory, 'train')
+        self.prune_path = os.path.join(directory, 'prune.json')
+        self.status_path = os.path.join(directory, 'status.json')
+        self.lock_path = os.path.join(directory, 'worker.lock')
+
+    def ensure(self):
+        os.makedirs(self.train_dir, exist_ok=True)
+
+    def training_files(self, limit=None):
+        try:
+            names = sorted(name for name in os.listdir(self.train_dir) if name.endswith('.json'))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.train_dir, name) for name in names[:limit]]
+
+    def pending_training(self):
+        try:
+            return sum(1 for name in os.listdir(self.train_dir) if name.endswith('.json'))
+        except FileNotFoundError:
+            return 0
+
+
+class ModelMaintenance:
+    """Serving-side half: spools triggers and keeps a worker process running."""
+
+    def __init__(self, directory=None, poll_interval=5.0, max_pending=10000):
+        self.spool = MaintenanceSpool(directory or Config.MODEL_MAINTENANCE_DIR)
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self._process = None
+        self._enabled = True
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._pending_estimate = None
+        self._pending_checked = 0.0
+        self._counters = {'training_scheduled': 0, 'training_dropped': 0, 'pruning_scheduled': 0,
+                          'workers_started': 0}
+
+    def init_app(self, app):
+        self.spool = MaintenanceSpool(app.config.get('MODEL_MAINTENANCE_DIR', self.spool.directory))
+        self.poll_interval = app.config.get('MODEL_MAINTENANCE_POLL_INTERVAL', self.poll_interval)
+        self.max_pending = app.config.get('MODEL_MAINTENANCE_MAX_PENDING', self.max_pending)
+        self.spool.ensure()
+        self._enabled = app.config.get('MODEL_MAINTENANCE_ENABLED', True)
+
+    def start(self):
+        """Start the thread that keeps a worker process running (a no-op if disabled or started)."""
+        if not self._enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._supervise, name='model-maintenance', daemon=True)
+        self._thread.start()
+
+    def _supervise(self):
+        while True:
+            try:
+                self._ensure_worker()
+            except Exception as e:
+                logging.error(f"Could not start the model maintenance worker: {e}")
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def _worker_running(self):
+        """True if any process holds the worker lock for this spool."""
+        with open(self.spool.lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return False
+
+    def _ensure_worker(self):
+        if self._process is not None and self._process.poll() is None:
+            return
+        if self._worker_running():
+            return
+        self._process = subprocess.Popen(
+            [sys.executable, '-m', 'backend.models.model_maintenance',
+             '--directory', self.spool.directory, '--parent', str(os.getpid())],
+            cwd=PROJECT_ROOT,
+        )
+        self._counters['workers_started'] += 1
+
+    def _pending(self):
+        # Listing a large spool costs more than writing a trigger, so the count is refreshed
+        # at most once per poll interval and tracked locally in between
+        now = time.monotonic()
+        if self._pending_estimate is None or now - self._pending_checked >= self.poll_interval:
+            self._pending_estimate = self.spool.pending_training()
+            self._pending_checked = now
+        return self._pending_estimate
+
+    def schedule_training(self, task_details):
+        """Queue one finished task for the next training run; returns False if the spool is full."""
+        with self._lock:
+            if self._pending() >= self.max_pending:
+                self._counters['training_dropped'] += 1
+                return False
+            self._pending_estimate += 1
+            self._counters['training_scheduled'] += 1
+        try:
+            self.spool.ensure()
+            name = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+            _write_json(os.path.join(self.spool.train_dir, name), task_details)
+            return True
+        except OSError as e:
+            logging.error(f"Could not spool a WordLlama training task: {e}")
+            return False
+
+    def schedule_pruning(self, reason=None):
+        """Ask the worker to prune; requests made while one is pending are merged into it."""
+        if os.path.exists(self.spool.prune_path):
+            return False
+        try:
+            # The worker scores tokens from the persisted signal counts, so publish ours first
+            token_signals.flush()
+            self.spool.ensure()
+            _write_json(self.spool.prune_path, {'reason': reason, 'requested_at': time.time()})
+            self._counters['pruning_scheduled'] += 1
+            return True
+        except OSError as e:
+            logging.error(f"Could not request WordLlama pruning: {e}")
+            return False
+
+    def stop(self):
+        self._stop.set()
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+
+    def stats(self):
+        return {
+            **self._counters,
+            'pending_training': self.spool.pending_training(),
+            'pruning_pending': os.path.exists(self.spool.prune_path),
+            'worker': _read_json(self.spool.status_path),
+        }
+
+
+model_maintenance = ModelMaintenance(
+    poll_interval=Config.MODEL_MAINTENANCE_POLL_INTERVAL,
+    max_pending=Config.MODEL_MAINTENANCE_MAX_PENDING
+)
+
+
+class MaintenanceWorker:
+    """Worker-side half: drains the spool, trains, prunes and records its status."""
+
+    def __init__(self, directory, interval, poll_interval, batch_size, min_prune_interval, parent_pid=None):
+        self.spool = MaintenanceSpool(directory)
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.min_prune_interval = min_prune_interval
+        self.parent_pid = parent_pid
+        self.status = _read_json(self.spool.status_path) or {}
+        self.status.update({'pid': os.getpid(), 'started_at': time.time()})
+        self.status.setdefault('trained_samples', 0)
+        self.status.setdefault('untrained_samples', 0)
+        self.status.setdefault('trainings', 0)
+        self.status.setdefault('prunes', 0)
+
+    def _parent_alive(self):
+        return self.parent_pid is None or os.getppid() == self.parent_pid
+
+    def run(self):
+        self.spool.ensure()
+        with open(self.spool.lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logging.info("Another model maintenance worker is running; exiting.")
+                return
+            # The worker's own embeddings (validation corpora) are not user traffic
+            token_signals.disable()
+            # Train on whatever was spooled before the worker started at the first cadence tick
+            last_training = time.monotonic()
+            while self._parent_alive():
+                if time.monotonic() - last_training >= self.interval:
+                    last_training = time.monotonic()
+                    self._step(self.train)
+                self._step(self.merge_signals)
+                self._step(self.prune_if_requested)
+                _write_json(self.spool.status_path, self.status)
+                time.sleep(self.poll_interval)
+
+    def _step(self, job):
+        try:
+            job()
+        except Exception as e:
+            logging.error(f"Model maintenance job {job.__name__} failed: {e}")
+            self.status['last_error'] = f"{job.__name__}: {e}"
+
+    def train(self):
+        from backend.models.observer import self_train_wordllama, wordllama_engine
+        from backend.tools.pruning_utils import should_prune_based_on_size
+
+        paths = self.spool.training_files(self.batch_size)
+        if not paths:
+            return
+        samples = [sample for sample in (_read_json(path) for path in paths) if sample is not None]
+        started = time.perf_counter()
+        result = self_train_wordllama(samples) if samples else {'version': None, 'skipped': 'no samples'}
+        for path in paths:
+            os.remove(path)
+
+        # Only batches that produced a new model version count as training
+        if result.get('version') is not None:
+            self.status['trainings'] += 1
+            self.status['trained_samples'] += len(samples)
+        else:
+            self.status['untrained_samples'] += len(samples)
+        self.status['last_training'] = {
+            'at': time.time(),
+            'samples': len(samples),
+            'seconds': round(time.perf_counter() - started, 3),
+            **result,
+        }
+        successes = sum(1 for sample in samples
+                        if (sample.get('execution_result') or {}).get('status') == 'success')
+        success_rate = successes / len(samples) if samples else 1.0
+        if should_prune_based_on_size(wordllama_engine.embeddings, success_rate) \
+                and not os.path.exists(self.spool.prune_path):
+            _write_json(self.spool.prune_path, {'reason': 'training', 'requested_at': time.time()})
+
+    def merge_signals(self):
+        from backend.tools.importance import TokenSignals
+
+        if not TokenSignals(Config.PRUNING_SIGNALS_PATH, load=False).delta_files():
+            return
+        signals = TokenSignals(Config.PRUNING_SIGNALS_PATH)
+        merged = signals.compact()
+        self.status['signals'] = {'at': time.time(), 'merged_deltas': merged, 'total': signals.total}
+
+    def prune_if_requested(self):
+        request = _read_json(self.spool.prune_path)
+        if request is None:
+            return
+        last_prune = (self.status.get('last_prune') or {}).get('at', 0)
+        if time.time() - last_prune < self.min_prune_interval:
+            return
+
+        from backend.models.observer import prune_wordllama_model
+        from backend.tools.importance import TokenSignals
+
+        started = time.perf_counter()
+        try:
+            # Fresh counts as published by the serving processes
+            result = prune_wordllama_model(signals=TokenSignals(Config.PRUNING_SIGNALS_PATH))
+        finally:
+            os.remove(self.spool.prune_path)
+        if not result.get('skipped'):
+            self.status['prunes'] += 1
+        self.status['last_prune'] = {
+            'at': time.time(),
+            'reason': request.get('reason'),
+            'seconds': round(time.perf_counter() - started, 3),
+            **result,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the WordLlama training and pruning worker")
+    parser.add_argument("--directory", default=Config.MODEL_MAINTENANCE_DIR, help="trigger spool directory")
+    parser.add_argument("--parent", type=int, help="exit when this process (the app) exits")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    MaintenanceWorker(
+        args.directory,
+        interval=Config.MODEL_MAINTENANCE_INTERVAL,
+        poll_interval=Config.MODEL_MAINTENANCE_POLL_INTERVAL,
+        batch_size=Config.MODEL_MAINTENANCE_BATCH_SIZE,
+        min_prune_interval=Config.MODEL_MAINTENANCE_MIN_PRUNE_INTERVAL,
+        parent_pid=args.parent,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
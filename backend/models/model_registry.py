@@ -0,0 +1,163 @@
+# backend/models/model_registry.py
+
+import gc
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+
+# Define absolute paths
+base_dir = os.path.dirname(os.path.abspath(__file__))
+local_gpt2_model_path = os.path.join(base_dir, "local_gpt2")
+
+# Files that must be present before we try to load GPT-2
+GPT2_REQUIRED_FILES = ['config.json', 'merges.txt', 'model.safetensors', 'vocab.json']
+
+
+def _rss_bytes():
+    """Return the current resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Fall back to peak RSS (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of heavyweight models.
+
+    Models are registered with a loader callable and only loaded on first use.
+    Every caller in the process shares the same loaded instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaders = {}
+        self._models = {}
+        self._stats = {}
+        self._listeners = []
+
+    def register(self, name, loader, sizeof=None):
+        """Register a loader (and optional size estimator) under a model name."""
+        with self._lock:
+            self._loaders[name] = (loader, sizeof)
+            self._stats.setdefault(name, {'loaded': False, 'load_count': 0})
+
+    def add_listener(self, callback):
+        """Call `callback(event, name)` whenever a model is loaded or unloaded."""
+        self._listeners.append(callback)
+
+    def _notify(self, event, name):
+        for callback in list(self._listeners):
+            try:
+                callback(event, name)
+            except Exception as e:
+                logging.error(f"Model registry listener failed on {event} of {name}: {e}")
+
+    def get(self, name):
+        """Return the loaded model, loading it on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            if name not in self._loaders:
+                raise KeyError(f"Unknown model '{name}'")
+
+            loader, sizeof = self._loaders[name]
+            rss_before = _rss_bytes()
+            start_time = time.perf_counter()
+            model = loader()
+            load_time = time.perf_counter() - start_time
+            rss_delta = max(_rss_bytes() - rss_before, 0)
+
+            stats = self._stats[name]
+            stats.update({
+                'loaded': True,
+                'load_count': stats['load_count'] + 1,
+                'load_time_s': round(load_time, 3),
+                'resident_bytes': sizeof(model) if sizeof else rss_delta,
+                'rss_delta_bytes': rss_delta,
+                'loaded_at': time.time(),
+            })
+            self._models[name] = model
+            logging.info(f"Loaded model '{name}' in {load_time:.2f}s ({stats['resident_bytes'] / 2**20:.1f} MiB)")
+
+        self._notify('loaded', name)
+        return model
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def warm(self, *names):
+        """Eagerly load the given models (all registered models if none given)."""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def unload(self, *names):
+        """Drop the given models (all loaded models if none given) and release memory."""
+        with self._lock:
+            unloaded = [name for name in (names or list(self._models)) if self._models.pop(name, None) is not None]
+            for name in unloaded:
+                self._stats[name]['loaded'] = False
+        if unloaded:
+            gc.collect()
+        for name in unloaded:
+            logging.info(f"Unloaded model '{name}'")
+            self._notify('unloaded', name)
+        return unloaded
+
+    def stats(self):
+        """Return a snapshot of load state, load time and resident size per model."""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+def _load_gpt2():
+    """Load the local GPT-2 tokenizer and model."""
+    for file in GPT2_REQUIRED_FILES:
+        if not os.path.isfile(os.path.join(local_gpt2_model_path, file)):
+            raise FileNotFoundError(f"Required file {file} not found in {local_gpt2_model_path}")
+
+    # Imported here so that importing the app (or running migrations) never pulls in torch
+    from transformers import GPT2Tokenizer, GPT2LMHeadModel
+
+    try:
+        logging.info(f"Loading GPT-2 tokenizer and model from {local_gpt2_model_path}")
+        tokenizer = GPT2Tokenizer.from_pretrained(local_gpt2_model_path, local_files_only=True)
+        model = GPT2LMHeadModel.from_pretrained(local_gpt2_model_path, local_files_only=True)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load GPT-2 model/tokenizer: {e}")
+
+    # Set pad_token_id manually for GPT-2 (GPT-2 doesn’t have a default pad_token_id)
+    if tokenizer.pad_token_id is None:
+        tokenizer.pad_token_id = tokenizer.eos_token_id
+    # Decoder-only models must be left padded so batched generation continues each prompt
+    tokenizer.padding_side = 'left'
+
+    model.eval()
+    return tokenizer, model
+
+
+def _gpt2_size(loaded):
+    """Size of the GPT-2 weights and buffers in bytes."""
+    _, model = loaded
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+registry = ModelRegistry()
+registry.register('gpt2', _load_gpt2, sizeof=_gpt2_size)
+
+
+def get_gpt2():
+    """Return the shared `(gpt2_tokenizer, gpt2_model)` pair, loading it on first use."""
+    return registry.get('gpt2')
@@ -2,15 +2,20 @@
 
 from .db import db
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
 
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    profile_data = db.Column(db.JSON)  
+    profile_data = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))
 
 class UserSession(db.Model):
     __tablename__ = 'user_sessions'
+    __table_args__ = (
+        # Today's session for a user (create_or_fetch_session) and per-user joins
+        db.Index('ix_user_sessions_user_id_start_time', 'user_id', 'start_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     topic = db.Column(db.String(120), nullable=False)  # Add this field
@@ -19,76 +24,98 @@ class UserSession(db.Model):
 
 class Interaction(db.Model):
     __tablename__ = 'interactions'
+    __table_args__ = (
+        # Session history newest first, optionally filtered by outcome (retrieve_memory, handle_task)
+        db.Index('ix_interactions_session_id_timestamp', 'session_id', 'timestamp'),
+        db.Index('ix_interactions_session_id_task_outcome_timestamp', 'session_id', 'task_outcome', 'timestamp'),
+        # Latest interaction overall (feedback without a logged-in user)
+        db.Index('ix_interactions_timestamp', 'timestamp'),
+        # A user's history across sessions newest first (read backwards), without a join or sort
+        db.Index('ix_interactions_user_id_timestamp', 'user_id', 'timestamp'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('user_sessions.id'), nullable=False)
+    # Owner of the session, copied here so per-user queries can use one index
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     prompt = db.Column(db.Text, nullable=False)
     response = db.Column(db.Text, nullable=False)
     task_outcome = db.Column(db.String(50))
     feedback = db.Column(db.String(50))  # Add this field
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)  # Add this field
+    intent = db.Column(db.String(50))
+
+class SuccessCounter(db.Model):
+    """
+    Running interaction/success counts per user and intent ('*' for all intents), for all time
+    (period 'all') and per UTC day (period 'YYYY-MM-DD'). Maintained by tools/success_stats.py.
+    """
+    __tablename__ = 'success_counters'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    intent = db.Column(db.String(50), primary_key=True)
+    period = db.Column(db.String(10), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    successes = db.Column(db.Integer, nullable=False, default=0)
+
+class InteractionEmbedding(db.Model):
+    """Prompt embedding of an interaction, used by the vector memory index."""
+    __tablename__ = 'interaction_embeddings'
+    interaction_id = db.Column(db.Integer, db.ForeignKey('interactions.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    dim = db.Column(db.Integer, nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32 bytes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CodeBody(db.Model):
+    """Distinct code text run by CodeExecutionLog rows, stored once per SHA-256 (tools/code_bodies.py)."""
+    __tablename__ = 'code_bodies'
+    hash = db.Column(db.String(64), primary_key=True)
+    code = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Refreshed whenever a new log row references the body; orphan cleanup spares recent ones
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class CodeExecutionLog(db.Model):
     __tablename__ = 'code_execution_logs'
-    __table_args__ = {'extend_existing': True} 
+    __table_args__ = (
+        db.Index('ix_code_execution_logs_user_id_timestamp', 'user_id', 'timestamp'),
+        {'extend_existing': True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, nullable=False)
     language = db.Column(db.String, nullable=False)
-    code = db.Column(db.Text, nullable=False)
+    # Code text is moved to code_bodies on flush; the column only holds it until then
+    code_text = db.Column('code', db.Text, nullable=True)
+    code_hash = db.Column(db.String(64), db.ForeignKey('code_bodies.hash'), nullable=True, index=True)
     output = db.Column(db.Text, nullable=True)
     status = db.Column(db.String, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    body = db.relationship('CodeBody', lazy='joined')
+
+    @property
+    def code(self):
+        if self.code_text is not None or self.body is None:
+            return self.code_text
+        return self.body.code
+
+    @code.setter
+    def code(self, value):
+        self.code_text = value
+        self.code_hash = None
+
+class ServerSession(db.Model):
+    """Flask session data when SESSION_BACKEND is "sql" (models/session_store.py)."""
+    __tablename__ = 'server_sessions'
+    session_id = db.Column(db.String(255), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    expiry = db.Column(db.DateTime, nullable=False, index=True)
 
 class TaskHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_input = db.Column(db.String(500))
     intent = db.Column(db.String(50))
     success = db.Column(db.Boolean)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f"<TaskHistory {self.id} - Intent {self.intent}>"
-
-
-def retrieve_memory(user_id, session_id=None, task_type=None):
-    query = Interaction.query
-    if session_id:
-        query = query.filter_by(session_id=session_id)
-    else:
-        query = query.join(Session).filter(Session.user_id == user_id)
-    
-    # Filter by task type if provided
-    if task_type:
-        query = query.filter(Interaction.task_outcome == task_type)
-
-    interactions = query.all()
-    return interactions
-
-def log_wordllama_interaction(user_id, message, task_success):
-    """
-    Log WordLlama interactions in the system memory and trigger pruning based on model size and task success rate.
-    """
-    embeddings, tokenizer = load_wordllama_model()
-    wordllama_output = process_with_wordllama(message)
-
-    # Log the interaction with the embeddings
-    log_task_execution(user_id, 'WordLlama', message, str(wordllama_output), 'success')
-
-    # Get the success rate (this should be calculated based on past task successions)
-    success_rate = calculate_success_rate(user_id)  # Implement this function
-
-    # Trigger pruning based on model size, growth rate, and success rate
-    if should_prune_based_on_size(embeddings, success_rate):
-        importance_scores = get_importance_scores(embeddings)
-        pruned_embeddings = prune_wordllama_embeddings(embeddings, importance_scores, threshold=0.01)
-        
-        # Save pruned embeddings
-        save_path = os.path.expanduser('~/O.A.I.S./models/wordllama_model.pkl')
-        with open(save_path, 'wb') as file:
-            model_data = {
-                'embeddings': pruned_embeddings,
-                'tokenizer': tokenizer,
-                'config': {'dim': 1024, 'binary': True}
-            }
-            pickle.dump(model_data, file)
-
-        print(f"Pruned and saved embeddings to {save_path}")
\ No newline at end of file
@@ -1,132 +1,175 @@
 import os
-import pickle
-from transformers import GPT2Tokenizer, GPT2LMHeadModel
-from wordllama import WordLlama
-from backend.tools.pruning_utils import pre_and_post_pruning_validation
+import numpy as np
+from backend.config import Config
+from backend.models.gpt2_batcher import GPT2Batcher
+from backend.models.model_registry import registry
+from backend.tools.cache import TTLCache, message_key
+from backend.models.embedding_engine import EmbeddingEngine
+from backend.models.model_artifact import write_artifact
+from backend.tools.pruning_utils import (
+    pre_and_post_pruning_validation, get_importance_scores, prune_wordllama_embeddings, compose_index_maps,
+    fine_tune_embeddings, fine_tuning_validation, quality_regressions
+)
+from backend.tools.importance import token_signals, TokenSignals
 
 # Define absolute paths
 base_dir = os.path.dirname(os.path.abspath(__file__))  # This is /Users/akeemsulaimon/O.A.I.S./backend/models
-local_gpt2_model_path = os.path.join(base_dir, "local_gpt2")  # Correct path without duplicating 'models'
+# Pickled model shipped with the repository; converted into Config.WORDLLAMA_ARTIFACT_DIR on first load
 wordllama_model_path = os.path.join(base_dir, "wordllama_model.pkl")
 
-# Verify correct path
-print(f"Local GPT-2 model path: {local_gpt2_model_path}")  # This should print the correct path
-
-# Check required files for GPT-2 model
-required_files = ['config.json', 'merges.txt', 'model.safetensors', 'vocab.json']
-for file in required_files:
-    if not os.path.isfile(os.path.join(local_gpt2_model_path, file)):
-        raise FileNotFoundError(f"Required file {file} not found in {local_gpt2_model_path}")
-
-# Load the GPT-2 model and tokenizer
-try:
-    print("Loading GPT-2 tokenizer and model from local path...")
-    gpt2_tokenizer = GPT2Tokenizer.from_pretrained(
-        local_gpt2_model_path, 
-        local_files_only=True
-    )
-    gpt2_model = GPT2LMHeadModel.from_pretrained(
-        local_gpt2_model_path, 
-        local_files_only=True
-    )
-    print("GPT-2 model and tokenizer loaded successfully.")
-except Exception as e:
-    raise RuntimeError(f"Failed to load GPT-2 model/tokenizer: {e}")
-
-# Set pad_token_id manually for GPT-2 (GPT-2 doesn’t have a default pad_token_id)
-if gpt2_tokenizer.pad_token_id is None:
-    gpt2_tokenizer.pad_token_id = gpt2_tokenizer.eos_token_id
-
-gpt2_model.eval()
+# Shared, memory-resident WordLlama engine (hot-reloads when a new model version is written)
+wordllama_engine = EmbeddingEngine(
+    Config.WORDLLAMA_ARTIFACT_DIR,
+    legacy_path=wordllama_model_path,
+    check_interval=Config.WORDLLAMA_RELOAD_CHECK_INTERVAL,
+    verify=Config.WORDLLAMA_VERIFY_CHECKSUM
+)
+# Every embedded token counts towards its pruning importance
+wordllama_engine.add_token_listener(token_signals.record_usage)
+
+# GPT-2 is loaded lazily through the model registry on first use (see model_registry.py);
+# concurrent prompts are micro-batched into shared generate calls
+gpt2_batcher = GPT2Batcher(
+    max_batch_size=Config.GPT2_BATCH_MAX_SIZE,
+    max_wait_ms=Config.GPT2_BATCH_MAX_WAIT_MS,
+    max_new_tokens=50  # Set this to the desired number of new tokens to generate
+)
+
+# Repeated prompts skip generation. Keys only normalize case/whitespace because the
+# generated text echoes the prompt, names included.
+gpt2_cache = TTLCache(maxsize=Config.INTENT_CACHE_SIZE, ttl=Config.INTENT_CACHE_TTL)
+registry.add_listener(lambda event, name: name == 'gpt2' and gpt2_cache.clear())
 
 def gpt2_restructure_prompt(prompt):
     """Generate a response from GPT-2 given a prompt."""
+    key = message_key(prompt, template=False)
+    cached = gpt2_cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        inputs = gpt2_tokenizer(prompt, return_tensors="pt", padding=True)
-        outputs = gpt2_model.generate(
-            inputs['input_ids'],
-            attention_mask=inputs['attention_mask'],
-            pad_token_id=gpt2_tokenizer.eos_token_id,
-            max_new_tokens=50  # Set this to the desired number of new tokens to generate
-        )
-        return gpt2_tokenizer.decode(outputs[0], skip_special_tokens=True)
+        response = gpt2_batcher.generate(prompt, timeout=Config.GPT2_BATCH_TIMEOUT)
     except Exception as e:
         print(f"Error generating response with GPT-2: {e}")
         return None
+    gpt2_cache.set(key, response)
+    return response
 
-# Load the Word Llama model from pickle file
+# Load the Word Llama model once per process; reads are served from memory
 def load_wordllama_model():
-    # Verify WordLlama model path
-    if not os.path.exists(wordllama_model_path):
-        raise FileNotFoundError(f"The WordLlama model path {wordllama_model_path} does not exist.")
+    """Return `(embeddings, tokenizer)` of one version of the shared in-process WordLlama engine."""
+    model = wordllama_engine.model
+    return model.embeddings, model.tokenizer
 
-    # Load the saved WordLlama model and embeddings
+def process_with_wordllama(prompt):
+    """Embed a prompt (or a list of prompts) with the shared WordLlama engine."""
     try:
-        with open(wordllama_model_path, 'rb') as file:
-            model_data = pickle.load(file)
-        
-        embeddings = model_data['embeddings']
-        tokenizer = model_data['tokenizer']
-        config = model_data['config']
-        
-        print(f"Loaded WordLlama model with dimension: {config['dim']} and binary: {config['binary']}")
-        return embeddings, tokenizer
+        return wordllama_engine.embed(prompt)
     except Exception as e:
-        raise RuntimeError(f"Failed to load WordLlama model: {e}")
+        print(f"Error processing with WordLlama: {e}")
+        return None
 
-def process_with_wordllama(prompt):
-    # This function uses WordLlama to embed the input prompt and process it
+def embed_with_coverage(prompt):
+    """Embed a prompt and return `(vector, in-vocabulary token share)`, or `(None, 0.0)` on failure."""
     try:
-        embeddings, tokenizer = load_wordllama_model()
-        
-        # Process the prompt (adjust this based on your use case)
-        prompt_embedding = tokenizer.encode(prompt)
-        # Additional processing logic (e.g., ranking, clustering)
-        
-        return prompt_embedding
+        return wordllama_engine.embed_with_coverage(prompt)
     except Exception as e:
         print(f"Error processing with WordLlama: {e}")
-        return None
+        return None, 0.0
+
+def record_token_hits(texts):
+    """Credit the tokens of texts returned by a memory search (pruning importance)."""
+    try:
+        ids = wordllama_engine.token_ids(texts)
+        if ids:
+            token_signals.record_hits(np.concatenate(ids))
+    except Exception as e:
+        print(f"Error recording WordLlama retrieval hits: {e}")
+
+def record_token_outcome(text, success):
+    """Attribute a task's success or failure to the tokens of its prompt (pruning importance)."""
+    try:
+        token_signals.record_outcome(wordllama_engine.token_ids([text])[0], success)
+    except Exception as e:
+        print(f"Error recording WordLlama task outcome: {e}")
 
-def self_train_wordllama(execution_result, task_details):
+def save_wordllama_model(embeddings, tokenizer, config, index_map=None, keep_versions=None):
+    """
+    Write the model as the next artifact version (see model_artifact.py) and reload it. The new
+    version becomes current by atomically replacing its manifest, so readers (including other
+    processes, which pick the change up within WORDLLAMA_RELOAD_CHECK_INTERVAL) see either the
+    old or the new model, never a partial one. Only the newest `keep_versions`
+    (Config.WORDLLAMA_KEEP_VERSIONS) replaced versions are kept.
+    """
+    keep_versions = Config.WORDLLAMA_KEEP_VERSIONS if keep_versions is None else keep_versions
+    manifest = write_artifact(
+        Config.WORDLLAMA_ARTIFACT_DIR, embeddings, tokenizer, config,
+        index_map=index_map, keep_versions=keep_versions
+    )
+    wordllama_engine.reload()
+    return manifest['version']
+
+def prune_wordllama_model(signals=None, **policy):
+    """
+    Prune the live WordLlama matrix by recorded token importance and save it with an index map
+    from tokenizer ids to the remaining rows. Keyword arguments override the Config policy
+    (see `prune_wordllama_embeddings`). Without any recorded signal every score is zero and the
+    choice of rows would be arbitrary, so nothing is pruned. The pruned model is validated first
+    and not published if its quality drops by more than PRUNING_MAX_QUALITY_DROP.
+    """
+    model = wordllama_engine.model
+    embeddings, tokenizer, index_map = model.embeddings, model.tokenizer, model.index_map
+    signals = signals or TokenSignals(Config.PRUNING_SIGNALS_PATH)
+    if signals.total == 0:
+        return {'rows_before': len(embeddings), 'rows_after': len(embeddings), 'version': None,
+                'skipped': 'no token signals recorded'}
+    report = pre_and_post_pruning_validation(
+        embeddings, tokenizer, dict(model.config), index_map, signals=signals, **policy
+    )
+    regressions = quality_regressions(report)
+    if regressions:
+        return {'rows_before': len(embeddings), 'rows_after': len(embeddings), 'version': None,
+                'skipped': 'quality regression', 'regressions': regressions, 'validation': report}
+    importance_scores = get_importance_scores(embeddings, index_map, signals)
+    pruned_embeddings, pruning_map = prune_wordllama_embeddings(embeddings, importance_scores, **policy)
+    if index_map is not None:
+        pruning_map = compose_index_maps(index_map, pruning_map)
+    version = save_wordllama_model(pruned_embeddings, tokenizer, dict(model.config), pruning_map)
+    return {'rows_before': len(embeddings), 'rows_after': len(pruned_embeddings), 'version': version,
+            'validation': report}
+
+def self_train_wordllama(samples):
     """
-    Use the execution results to fine-tune WordLlama embeddings and run pre/post-pruning validation.
+    Fine-tune WordLlama embeddings on a batch of `{"message", "execution_result"}` task details
+    and save the result as a new model version, unless its quality on the validation corpora
+    drops by more than PRUNING_MAX_QUALITY_DROP. Returns `{'version', 'skipped', ...}` like
+    `prune_wordllama_model`. `fine_tune_embeddings` is still a placeholder that changes nothing,
+    so for now every batch ends as skipped with the embeddings unchanged. Runs in the model
+    maintenance worker (see model_maintenance.py), never on a request.
     """
     try:
-        embeddings, tokenizer = load_wordllama_model()
-
-        # Fine-tune embeddings based on task details (placeholder for real logic)
-        updated_embeddings = fine_tune_embeddings(embeddings, execution_result, task_details)
-
-        # Define validation tasks (these could be representative tasks based on your system's workload)
-        validation_tasks = [
-            "Task 1", "Task 2", "Task 3",  # Replace with real validation tasks
-        ]
-
-        # Run pre and post pruning validation
-        pre_pruning_success_rate, post_pruning_success_rate, pre_pruning_time, post_pruning_time = pre_and_post_pruning_validation(
-            updated_embeddings, tokenizer, validation_tasks
-        )
-
-        print(f"Pre-Pruning Success Rate: {pre_pruning_success_rate}, Post-Pruning Success Rate: {post_pruning_success_rate}")
-        print(f"Pre-Pruning Time: {pre_pruning_time}s, Post-Pruning Time: {post_pruning_time}s")
-
-        # Save the final updated and pruned embeddings
-        model_data = {
-            'embeddings': updated_embeddings,
-            'tokenizer': tokenizer,
-            'config': {
-                'dim': 1024,
-                'binary': True
-            }
-        }
-        
-        with open(wordllama_model_path, 'wb') as file:
-            pickle.dump(model_data, file)
-
-        print("WordLlama model updated with self-training and pruning.")
+        model = wordllama_engine.model
+        embeddings, tokenizer = model.embeddings, model.tokenizer
+
+        updated_embeddings = embeddings
+        for task_details in samples:
+            updated_embeddings = fine_tune_embeddings(updated_embeddings, task_details.get('execution_result'), task_details)
+        if updated_embeddings is embeddings:
+            return {'version': None, 'skipped': 'embeddings unchanged'}
+
+        # Compare the fine-tuned model with the current one on the benchmark corpora
+        report = fine_tuning_validation(embeddings, updated_embeddings, tokenizer, dict(model.config), model.index_map)
+        regressions = quality_regressions(report)
+        if regressions:
+            print(f"WordLlama self-training not published, quality dropped: {regressions}")
+            return {'version': None, 'skipped': 'quality regression', 'regressions': regressions,
+                    'validation': report}
+
+        version = save_wordllama_model(updated_embeddings, tokenizer, dict(model.config), model.index_map)
+        print(f"WordLlama model updated with self-training (version {version}).")
+        return {'version': version, 'validation': report}
     except Exception as e:
         print(f"Error during WordLlama self-training: {e}")
+        return {'version': None, 'skipped': f"error: {e}"}
 
 def wordllama_restructure_prompt(prompt):
     """Generate a response from the Word Llama model given a prompt."""
@@ -0,0 +1,157 @@
+# backend/models/session_store.py
+
+import logging
+import threading
+import uuid
+from datetime import datetime
+from flask import g
+from flask_session import Session
+from flask_session.base import ServerSideSession, ServerSideSessionInterface
+from sqlalchemy import select, delete
+from backend.models.db import db, dialect_insert
+from backend.models.models import ServerSession
+
+
+class SqlSessionInterface(ServerSideSessionInterface):
+    """
+    Flask-Session interface storing sessions in the `server_sessions` table.
+
+    Reads and writes go through their own short transactions (never the request's
+    `db.session`), with one upsert per write. A session is written only when it was modified,
+    or when its stored copy has used up half of its lifetime, so requests that merely read the
+    session cost one primary-key lookup. Expired rows are deleted by `sweep()`, which the
+    background thread started by `start()` runs every `sweep_interval` seconds (0 disables it;
+    `flask session_cleanup` does the same on demand).
+    """
+
+    session_class = ServerSideSession
+    ttl = False
+
+    def __init__(self, app, key_prefix='session:', permanent=True, sid_length=32,
+                 serialization_format='msgpack', sweep_interval=600):
+        super().__init__(app, key_prefix=key_prefix, permanent=permanent, sid_length=sid_length,
+                         serialization_format=serialization_format)
+        self.sweep_interval = sweep_interval
+        self._sweeper = None
+        self._stop = threading.Event()
+        self._counters = {'reads': 0, 'writes': 0, 'deletes': 0, 'swept': 0}
+
+    def start(self):
+        if not self.sweep_interval or self._sweeper is not None:
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, name='session-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def _retrieve_session_data(self, store_id):
+        self._counters['reads'] += 1
+        with db.engine.connect() as connection:
+            row = connection.execute(
+                select(ServerSession.data, ServerSession.expiry).where(ServerSession.session_id == store_id)
+            ).first()
+        if row is None or row.expiry <= datetime.utcnow():
+            return None
+        g._stored_session_expiry = row.expiry
+        return self.serializer.decode(row.data)
+
+    def _delete_session(self, store_id):
+        self._counters['deletes'] += 1
+        with db.engine.begin() as connection:
+            connection.execute(delete(ServerSession).where(ServerSession.session_id == store_id))
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        self._counters['writes'] += 1
+        values = {
+            'session_id': store_id,
+            'data': self.serializer.encode(session),
+            'expiry': datetime.utcnow() + session_lifetime,
+        }
+        with db.engine.begin() as connection:
+            statement = dialect_insert(connection, ServerSession.__table__)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=['session_id'],
+                set_={'data': statement.excluded.data, 'expiry': statement.excluded.expiry}
+            ), values)
+
+    def _due_for_refresh(self, app):
+        expiry = g.get('_stored_session_expiry')
+        return expiry is not None and expiry - datetime.utcnow() < app.permanent_session_lifetime / 2
+
+    def should_set_storage(self, app, session):
+        return session.modified or self._due_for_refresh(app)
+
+    def should_set_cookie(self, app, session):
+        # The cookie carries the same expiry as the stored copy, so it is re-sent with every write
+        return self.should_set_storage(app, session)
+
+    def _delete_expired_sessions(self):
+        self.sweep()
+
+    def sweep(self):
+        """Delete expired sessions; returns how many were removed."""
+        with db.engine.begin() as connection:
+            result = connection.execute(delete(ServerSession).where(ServerSession.expiry <= datetime.utcnow()))
+        self._counters['swept'] += result.rowcount
+        return result.rowcount
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                with self.app.app_context():
+                    self.sweep()
+            except Exception as e:
+                logging.error(f"Session sweep failed: {e}")
+
+    def stats(self):
+        return {'backend': 'sql', **self._counters}
+
+
+def init_session_store(app):
+    """Install the session backend selected by SESSION_BACKEND ("sql", "redis", "memory" or "filesystem")."""
+    backend = app.config.get('SESSION_BACKEND', 'sql')
+    if backend == 'sql':
+        app.session_interface = SqlSessionInterface(
+            app,
+            key_prefix=app.config.get('SESSION_KEY_PREFIX', 'session:'),
+            permanent=app.config.get('SESSION_PERMANENT', True),
+            sweep_interval=app.config.get('SESSION_SWEEP_INTERVAL', 600),
+        )
+        return app.session_interface
+
+    if backend == 'redis':
+        import redis
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = redis.from_url(app.config['SESSION_REDIS_URL'])
+    elif backend == 'memory':
+        try:
+            from cachelib import SimpleCache
+        except ImportError:
+            raise ValueError("SESSION_BACKEND=memory requires the cachelib package") from None
+        app.config['SESSION_TYPE'] = 'cachelib'
+        app.config['SESSION_CACHELIB'] = SimpleCache(threshold=app.config.get('SESSION_MEMORY_MAX_ENTRIES', 10000))
+    elif backend == 'filesystem':
+        app.config['SESSION_TYPE'] = 'filesystem'
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    Session(app)
+    return app.session_interface
+
+
+def client_key(session):
+    """
+    Key of the client behind `session` for per-client state (response caches, job limits): the
+    signed-in user, or an id kept in an anonymous client's own session, so that anonymous
+    sessions never share state with each other.
+    """
+    user_id = session.get('user_id')
+    if user_id is not None:
+        return f"user:{user_id}"
+    if 'anonymous_id' not in session:
+        session['anonymous_id'] = uuid.uuid4().hex
+    return f"anonymous:{session['anonymous_id']}"
+
+
+def session_store_stats(app):
+    interface = app.session_interface
+    if hasattr(interface, 'stats'):
+        return interface.stats()
+    return {'backend': app.config.get('SESSION_BACKEND')}
@@ -2,14 +2,47 @@
 
 from flask_socketio import emit
 import json
-from flask import session
-from ..tools.intent_parser import parse_intent_with_gpt2, handle_task
-from ..tools.memory import retrieve_memory, create_or_fetch_session
+import time
+from flask import session, request
+from ..tools.intent_parser import classify_intent, handle_task, confirmation_prompt, CONFIRM_PREFIX
+from ..tools.memory import retrieve_memory, create_or_fetch_session, latest_interaction_query
+from ..tools.vector_memory import index_interaction
 from ..tools.code_execution import generate_llm_response, execute_code
+from ..tools.execution_jobs import execution_jobs, JobLimitExceeded
 from ..models.db import db
+from ..models.batch_writer import batch_writer
+from ..models.session_store import client_key
 from ..models.models import Interaction
+from ..models.model_registry import registry
+from ..models.observer import wordllama_engine, record_token_outcome
+from ..config import Config
 import logging
 
+def save_interaction(session_id, user_id, prompt, response, task_outcome, intent=None):
+    """Queue one interaction for the batch writer; it is added to the vector memory once committed."""
+    interaction = Interaction(
+        session_id=session_id,
+        user_id=user_id,
+        prompt=prompt,
+        response=response if isinstance(response, str) else json.dumps(response),
+        task_outcome=task_outcome,
+        intent=intent
+    )
+    batch_writer.add(interaction, on_commit=lambda saved: on_interaction_saved(saved, user_id))
+
+def on_interaction_saved(saved, user_id):
+    index_interaction(saved, user_id)
+    record_token_outcome(saved.prompt, saved.task_outcome == 'success')
+
+def record_feedback(user_feedback, user_id=None):
+    """Attach feedback to the user's most recent interaction; returns False if there is none."""
+    last_interaction = latest_interaction_query(user_id).first()
+    if not last_interaction:
+        return False
+    last_interaction.feedback = user_feedback
+    db.session.commit()
+    return True
+
 def socketio_handlers(socketio):
     @socketio.on('message')
     def handle_message(data):
@@ -20,47 +53,47 @@ def socketio_handlers(socketio):
         provider = data.get('provider') or session.get('provider', 'openai')
         config = data.get('config', {})
 
-        intent = parse_intent_with_gpt2(message)
+        # GPT-2 inference inside classify_intent runs on native threads in eventlet/gevent
+        # mode (see tools/offload.py); sandboxed code execution only waits on pipes
+        intent = classify_intent(message)
 
         if intent in ["create_folder", "delete_file", "create_file", "delete_folder", "execute_python_code", "execute_bash_code", "execute_js_code"]:
             result = handle_task(intent, message)
             emit('message', {'response': result})
             emit('message', {'feedback_prompt': "Was the task executed correctly? (yes/no)"})
 
-            if session.get('memory_enabled', True):
-                user_id = session.get('user_id')
+            user_id = session.get('user_id')
+            if session.get('memory_enabled', True) and user_id:
                 session_id = create_or_fetch_session(user_id)
-                past_memory = retrieve_memory(user_id, session_id, task_type=intent)
+                past_memory = retrieve_memory(user_id, query=message, limit=Config.MEMORY_TOP_K)
                 if past_memory:
                     emit('message', {'memory': past_memory})
-                interaction = Interaction(
-                    session_id=session_id,
-                    prompt=message,
-                    response=result,
-                    task_outcome="success" if result != "Unknown intent." else "failure"
+                # Written off the request path by the batch writer
+                save_interaction(
+                    session_id, user_id, message, result,
+                    "success" if result != "Unknown intent." else "failure", intent
                 )
-                db.session.add(interaction)
-                db.session.commit()
+
+        elif intent.startswith(CONFIRM_PREFIX):
+            # A model only guessed this task; it runs once the user sends the explicit command
+            emit('message', {'response': confirmation_prompt(intent)})
 
         elif intent == "feedback":
             user_feedback = message.lower()
-            last_interaction = Interaction.query.order_by(Interaction.timestamp.desc()).first()
-            if last_interaction:
-                last_interaction.feedback = user_feedback
-                db.session.commit()
+            if record_feedback(user_feedback, session.get('user_id')):
                 emit('message', {'response': "Thank you for the feedback!"})
 
         else:
-            code_response = generate_llm_response(message, model, provider, config)
-            if 'code' in code_response:
-                if provider != 'openai':
-                    emit('message', {'assistant': code_response['code']})
-            else:
+            # Every provider streams its output as 'assistant' frames while generating
+            code_response = generate_llm_response(
+                message, model, provider, config, user_id=client_key(session), acks=bool(data.get('ack'))
+            )
+            if 'error' in code_response:
                 emit('message', {'error': code_response['error']})
 
         if intent == "retrieve_memory":
             user_id = session.get('user_id')
-            memory = retrieve_memory(user_id)
+            memory = retrieve_memory(user_id, offset=data.get('offset', 0), limit=data.get('limit'))
             emit('message', {'memory': memory})
 
         if intent == "system_health_check":
@@ -75,28 +108,56 @@ def socketio_handlers(socketio):
     def handle_execute_code(data):
         code = data.get('code', '')
         language = data.get('language', 'python')
-        user_id = session.get('user_id', 'anonymous')
+        user_id = client_key(session)
 
         if not code:
             emit('execute_code_response', {'error': 'No code provided'})
             return
 
-        result = execute_code(code, language)
+        # Run in the background: output streams as execute_code_output events and the
+        # final result arrives as execute_code_response
+        sid = request.sid
+
+        def on_output(job, stream, text):
+            socketio.emit('execute_code_output', {'job_id': job.id, 'stream': stream, 'data': text}, to=sid)
+
+        def on_complete(job):
+            socketio.emit('execute_code_response', {'job_id': job.id, **job.result}, to=sid)
+
+        try:
+            job = execution_jobs.submit(
+                code, language, user_id, on_output=on_output, on_complete=on_complete,
+                use_cache=data.get('cache'), deterministic=data.get('deterministic')
+            )
+        except JobLimitExceeded as e:
+            emit('execute_code_response', {'error': str(e)})
+            return
 
         # Log the execution
         # log_task_execution(user_id, language, code, result.get('output', ''), result.get('status', 'error'))
 
-        emit('execute_code_response', result)
+        emit('execute_code_submitted', {'job_id': job.id})
+
+    @socketio.on('cancel_execution')
+    def handle_cancel_execution(data):
+        job_id = data.get('job_id')
+        cancelled = execution_jobs.cancel(job_id, owner=client_key(session))
+        emit('execution_cancel_response', {'job_id': job_id, 'cancelled': cancelled})
+
+    @socketio.on('ping_server')
+    def handle_ping(data=None):
+        # Cheap round trip; the load-test harness (backend/benchmarks/socketio_load.py) uses it
+        # to measure event loop stalls
+        return {'pong': time.time(), 'echo': data}
 
     @socketio.on('status_update')
     def handle_status_update():
         try:
-            # Check GPT-2 status
-            # Placeholder for actual status check
-            gpt2_status_text = "Operational"  # Replace with actual status
+            # Check GPT-2 status without forcing a load
+            gpt2_status_text = "Operational" if registry.is_loaded('gpt2') else "Not loaded"
 
             # Get WordLlama status
-            wordllama_status = get_wordllama_status()
+            wordllama_status = wordllama_engine.stats()
 
             emit('status_update', {
                 'gpt2': {
@@ -165,7 +165,8 @@ document.addEventListener('DOMContentLoaded', function () {
             message: message,
             provider: provider,
             model: model,
-            config: config
+            config: config,
+            ack: true  // Streamed frames are acknowledged below
         };
 
         socket.emit('message', JSON.stringify(data));
@@ -178,7 +179,12 @@ document.addEventListener('DOMContentLoaded', function () {
     });
 
     // Handle incoming messages from the server
-    socket.on('message', function (data) {
+    socket.on('message', function (data, ack) {
+        // Acknowledge streamed frames so the server can pace its output
+        if (typeof ack === 'function') {
+            ack();
+        }
+
         if (data.assistant) {
             addMessageToChat('Assistant', data.assistant);
         }
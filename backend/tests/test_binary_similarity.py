@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from backend.tools import binary_similarity
+from backend.tools.binary_similarity import hamming_distances, hamming_similarities, pack_bits, search
+
+
+def reference_distances(code_vectors, query_vectors):
+    """Hamming distances computed on the unpacked sign bits."""
+    codes = code_vectors > 0
+    queries = query_vectors > 0
+    return (queries[:, None, :] != codes[None, :, :]).sum(axis=-1)
+
+
+@pytest.mark.parametrize('dim', [1, 63, 64, 100, 256])
+@pytest.mark.parametrize('queries', [1, 3, 8, 20])
+def test_hamming_distances_match_reference(dim, queries):
+    rng = np.random.default_rng(dim * 100 + queries)
+    code_vectors = rng.standard_normal((257, dim))
+    query_vectors = rng.standard_normal((queries, dim))
+    distances = hamming_distances(pack_bits(code_vectors), pack_bits(query_vectors))
+    np.testing.assert_array_equal(distances, reference_distances(code_vectors, query_vectors))
+
+
+@pytest.mark.parametrize('queries', [2, 12])
+def test_hamming_distances_across_blocks(monkeypatch, queries):
+    monkeypatch.setattr(binary_similarity, '_BLOCK_ELEMENTS', 64)
+    rng = np.random.default_rng(queries)
+    code_vectors = rng.standard_normal((100, 130))
+    query_vectors = rng.standard_normal((queries, 130))
+    distances = hamming_distances(pack_bits(code_vectors), pack_bits(query_vectors))
+    np.testing.assert_array_equal(distances, reference_distances(code_vectors, query_vectors))
+
+
+def test_pack_bits_of_a_single_vector():
+    vector = np.array([1.0, -1.0, 0.0, 2.0] + [-1.0] * 60 + [3.0])
+    code = pack_bits(vector)
+    assert code.shape == (2,)
+    assert int(code[0]) == 0b1001 and int(code[1]) == 1
+
+
+def test_similarities_and_search_agree_with_reference():
+    rng = np.random.default_rng(7)
+    code_vectors = rng.standard_normal((500, 128))
+    query_vectors = rng.standard_normal((4, 128))
+    codes, queries = pack_bits(code_vectors), pack_bits(query_vectors)
+    reference = reference_distances(code_vectors, query_vectors)
+
+    np.testing.assert_allclose(hamming_similarities(codes, queries, 128), 1.0 - reference / 128)
+    indices, similarities = search(codes, queries, k=5, dim=128)
+    for row in range(len(queries)):
+        expected = np.sort(reference[row])[:5]
+        np.testing.assert_array_equal(reference[row][indices[row]], expected)
+        np.testing.assert_allclose(similarities[row], 1.0 - expected / 128)
@@ -0,0 +1,46 @@
+import time
+
+from backend.tools.cache import TTLCache, message_key
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.06)
+    assert cache.get('a', 'missing') == 'missing'
+    assert len(cache) == 0
+
+
+def test_set_refreshes_expiry_and_position():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('a', 10)
+    cache.set('c', 3)
+    assert cache.get('a') == 10 and cache.get('b') is None
+
+
+def test_stats_count_hits_and_misses():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('x')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_message_key_ignores_quoted_names_and_whitespace():
+    assert message_key('Create folder  "a"') == message_key('create folder "b"')
+    assert message_key('create folder "a"', template=False) != message_key('create folder "b"', template=False)
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from backend.tools import code_execution
+from backend.tools.code_execution import ExecutionResultCache, is_deterministic, with_execution_cache
+from backend.tools.sandbox_pool import SandboxPool
+
+
+@pytest.mark.parametrize('code', [
+    'print(hash("abc"))',
+    'print(id(object()))',
+    'print(set("abcdef"))',
+    'print({"a", "b", "c"})',
+    'import importlib; importlib.import_module("o"+"s").getpid()',
+    'print(().__class__.__base__.__subclasses__())',
+    'print(globals())',
+    'print(getattr(1, "real"))',
+    'print(lambda: 0)',
+    'class A: pass\nprint(A())',
+    'print(open("/etc/hostname").read())',
+    'def f(:',
+])
+def test_rejects_code_that_may_not_be_deterministic(code):
+    assert not is_deterministic(code, 'python')
+
+
+@pytest.mark.parametrize('code', [
+    'print(sum(i * i for i in range(10)))',
+    'def fib(n):\n    return n if n < 2 else fib(n - 1) + fib(n - 2)\nprint(fib(10))',
+    'words = sorted("the quick brown fox".split())\nprint(", ".join(words))',
+    'try:\n    1 / 0\nexcept ZeroDivisionError as e:\n    print(repr(e))',
+])
+def test_accepts_pure_python(code):
+    assert is_deterministic(code, 'python')
+
+
+@pytest.mark.parametrize('language', ['bash', 'javascript'])
+def test_other_languages_are_never_deterministic(language):
+    assert not is_deterministic('echo 1', language)
+
+
+def test_sandbox_pins_the_hash_seed():
+    pool = SandboxPool(size=1, timeout=10)
+    try:
+        outputs = {pool.run('print(hash("abc"), list(set("abcdef")))')['output'] for _ in range(2)}
+        pool._replace(pool._idle.get())
+        outputs.add(pool.run('print(hash("abc"), list(set("abcdef")))')['output'])
+    finally:
+        pool.shutdown()
+    assert len(outputs) == 1
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ExecutionResultCache(str(tmp_path), max_entries=3, max_bytes=10 ** 6)
+    monkeypatch.setattr(code_execution, 'execution_cache', cache)
+    monkeypatch.setattr(code_execution, 'interpreter_version', lambda language: 'Python 3')
+    return cache
+
+
+def counting_run(output='1\n'):
+    calls = []
+
+    def run():
+        calls.append(1)
+        return {'status': 'success', 'output': output}
+    return run, calls
+
+
+def test_caches_only_on_explicit_opt_in(cache):
+    run, calls = counting_run()
+    for deterministic in (None, False, None):
+        result = with_execution_cache('print(1)', 'python', run, use_cache=True, deterministic=deterministic)
+        assert not result['cache']['cacheable']
+    assert len(calls) == 3
+
+    with_execution_cache('print(1)', 'python', run, use_cache=True, deterministic=True)
+    result = with_execution_cache('print(1)', 'python', run, use_cache=True, deterministic=True)
+    assert result['cache']['hit'] and len(calls) == 4
+
+
+def test_opt_in_does_not_cache_code_the_allowlist_rejects(cache):
+    run, calls = counting_run()
+    for _ in range(2):
+        result = with_execution_cache('print(id(object()))', 'python', run, use_cache=True, deterministic=True)
+        assert not result['cache']['cacheable']
+    assert len(calls) == 2
+
+
+def test_entries_are_scoped_per_user(cache):
+    run, calls = counting_run()
+    with_execution_cache('print(1)', 'python', run, use_cache=True, deterministic=True, user_id='alice')
+    result = with_execution_cache('print(1)', 'python', run, use_cache=True, deterministic=True, user_id='bob')
+    assert not result['cache']['hit'] and len(calls) == 2
+
+
+def test_evicts_least_recently_used_without_rescanning(cache, tmp_path, monkeypatch):
+    for key in 'abc':
+        cache.put(key, {'status': 'success', 'output': key})
+    assert cache.get('a') is not None
+
+    def no_scandir(path):
+        raise AssertionError('put() rescanned the cache directory')
+    monkeypatch.setattr(code_execution.os, 'scandir', no_scandir)
+    cache.put('d', {'status': 'success', 'output': 'd'})
+
+    assert sorted(os.listdir(tmp_path)) == ['a.json', 'c.json', 'd.json']
+    assert cache.evictions == 1
+
+
+def test_index_is_rebuilt_from_disk_and_honours_the_byte_limit(tmp_path):
+    first = ExecutionResultCache(str(tmp_path), max_entries=10, max_bytes=10 ** 6)
+    for index, key in enumerate('abc'):
+        first.put(key, {'status': 'success', 'output': key * 100})
+        os.utime(first._path(key), (1000 + index, 1000 + index))
+
+    entry_size = os.path.getsize(first._path('a'))
+    second = ExecutionResultCache(str(tmp_path), max_entries=10, max_bytes=3 * entry_size)
+    second.put('d', {'status': 'success', 'output': 'd' * 100})
+    assert sorted(os.listdir(tmp_path)) == ['b.json', 'c.json', 'd.json']
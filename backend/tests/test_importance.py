@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+
+from backend.tools.importance import TokenSignals
+
+
+def record(path, usage_ids):
+    recorder = TokenSignals(path, load=False)
+    recorder.record_usage(usage_ids)
+    recorder.flush()
+    return recorder
+
+
+def usage(path, size=8):
+    return TokenSignals(path).counts(size)['usage'].tolist()
+
+
+def test_flush_writes_only_new_increments(tmp_path):
+    path = str(tmp_path / 'signals.npz')
+    recorder = record(path, [1, 1, 2])
+    recorder.flush()  # Nothing recorded since the last flush: no new delta file
+    assert len(recorder.delta_files()) == 1
+
+    recorder.record_usage([3])
+    recorder.flush()
+    assert len(recorder.delta_files()) == 2
+    assert usage(path) == [0, 2, 1, 1, 0, 0, 0, 0]
+
+
+def test_compact_folds_deltas_into_totals_once(tmp_path):
+    path = str(tmp_path / 'signals.npz')
+    record(path, [1, 1, 2])
+    record(path, [2, 5])
+
+    compactor = TokenSignals(path)
+    assert compactor.compact() == 2
+    assert compactor.compact() == 0
+    assert compactor.delta_files() == []
+    assert usage(path) == [0, 2, 2, 0, 0, 1, 0, 0]
+
+    record(path, [5])
+    assert TokenSignals(path).compact() == 1
+    assert usage(path) == [0, 2, 2, 0, 0, 2, 0, 0]
+
+
+def test_crash_between_save_and_delete_does_not_double_count(tmp_path):
+    path = str(tmp_path / 'signals.npz')
+    record(path, [1, 1, 2])
+
+    # A compaction that wrote the totals but died before deleting the delta file
+    TokenSignals(path).save()
+    assert os.path.exists(path)
+    assert len(os.listdir(tmp_path / 'signals.deltas')) == 1
+    assert usage(path) == [0, 2, 1, 0, 0, 0, 0, 0]
+
+    # The next compaction deletes the already merged delta without adding it again
+    record(path, [4])
+    compactor = TokenSignals(path)
+    assert compactor.compact() == 2
+    assert compactor.delta_files() == []
+    assert usage(path) == [0, 2, 1, 0, 1, 0, 0, 0]
+
+
+def test_scores_are_normalised(tmp_path):
+    signals = TokenSignals(None, load=False)
+    signals.record_usage([0, 0, 0, 1])
+    signals.record_hits([1])
+    signals.record_outcome([2], success=True)
+    scores = signals.scores(4)
+    assert scores.shape == (4,)
+    assert np.all((scores >= 0) & (scores <= 1))
+    assert scores[3] == 0
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from backend.tools.llm_streaming import TokenRelay
+
+
+class Client:
+    """Collects frames and their acknowledgement callbacks, acknowledging only when asked to."""
+
+    def __init__(self):
+        self.frames = []
+        self.acks = []
+        self.lock = threading.Lock()
+
+    def send(self, frame, ack):
+        with self.lock:
+            self.frames.append(frame)
+            self.acks.append(ack)
+
+    def ack_all(self):
+        with self.lock:
+            acks, self.acks = self.acks, []
+        for ack in acks:
+            ack()
+
+
+def test_producer_blocks_while_the_window_is_full():
+    client = Client()
+    relay = TokenRelay(client.send, max_frame_chars=1, max_frame_interval=0, max_in_flight=2,
+                       max_buffer_chars=4, ack_timeout=30)
+    tokens = [f"t{i}" for i in range(20)]
+    producer = threading.Thread(target=lambda: [relay.push(token) for token in tokens])
+    producer.start()
+    producer.join(timeout=0.3)
+
+    # Two unacknowledged frames fill the window; the producer waits once 4 chars are pending
+    assert producer.is_alive()
+    assert len(client.frames) == 2
+    assert relay.backpressure_waits >= 1
+
+    deadline = time.monotonic() + 5
+    while producer.is_alive() and time.monotonic() < deadline:
+        client.ack_all()
+        time.sleep(0.01)
+    assert not producer.is_alive()
+    client.ack_all()
+    assert relay.close() == ''.join(tokens)
+    assert ''.join(client.frames) == ''.join(tokens)
+
+
+def test_overdue_acknowledgements_are_given_up_on():
+    client = Client()
+    relay = TokenRelay(client.send, max_frame_chars=1, max_frame_interval=0, max_in_flight=1,
+                       max_buffer_chars=2, ack_timeout=0.05)
+    started = time.monotonic()
+    for token in ['ab', 'cd', 'ef']:
+        relay.push(token)
+    assert relay.close() == 'abcdef'
+    assert ''.join(client.frames) == 'abcdef'
+    assert time.monotonic() - started < 2
+
+
+def test_without_acknowledgements_frames_are_sent_when_due():
+    client = Client()
+    relay = TokenRelay(client.send, max_frame_chars=4, max_frame_interval=10, max_in_flight=None)
+    for token in ['a', 'b', 'cd', 'e']:
+        relay.push(token)
+    assert client.frames == ['abcd']
+    assert client.acks == [None]
+    relay.close()
+    assert client.frames == ['abcd', 'e']
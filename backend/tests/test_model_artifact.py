@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pytest
+
+from backend.models import model_artifact
+from backend.models.model_artifact import (
+    ModelArtifactError, load_artifact, read_manifest, verify_artifact, versions, write_artifact,
+)
+
+CONFIG = {'dim': 4, 'binary': False}
+
+
+def matrix(rows, value):
+    return np.full((rows, 4), value, dtype=np.float32)
+
+
+def test_publish_makes_the_new_version_current(tmp_path):
+    directory = str(tmp_path)
+    write_artifact(directory, matrix(3, 1.0), {'vocab': 1}, CONFIG)
+    manifest = write_artifact(directory, matrix(2, 2.0), {'vocab': 1}, CONFIG, index_map=[0, -1, 1])
+
+    assert manifest['version'] == 2
+    model = load_artifact(directory, verify=True)
+    assert model['version'] == 2
+    np.testing.assert_array_equal(model['embeddings'], matrix(2, 2.0))
+    assert model['index_map'].tolist() == [0, -1, 1]
+    assert model['tokenizer'] == {'vocab': 1}
+    assert not model['embeddings'].flags.writeable
+    # The unchanged tokenizer is shared with version 1 rather than written again
+    assert manifest['files']['tokenizer']['file'] == 'tokenizer.v1.pkl'
+
+
+def test_previous_versions_stay_loadable_for_rollback(tmp_path):
+    directory = str(tmp_path)
+    for value in (1.0, 2.0, 3.0, 4.0):
+        write_artifact(directory, matrix(2, value), {'vocab': 1}, CONFIG, keep_versions=2)
+
+    assert versions(directory) == [2, 3, 4]
+    assert not os.path.exists(tmp_path / 'embeddings.v1.npy')
+    previous = load_artifact(directory, manifest=read_manifest(directory, version=3))
+    np.testing.assert_array_equal(previous['embeddings'], matrix(2, 3.0))
+
+
+def test_failed_publish_leaves_the_current_version_intact(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    write_artifact(directory, matrix(3, 1.0), {'vocab': 1}, CONFIG)
+
+    def failing_save(file, array):
+        file.write(b'partial')
+        raise OSError('disk full')
+    monkeypatch.setattr(model_artifact.np, 'save', failing_save)
+    with pytest.raises(OSError):
+        write_artifact(directory, matrix(2, 2.0), {'vocab': 1}, CONFIG)
+    monkeypatch.undo()
+
+    assert read_manifest(directory)['version'] == 1
+    assert not [name for name in os.listdir(directory) if name.endswith('.tmp')]
+    np.testing.assert_array_equal(load_artifact(directory, verify=True)['embeddings'], matrix(3, 1.0))
+
+
+def test_verify_detects_corruption(tmp_path):
+    directory = str(tmp_path)
+    manifest = write_artifact(directory, matrix(3, 1.0), {'vocab': 1}, CONFIG)
+    path = tmp_path / manifest['files']['embeddings']['file']
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    load_artifact(directory)  # Sizes still match; only checksums read every byte
+    with pytest.raises(ModelArtifactError):
+        verify_artifact(directory)
+
+
+def test_rejects_non_matrix_embeddings(tmp_path):
+    with pytest.raises(ModelArtifactError):
+        write_artifact(str(tmp_path), np.zeros(4), {'vocab': 1}, CONFIG)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from backend.tools.pruning_utils import apply_mask, build_index_map, compose_index_maps, select_rows
+
+
+def test_select_rows_threshold():
+    mask = select_rows([0.1, 0.5, 0.9, 0.5], 'threshold', threshold=0.5)
+    assert mask.tolist() == [False, True, True, True]
+
+
+def test_select_rows_top_k_breaks_ties_by_row():
+    mask = select_rows([0.5, 0.9, 0.5, 0.5, 0.1], 'top_k', top_k=3)
+    assert mask.tolist() == [True, True, True, False, False]
+
+
+def test_select_rows_percentile():
+    scores = np.arange(10, dtype=np.float64)
+    mask = select_rows(scores, 'percentile', percentile=80)
+    assert np.flatnonzero(mask).tolist() == [8, 9]
+
+
+def test_select_rows_keep_and_min_keep():
+    scores = [0.0, 0.2, 0.1, 0.9, 0.3]
+    mask = select_rows(scores, 'threshold', threshold=0.5, keep=[0], min_keep=3)
+    # Row 0 is forced, row 3 passes the threshold, and row 4 is the best of the rest
+    assert np.flatnonzero(mask).tolist() == [0, 3, 4]
+
+
+@pytest.mark.parametrize('policy', ['top_k', 'percentile', 'unknown'])
+def test_select_rows_rejects_incomplete_policies(policy):
+    with pytest.raises(ValueError):
+        select_rows([0.1, 0.2], policy)
+
+
+@pytest.fixture
+def embeddings():
+    return np.random.default_rng(0).standard_normal((101, 8)).astype(np.float32)
+
+
+@pytest.fixture
+def mask():
+    return np.random.default_rng(1).random(101) < 0.4
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 7, 65536])
+def test_apply_mask_in_place_matches_a_copy(embeddings, mask, chunk_rows):
+    expected = embeddings[mask].copy()
+    pruned = apply_mask(embeddings, mask, in_place=True, chunk_rows=chunk_rows)
+    assert np.shares_memory(pruned, embeddings)
+    np.testing.assert_array_equal(pruned, expected)
+
+
+def test_apply_mask_in_place_refuses_read_only(embeddings, mask):
+    embeddings.flags.writeable = False
+    with pytest.raises(ValueError):
+        apply_mask(embeddings, mask, in_place=True)
+
+
+def test_apply_mask_to_file(embeddings, mask, tmp_path):
+    path = str(tmp_path / 'pruned.npy')
+    apply_mask(embeddings, mask, out_path=path, chunk_rows=5)
+    np.testing.assert_array_equal(np.load(path), embeddings[mask])
+
+
+def test_apply_mask_checks_length(embeddings):
+    with pytest.raises(ValueError):
+        apply_mask(embeddings, np.ones(3, dtype=bool))
+
+
+def test_compose_index_maps_matches_pruning_twice(embeddings):
+    rng = np.random.default_rng(2)
+    first_mask = rng.random(len(embeddings)) < 0.6
+    once = embeddings[first_mask]
+    second_mask = rng.random(len(once)) < 0.5
+    twice = once[second_mask]
+
+    composed = compose_index_maps(build_index_map(first_mask), build_index_map(second_mask))
+    for row, new_row in enumerate(composed):
+        if new_row >= 0:
+            np.testing.assert_array_equal(twice[new_row], embeddings[row])
+    assert int((composed >= 0).sum()) == len(twice)
+    assert sorted(composed[composed >= 0].tolist()) == list(range(len(twice)))
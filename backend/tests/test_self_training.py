@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend.models import observer
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = SimpleNamespace(embeddings=np.zeros((4, 2), dtype=np.float32), tokenizer=object(),
+                            config={'dim': 2}, index_map=None)
+    monkeypatch.setattr(observer, 'wordllama_engine', SimpleNamespace(model=model))
+    saved = []
+    monkeypatch.setattr(observer, 'save_wordllama_model', lambda *args: saved.append(args) or 7)
+    return saved
+
+
+def report(before, after):
+    metrics = ('intent_accuracy', 'retrieval_recall_at_1', 'retrieval_mrr')
+    return {'before': dict.fromkeys(metrics, before), 'after': dict.fromkeys(metrics, after)}
+
+
+def test_unchanged_embeddings_are_not_saved(model):
+    result = observer.self_train_wordllama([{'message': 'hi', 'execution_result': {'status': 'success'}}])
+    assert result == {'version': None, 'skipped': 'embeddings unchanged'}
+    assert model == []
+
+
+@pytest.mark.parametrize('after, published', [(0.9, True), (0.5, False)])
+def test_publishing_is_gated_on_quality(model, monkeypatch, after, published):
+    monkeypatch.setattr(observer, 'fine_tune_embeddings', lambda embeddings, result, details: embeddings + 1)
+    monkeypatch.setattr(observer, 'fine_tuning_validation', lambda *args: report(0.9, after))
+
+    result = observer.self_train_wordllama([{'message': 'hi', 'execution_result': {'status': 'success'}}])
+    assert (result['version'] == 7) is published
+    assert len(model) == (1 if published else 0)
+    if not published:
+        assert result['skipped'] == 'quality regression' and result['regressions']
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from backend.models.db import db
+from backend.models.models import Interaction, SuccessCounter, User, UserSession
+from backend.tools.success_stats import rebuild_success_counters, success_counts, success_rate
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user_session(app):
+    user = User(username='alice')
+    db.session.add(user)
+    db.session.flush()
+    session = UserSession(user_id=user.id, topic='test', model_used='gpt2')
+    db.session.add(session)
+    db.session.commit()
+    return session
+
+
+def interaction(session, outcome, intent='math', feedback=None):
+    return Interaction(session_id=session.id, user_id=session.user_id, prompt='p', response='r',
+                       task_outcome=outcome, feedback=feedback, intent=intent, timestamp=datetime.utcnow())
+
+
+def counters():
+    return {(c.user_id, c.intent, c.period): (c.total, c.successes) for c in SuccessCounter.query.all()}
+
+
+def test_inserts_are_counted_in_the_same_transaction(user_session):
+    db.session.add_all([interaction(user_session, 'success'), interaction(user_session, 'failure'),
+                        interaction(user_session, 'success', intent='chat')])
+    db.session.commit()
+
+    user_id = user_session.user_id
+    assert success_counts(user_id) == (3, 2)
+    assert success_counts(user_id, 'math') == (2, 1)
+    assert success_counts(user_id, 'math', window_days=1) == (2, 1)
+    assert success_rate(user_id, 'chat') == 1.0
+
+
+def test_feedback_and_outcome_changes_adjust_the_counters(user_session):
+    first, second = interaction(user_session, 'success'), interaction(user_session, 'failure')
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    # Both instances are expired after the commit; the old values are loaded on assignment
+    first.feedback = 'no, that was wrong'
+    second.task_outcome = 'success'
+    db.session.commit()
+    assert success_counts(user_session.user_id) == (2, 1)
+
+    second.feedback = 'no'
+    db.session.commit()
+    assert success_counts(user_session.user_id) == (2, 0)
+
+
+def test_deletes_are_subtracted(user_session):
+    first, second = interaction(user_session, 'success'), interaction(user_session, 'failure')
+    db.session.add_all([first, second])
+    db.session.commit()
+    db.session.delete(first)
+    db.session.commit()
+    assert success_counts(user_session.user_id) == (1, 0)
+
+
+def test_incremental_counters_match_a_rebuild(user_session):
+    items = [interaction(user_session, outcome, intent)
+             for outcome, intent in [('success', 'math'), ('failure', 'math'), ('success', 'chat')]]
+    db.session.add_all(items)
+    db.session.commit()
+    items[1].feedback = 'yes'
+    db.session.delete(items[2])
+    db.session.commit()
+
+    incremental = {key: value for key, value in counters().items() if value != (0, 0)}
+    rebuild_success_counters()
+    assert counters() == incremental
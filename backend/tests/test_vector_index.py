@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from backend.tools.vector_index import VectorIndex
+
+
+def normalised(rows, dim, seed):
+    vectors = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def brute_force(ids, vectors, query, k):
+    similarities = vectors @ query
+    order = np.argsort(-similarities, kind='stable')[:k]
+    return [int(ids[i]) for i in order]
+
+
+@pytest.fixture
+def data():
+    vectors = normalised(600, 32, seed=0)
+    ids = np.arange(1000, 1600)
+    timestamps = np.linspace(0, 1000, len(ids))
+    return ids, vectors, timestamps
+
+
+@pytest.mark.parametrize('options', [{}, {'ivf_min_size': 100, 'nlist': 8, 'nprobe': 8}])
+def test_search_matches_brute_force(data, options):
+    ids, vectors, timestamps = data
+    index = VectorIndex(32, **options)
+    index.add(ids, vectors, timestamps)
+    for query in normalised(20, 32, seed=1):
+        results = index.search(query, k=10)
+        assert [item_id for item_id, _, _ in results] == brute_force(ids, vectors, query, 10)
+        similarities = [similarity for _, _, similarity in results]
+        np.testing.assert_allclose(similarities, np.sort(vectors @ query)[::-1][:10], rtol=1e-5)
+
+
+def test_offset_pages_through_results(data):
+    ids, vectors, timestamps = data
+    index = VectorIndex(32)
+    index.add(ids, vectors, timestamps)
+    query = normalised(1, 32, seed=2)[0]
+    first, second = index.search(query, k=5), index.search(query, k=5, offset=5)
+    assert [r[0] for r in first + second] == brute_force(ids, vectors, query, 10)
+
+
+def test_remove_and_replace(data):
+    ids, vectors, timestamps = data
+    index = VectorIndex(32)
+    index.add(ids, vectors, timestamps)
+    removed = ids[::3]
+    index.remove(removed)
+    assert len(index) == len(ids) - len(removed)
+
+    remaining = ~np.isin(ids, removed)
+    for query in normalised(10, 32, seed=3):
+        assert [r[0] for r in index.search(query, k=10)] == brute_force(ids[remaining], vectors[remaining], query, 10)
+
+    # Re-adding an id replaces its vector instead of duplicating it
+    index.add([ids[1]], vectors[2:3], [0.0])
+    results = index.search(vectors[2], k=2)
+    assert {results[0][0], results[1][0]} == {int(ids[1]), int(ids[2])}
+    assert len(index) == len(ids) - len(removed)
+
+
+def test_allowed_restricts_results(data):
+    ids, vectors, timestamps = data
+    index = VectorIndex(32)
+    index.add(ids, vectors, timestamps)
+    allowed = set(int(i) for i in ids[:50])
+    query = normalised(1, 32, seed=4)[0]
+    assert [r[0] for r in index.search(query, k=5, allowed=allowed)] == brute_force(ids[:50], vectors[:50], query, 5)
+
+
+def test_recency_weight_prefers_newer_entries():
+    index = VectorIndex(2)
+    index.add([1, 2], [[1.0, 0.0], [1.0, 0.0]], [0.0, 100.0])
+    results = index.search([1.0, 0.0], k=2, recency_weight=0.5, half_life=10, now=100.0)
+    assert [r[0] for r in results] == [2, 1]
+
+
+def test_binary_shortlist_finds_stored_vectors(data):
+    ids, vectors, timestamps = data
+    index = VectorIndex(32, binary_min_size=100, coarse_bits=32, oversample=4)
+    index.add(ids, vectors, timestamps)
+    for row in range(0, len(ids), 37):
+        assert index.search(vectors[row], k=1)[0][0] == int(ids[row])
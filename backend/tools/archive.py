@@ -0,0 +1,195 @@
+# backend/tools/archive.py
+#
+# Append-only archive of rows moved out of the live database by the retention job. Each batch of
+# a table becomes one compressed JSON-lines file (zstd when the zstandard package is installed,
+# gzip otherwise) named after the time range it covers, with a small JSON index of the distinct
+# values of its indexed columns (the owning user) next to it, so a query only opens files that can
+# contain matching rows.
+
+import gzip
+import io
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_TIME_FORMAT = '%Y%m%dT%H%M%S'
+_NO_TIME = '00000000T000000'
+_EXTENSIONS = {'zstd': '.jsonl.zst', 'gzip': '.jsonl.gz'}
+_INDEX_SUFFIX = '.idx.json'
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def _parse_time(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+
+class RowArchive:
+    """
+    Archived rows under `root/<table>/<first>_<last>_<id>.jsonl.(zst|gz)`, where first/last are the
+    earliest and latest `time_field` values in the file (rows without a time sort first). Each file
+    has an index `<file>.idx.json` listing the distinct values of its `index_fields` columns; a
+    query filtering on such a column skips files whose index lacks the value (files without an
+    index are always read).
+    """
+
+    def __init__(self, root, compression='auto', level=3, index_fields=('user_id',)):
+        if compression == 'auto':
+            compression = 'zstd' if zstandard is not None else 'gzip'
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd archive compression requires the zstandard package")
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        self.root = str(root)
+        self.compression = compression
+        self.level = level
+        self.index_fields = tuple(index_fields)
+        self._indexes = {}  # Archive files are immutable, so their loaded indexes never go stale
+        self._indexes_lock = threading.Lock()
+
+    def _open_write(self, path):
+        raw = open(path, 'wb')
+        if self.compression == 'zstd':
+            stream = zstandard.ZstdCompressor(level=self.level).stream_writer(raw, closefd=True)
+        else:
+            stream = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=min(self.level * 2, 9))
+            stream.myfileobj = raw  # close the file together with the gzip stream
+        return io.TextIOWrapper(stream, encoding='utf-8')
+
+    @staticmethod
+    def _open_read(path):
+        raw = open(path, 'rb')
+        if path.endswith('.zst'):
+            if zstandard is None:
+                raw.close()
+                raise RuntimeError(f"Reading {path} requires the zstandard package")
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            stream = gzip.GzipFile(fileobj=raw, mode='rb')
+            stream.myfileobj = raw
+        return io.TextIOWrapper(stream, encoding='utf-8')
+
+    def write(self, table, rows, time_field='timestamp'):
+        """Write `rows` (dicts) as one archive file and return its path; the file appears atomically."""
+        if not rows:
+            return None
+        times = sorted(row[time_field] for row in rows if row.get(time_field) is not None)
+        first = times[0].strftime(_TIME_FORMAT) if times and len(times) == len(rows) else _NO_TIME
+        last = times[-1].strftime(_TIME_FORMAT) if times else _NO_TIME
+
+        directory = os.path.join(self.root, table)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{first}_{last}_{uuid.uuid4().hex[:8]}{_EXTENSIONS[self.compression]}")
+        # The index appears before the file it describes, so a readable file is never missing rows from its index
+        index = {field: sorted({row[field] for row in rows if field in row}, key=str)
+                 for field in self.index_fields if any(field in row for row in rows)}
+        temporary = path + _INDEX_SUFFIX + '.tmp'
+        with open(temporary, 'w') as out:
+            json.dump(index, out, default=_json_default)
+        os.replace(temporary, path + _INDEX_SUFFIX)
+
+        temporary = path + '.tmp'
+        with self._open_write(temporary) as out:
+            for row in rows:
+                out.write(json.dumps(row, default=_json_default, separators=(',', ':')))
+                out.write('\n')
+        with open(temporary, 'rb') as written:
+            os.fsync(written.fileno())
+        os.replace(temporary, path)
+        return path
+
+    def discard(self, path):
+        """Remove an archive file and its index, e.g. when the rows it holds were not deleted after all."""
+        for name in (path, path + _INDEX_SUFFIX):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+        with self._indexes_lock:
+            self._indexes.pop(path, None)
+
+    def _index(self, path):
+        """`{column: set(values)}` of an archive file, or None when it has no index."""
+        with self._indexes_lock:
+            if path in self._indexes:
+                return self._indexes[path]
+        try:
+            with open(path + _INDEX_SUFFIX) as file:
+                index = {field: set(values) for field, values in json.load(file).items()}
+        except (OSError, ValueError):
+            index = None
+        with self._indexes_lock:
+            self._indexes[path] = index
+        return index
+
+    def _may_contain(self, path, filters):
+        index = self._index(path)
+        if index is None:
+            return True
+        return all(value in index[column] for column, value in filters.items() if column in index)
+
+    def files(self, table, since=None, until=None):
+        """Archive files of `table` that may hold rows in [since, until], oldest first."""
+        directory = os.path.join(self.root, table)
+        if not os.path.isdir(directory):
+            return []
+        selected = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(tuple(_EXTENSIONS.values())):
+                continue
+            first, last = name.split('_')[:2]
+            if since is not None and last != _NO_TIME and last < since.strftime(_TIME_FORMAT):
+                continue
+            if until is not None and first != _NO_TIME and first > until.strftime(_TIME_FORMAT):
+                continue
+            selected.append(os.path.join(directory, name))
+        return selected
+
+    def query(self, table, since=None, until=None, limit=None, time_field='timestamp', **filters):
+        """
+        Yield archived rows of `table` (oldest files first) whose `time_field` lies in
+        [since, until] and whose columns equal the given `filters`, up to `limit` rows.
+        """
+        returned = 0
+        for path in self.files(table, since, until):
+            if not self._may_contain(path, filters):
+                continue
+            with self._open_read(path) as lines:
+                for line in lines:
+                    row = json.loads(line)
+                    if any(row.get(column) != value for column, value in filters.items()):
+                        continue
+                    if since is not None or until is not None:
+                        moment = _parse_time(row.get(time_field))
+                        if moment is None or (since is not None and moment < since) or (until is not None and moment > until):
+                            continue
+                    yield row
+                    returned += 1
+                    if limit is not None and returned >= limit:
+                        return
+
+    def stats(self):
+        tables = {}
+        if os.path.isdir(self.root):
+            for table in sorted(os.listdir(self.root)):
+                paths = self.files(table)
+                tables[table] = {'files': len(paths), 'bytes': sum(os.path.getsize(path) for path in paths)}
+        return {'root': self.root, 'compression': self.compression, 'tables': tables}
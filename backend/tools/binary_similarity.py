@@ -0,0 +1,134 @@
+# backend/tools/binary_similarity.py
+#
+# Similarity kernels for binarised WordLlama embeddings. A vector is reduced to its sign bits,
+# packed into uint64 words (64 dimensions per word, in dimension order), and compared with
+# XOR + popcount: the Hamming distance. WordLlama's leading dimensions carry the most
+# information, so the first words of a code (a truncated, e.g. 256-bit, code) give a cheap coarse
+# ranking whose shortlist is then reranked on the full code or on the float vectors.
+# All functions take a matrix of queries and score them against the whole code matrix at once.
+
+import numpy as np
+
+WORD_BITS = 64
+
+# Elements of the temporary XOR block (bounds memory use and keeps batches in cache)
+_BLOCK_ELEMENTS = 1 << 18
+
+# From this many queries on, codes are compared word by word (see hamming_distances)
+_WORD_MAJOR_MIN_QUERIES = 8
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        """Number of set bits of every element."""
+        return np.bitwise_count(words)
+else:
+    _BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """Number of set bits of every element."""
+        words = np.ascontiguousarray(words)
+        counts = _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape + (words.dtype.itemsize,))
+        return counts.sum(axis=-1, dtype=np.uint8)
+
+
+def words_for(bits):
+    return -(-int(bits) // WORD_BITS)
+
+
+def pack_bits(vectors):
+    """Sign bits of float vectors (`> 0` is 1) packed into uint64 words, one row per vector."""
+    vectors = np.asarray(vectors)
+    single = vectors.ndim == 1
+    vectors = vectors.reshape(-1, vectors.shape[-1])
+    bits = vectors > 0
+    padding = words_for(bits.shape[1]) * WORD_BITS - bits.shape[1]
+    if padding:
+        bits = np.pad(bits, ((0, 0), (0, padding)))
+    codes = np.packbits(bits, axis=1, bitorder='little').view(np.uint64)
+    return codes[0] if single else codes
+
+
+def truncate(codes, bits):
+    """The first `bits` dimensions of packed codes (rounded up to whole words)."""
+    return codes[..., :words_for(bits)]
+
+
+def hamming_distances(codes, queries):
+    """`(queries, codes)` matrix of Hamming distances between packed queries and packed codes."""
+    codes = np.asarray(codes, dtype=np.uint64)
+    queries = np.asarray(queries, dtype=np.uint64).reshape(-1, codes.shape[-1])
+    distances = np.empty((len(queries), len(codes)), dtype=np.int32)
+    if len(queries) < _WORD_MAJOR_MIN_QUERIES:
+        # XOR every code with the query at once and add up the popcounts of each row
+        step = max(_BLOCK_ELEMENTS // max(len(queries) * codes.shape[-1], 1), 1)
+        for start in range(0, len(codes), step):
+            block = codes[start:start + step]
+            xor = np.bitwise_xor(queries[:, None, :], block[None, :, :])
+            distances[:, start:start + len(block)] = popcount(xor).sum(axis=-1, dtype=np.int32)
+        return distances
+
+    # Batches: transpose a block of codes so each word is one contiguous row, then accumulate
+    # word by word over a (queries, block) matrix that stays in cache
+    step = max(_BLOCK_ELEMENTS // len(queries), 1)
+    for start in range(0, len(codes), step):
+        words = np.ascontiguousarray(codes[start:start + step].T)
+        xor = np.empty((len(queries), words.shape[1]), dtype=np.uint64)
+        total = np.zeros(xor.shape, dtype=np.int32)
+        for word in range(words.shape[0]):
+            np.bitwise_xor(queries[:, word, None], words[word][None, :], out=xor)
+            total += popcount(xor)
+        distances[:, start:start + words.shape[1]] = total
+    return distances
+
+
+def hamming_similarities(codes, queries, dim):
+    """Similarity in [0, 1] (1 - distance / dim) of every query to every code."""
+    return 1.0 - hamming_distances(codes, queries) / float(dim)
+
+
+def _smallest(values, count):
+    """Column indices of the `count` smallest values of every row, in ascending order."""
+    count = min(count, values.shape[1])
+    if count <= 0:
+        return np.empty((len(values), 0), dtype=np.int64)
+    part = np.argpartition(values, count - 1, axis=1)[:, :count]
+    order = np.argsort(np.take_along_axis(values, part, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1)
+
+
+def shortlist(codes, queries, count, coarse_bits=None, excluded=None):
+    """
+    Indices (rows of `codes`) of the `count` nearest codes per query, ranked by Hamming distance
+    over the first `coarse_bits` dimensions (all of them when None). `excluded` is an optional
+    boolean mask of codes that must not be returned.
+    """
+    queries = np.asarray(queries, dtype=np.uint64).reshape(-1, codes.shape[-1])
+    if coarse_bits is not None:
+        codes, queries = truncate(codes, coarse_bits), truncate(queries, coarse_bits)
+    distances = hamming_distances(codes, queries)
+    if excluded is not None:
+        distances[:, excluded] = np.iinfo(np.int32).max
+    return _smallest(distances, count)
+
+
+def search(codes, queries, k, dim, coarse_bits=None, oversample=8):
+    """
+    Top-`k` codes per packed query: a coarse shortlist of `k * oversample` by the first
+    `coarse_bits` dimensions, reranked by full-code Hamming distance. Returns `(indices,
+    similarities)`, both of shape `(queries, k)`.
+    """
+    queries = np.asarray(queries, dtype=np.uint64).reshape(-1, codes.shape[-1])
+    if coarse_bits is None or coarse_bits >= dim or k * oversample >= len(codes):
+        distances = hamming_distances(codes, queries)
+        top = _smallest(distances, k)
+        return top, 1.0 - np.take_along_axis(distances, top, axis=1) / float(dim)
+
+    candidates = shortlist(codes, queries, k * oversample, coarse_bits)
+    indices = np.empty((len(queries), min(k, candidates.shape[1])), dtype=np.int64)
+    similarities = np.empty(indices.shape, dtype=np.float64)
+    for row, query in enumerate(queries):
+        distances = hamming_distances(codes[candidates[row]], query)
+        top = _smallest(distances, k)[0]
+        indices[row] = candidates[row][top]
+        similarities[row] = 1.0 - distances[0, top] / float(dim)
+    return indices, similarities
@@ -0,0 +1,80 @@
+# backend/tools/cache.py
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_CODE_BLOCK_PATTERN = re.compile(r"```.*?```", re.DOTALL)
+_QUOTED_PATTERN = re.compile(r'"[^"]*"|\'[^\']*\'')
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_message(message, template=True):
+    """
+    Normalize a message for cache lookups: lower-case and collapse whitespace.
+    With `template=True` code blocks and quoted names are replaced by placeholders,
+    so `create folder "a"` and `create folder "b"` share a key.
+    """
+    if template:
+        message = _CODE_BLOCK_PATTERN.sub("```<code>```", message)
+        message = _QUOTED_PATTERN.sub('"<name>"', message)
+    return _WHITESPACE_PATTERN.sub(" ", message).strip().lower()
+
+
+def message_key(message, template=True):
+    """SHA-256 of the normalized message."""
+    return hashlib.sha256(normalize_message(message, template).encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (self.ttl is None or entry[1] > time.monotonic()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,60 @@
+# backend/tools/code_bodies.py
+#
+# Deduplicated storage of executed code. A before_flush listener moves the text of new (or
+# edited) CodeExecutionLog rows into code_bodies, keyed by SHA-256, so a snippet that is run
+# many times is stored once and each log row only carries the 64-character hash.
+
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy import event, delete, exists
+from sqlalchemy.orm import Session
+from backend.config import Config
+from backend.models.db import db, dialect_insert
+from backend.models.models import CodeBody, CodeExecutionLog
+
+
+def code_hash(code):
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+
+def store_code_bodies(connection, bodies):
+    """
+    Insert `{hash: code}` into code_bodies. Hashes that are already stored only get their
+    `last_used_at` refreshed, which also locks the row on PostgreSQL until the log rows commit.
+    """
+    if bodies:
+        now = datetime.utcnow()
+        statement = dialect_insert(connection, CodeBody.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=['hash'], set_={'last_used_at': statement.excluded.last_used_at}
+        )
+        connection.execute(statement, [{'hash': digest, 'code': code, 'created_at': now, 'last_used_at': now}
+                                       for digest, code in bodies.items()])
+
+
+@event.listens_for(Session, 'before_flush')
+def _deduplicate_code(session, flush_context, instances):
+    logs = [obj for obj in list(session.new) + list(session.dirty)
+            if isinstance(obj, CodeExecutionLog) and obj.code_text is not None]
+    if not logs:
+        return
+    bodies = {}
+    for log in logs:
+        digest = code_hash(log.code_text)
+        bodies[digest] = log.code_text
+        log.code_hash, log.code_text = digest, None
+    store_code_bodies(session.connection(), bodies)
+
+
+def delete_orphaned_code_bodies(grace=None):
+    """
+    Delete code bodies that no log row references and none has used for `grace` seconds
+    (CODE_BODY_ORPHAN_GRACE by default); returns the number deleted. A writer re-using a body
+    refreshes its `last_used_at` in the same transaction as its log rows, so a body that looks
+    orphaned only because those rows are not committed yet is kept.
+    """
+    grace = Config.CODE_BODY_ORPHAN_GRACE if grace is None else grace
+    cutoff = datetime.utcnow() - timedelta(seconds=grace)
+    referenced = exists().where(CodeExecutionLog.code_hash == CodeBody.hash)
+    result = db.session.execute(delete(CodeBody).where(~referenced, CodeBody.last_used_at < cutoff))
+    return result.rowcount
@@ -1,64 +1,56 @@
 # backend/tools/code_execution.py
 
+import ast
 import subprocess
 import os
 import resource
 import re
 import json
+import logging
+import functools
+import hashlib
+import threading
+import select
+import signal
+import tempfile
+import time
+from collections import OrderedDict
+from backend.config import Config
+from backend.tools.sandbox_pool import SandboxPool, sandbox_environment
 from backend.tools.task_logging import log_task_result
 from backend.models.observer import process_with_wordllama
-from backend.models.observer import self_train_wordllama
-from backend.tools.pruning_utils import prune_wordllama_embeddings
+from backend.models.model_maintenance import model_maintenance
+from backend.tools.llm_streaming import stream_llm_response, relay_tokens
+from backend.tools.semantic_cache import semantic_cache, response_chunks
+from flask_socketio import emit
 
 # Generate LLM response based on provider and model
-def generate_llm_response(prompt, model, provider, config):
-    try:
-        temperature = config.get('temperature', Config.TEMPERATURE)
-        max_tokens = config.get('maxTokens', Config.MAX_TOKENS)
-        top_p = config.get('topP', Config.TOP_P)
-
-        if provider == 'openai':
-            stream = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens,
-                top_p=top_p,
-                stream=True
-            )
+def generate_llm_response(prompt, model, provider, config, send=None, user_id=None, acks=False):
+    """
+    Stream a response from the selected provider. Frames go to `send(frame_text, ack_callback)`,
+    by default emitted to the current Socket.IO client as `message` events; clients that
+    acknowledge those events (`acks`) get flow control.
+
+    With the semantic cache enabled, a previous answer to a similar prompt from the same client
+    (`user_id`, see `session_store.client_key`), provider, model and temperature is streamed
+    instead of calling the provider.
+    """
+    if send is None:
+        send = lambda frame, ack: emit('message', {'assistant': frame}, callback=ack)
+    if not Config.SEMANTIC_CACHE_ENABLED:
+        return stream_llm_response(prompt, model, provider, config, send, acks)
 
-            content = ""
-            for chunk in stream:
-                if hasattr(chunk, 'choices') and chunk.choices:
-                    delta_content = chunk.choices[0].delta.content
-                    if delta_content:
-                        content += delta_content
-                        emit('message', {'assistant': delta_content})
-            return {'code': content}
-
-        elif provider == 'google':
-            genai_model = genai.GenerativeModel(model)
-            response = genai_model.generate_content(prompt)
-
-            if hasattr(response, 'candidates') and response.candidates:
-                response_text = response.candidates[0].content.parts[0].text
-                return {'code': response_text}
-            else:
-                return {'error': 'No valid response from Google API'}
-
-        elif provider in ['local', 'gpt-2-local']:
-            inputs = gpt2_tokenizer(prompt, return_tensors='pt')
-            max_new_tokens = config.get('max_new_tokens', 100)
-            outputs = gpt2_model.generate(**inputs, max_new_tokens=max_new_tokens)
-            decoded_output = gpt2_tokenizer.decode(outputs[0], skip_special_tokens=True)
-            return {'code': decoded_output}
+    scope = (user_id, provider, model, float(config.get('temperature', Config.TEMPERATURE)))
+    hit, vector = semantic_cache.lookup(prompt, scope)
+    if hit is not None:
+        text, metrics = relay_tokens(iter(response_chunks(hit['response'])), send, 'semantic_cache', acks)
+        metrics['cache'] = {'similarity': hit['similarity'], 'exact': hit['exact']}
+        return {'code': text, 'metrics': metrics}
 
-    except Exception as e:
-        logging.error(f"Error generating response with provider {provider} and model {model}: {str(e)}")
-        return {'error': f"Error generating response with {provider} and {model}: {str(e)}"}
+    result = stream_llm_response(prompt, model, provider, config, send, acks)
+    if 'code' in result and result['code']:
+        semantic_cache.store(prompt, scope, result['code'], result['metrics']['duration_ms'] / 1000, vector)
+    return result
 
 # Resource Limitation Function
 def limit_resources():
@@ -139,11 +131,216 @@ def delete_file(file_name):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+# Content-addressed cache for deterministic executions
+# Builtins a cached Python snippet may call: pure functions of their arguments. Anything that
+# exposes memory addresses (id, object reprs), salted hashes (hash, set ordering), the
+# interpreter (globals, getattr, ...) or I/O is left out, as are imports and `_` attributes.
+DETERMINISTIC_BUILTINS = frozenset({
+    'abs', 'all', 'any', 'ascii', 'bin', 'bool', 'chr', 'dict', 'divmod', 'enumerate', 'filter',
+    'float', 'format', 'int', 'isinstance', 'len', 'list', 'map', 'max', 'min', 'oct', 'ord', 'pow',
+    'print', 'range', 'repr', 'reversed', 'round', 'sorted', 'str', 'sum', 'tuple', 'zip',
+    'True', 'False', 'None', 'ArithmeticError', 'Exception', 'IndexError', 'KeyError',
+    'StopIteration', 'TypeError', 'ValueError', 'ZeroDivisionError',
+})
+DISALLOWED_NODES = (ast.Import, ast.ImportFrom, ast.Set, ast.SetComp, ast.ClassDef, ast.Lambda,
+                    ast.AsyncFunctionDef, ast.Await, ast.AsyncFor, ast.AsyncWith, ast.Global, ast.Nonlocal)
+
+INTERPRETER_VERSION_COMMANDS = {
+    'python': lambda: [Config.SANDBOX_PYTHON, '--version'],
+    'bash': lambda: ['bash', '--version'],
+    'javascript': lambda: ['node', '--version'],
+}
+
+def _bound_names(tree):
+    """Names the snippet binds itself: assignment targets, loop variables, functions and arguments."""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, ast.FunctionDef):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+    return names
+
+def is_deterministic(code, language):
+    """
+    True when the code is Python that only uses constructs known to be deterministic: no
+    imports, no `_`-prefixed attributes or names, no sets or classes, and no names other than
+    its own variables and DETERMINISTIC_BUILTINS. Other languages are never considered
+    deterministic.
+    """
+    if language != 'python':
+        return False
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return False
+    bound = _bound_names(tree)
+    for node in ast.walk(tree):
+        if isinstance(node, DISALLOWED_NODES):
+            return False
+        if isinstance(node, ast.Attribute) and node.attr.startswith('_'):
+            return False
+        if isinstance(node, ast.Name):
+            if node.id.startswith('_'):
+                return False
+            if isinstance(node.ctx, ast.Load) and node.id not in bound and node.id not in DETERMINISTIC_BUILTINS:
+                return False
+    return True
+
+@functools.lru_cache(maxsize=None)
+def interpreter_version(language):
+    """First line of the interpreter's `--version` output (cached per process)."""
+    try:
+        result = subprocess.run(INTERPRETER_VERSION_COMMANDS[language](), capture_output=True, text=True, timeout=5)
+        return (result.stdout or result.stderr).strip().splitlines()[0]
+    except Exception:
+        return "unknown"
+
+def execution_cache_key(code, language, user_id=None):
+    """Key on (user, language, SHA-256 of the code, interpreter version, resource limits)."""
+    limits = [Config.SANDBOX_TIMEOUT, Config.SANDBOX_CPU_SECONDS, Config.SANDBOX_MEMORY_BYTES]
+    code_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+    material = json.dumps([str(user_id), language, code_hash, interpreter_version(language), limits])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class ExecutionResultCache:
+    """
+    Size-bounded on-disk store of execution results, one JSON file per key. An in-memory LRU
+    index of the entries and their sizes, built from the directory on first use (ordered by
+    mtime, which reads refresh), decides what to evict without rescanning the directory.
+    """
+
+    def __init__(self, directory, max_entries=1000, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_index(self):
+        """Build the LRU index from the files on disk; called with the lock held."""
+        if self._entries is not None:
+            return
+        found = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json'):
+                        stat = entry.stat()
+                        found.append((stat.st_mtime, entry.name[:-len('.json')], stat.st_size))
+        except FileNotFoundError:
+            pass
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total_bytes = sum(self._entries.values())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                result = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._load_index()
+                self._total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self._load_index()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return result
+
+    def put(self, key, result):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(result, file)
+            size = file.tell()
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._load_index()
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until both limits hold; called with the lock held."""
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            key, size = self._entries.popitem(last=False)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+execution_cache = ExecutionResultCache(
+    Config.EXEC_CACHE_DIR,
+    max_entries=Config.EXEC_CACHE_MAX_ENTRIES,
+    max_bytes=Config.EXEC_CACHE_MAX_BYTES
+)
+
+def with_execution_cache(code, language, run, use_cache=None, deterministic=None, user_id=None):
+    """
+    Run `run()` through the result cache. Only used when caching is enabled (per call or via
+    EXEC_CACHE_ENABLED), the caller declares the code deterministic (`deterministic=True`) and
+    `is_deterministic` agrees. Entries are keyed per user, so a wrong declaration only ever
+    affects the user who made it. Only successful results are stored.
+    """
+    if use_cache is None:
+        use_cache = Config.EXEC_CACHE_ENABLED
+    if not use_cache:
+        return run()
+    if deterministic is not True or not is_deterministic(code, language):
+        return {**run(), 'cache': {'hit': False, 'cacheable': False, **execution_cache.stats()}}
+
+    key = execution_cache_key(code, language, user_id)
+    cached = execution_cache.get(key)
+    if cached is not None:
+        return {**cached, 'cache': {'hit': True, 'cacheable': True, **execution_cache.stats()}}
+
+    result = run()
+    if result.get('status') == 'success':
+        try:
+            execution_cache.put(key, result)
+        except OSError as e:
+            logging.warning(f"Could not store execution result in cache: {e}")
+    return {**result, 'cache': {'hit': False, 'cacheable': True, **execution_cache.stats()}}
+
 # Unified Code Execution Function
-def execute_code(code, language='python'):
+def execute_code(code, language='python', use_cache=None, deterministic=None, user_id=None):
     """
-    Executes code in the specified language with resource limits.
+    Executes code in the specified language with resource limits. Results of deterministic
+    code can be served from the execution cache (see `with_execution_cache`).
     """
+    return with_execution_cache(
+        code, language, lambda: _execute_code(code, language), use_cache, deterministic, user_id
+    )
+
+def _execute_code(code, language):
     if language == 'python':
         return execute_python_code(code)
     elif language == 'bash':
@@ -155,44 +352,50 @@ def execute_code(code, language='python'):
 
 def execute_code_with_wordllama_support(code, message):
     """
-    Execute code with WordLlama and self-train or prune as necessary.
+    Execute code and queue the result for WordLlama self-training. Training (and any pruning it
+    triggers) runs in the model maintenance worker, so the caller never waits on it.
     """
     # Execute the code and log the result
     execution_result = execute_code(code, language='python')
 
-    # Perform self-training
     task_details = {"message": message, "execution_result": execution_result}
-    self_train_wordllama(execution_result, task_details)
-
-    # Perform pruning after every X tasks (set your pruning frequency)
-    if should_prune():
-        embeddings, tokenizer = load_wordllama_model()
-        importance_scores = get_importance_scores(embeddings)  # Implement this function
-        pruned_embeddings = prune_wordllama_embeddings(embeddings, importance_scores, Config.PRUNING_THRESHOLD)
-
-        # Save pruned model
-        save_pruned_wordllama(pruned_embeddings, tokenizer)
+    model_maintenance.schedule_training(task_details)
 
     return execution_result
 
+# Pre-started Python workers so short snippets don't pay interpreter startup
+sandbox_pool = SandboxPool(
+    size=Config.SANDBOX_POOL_SIZE,
+    max_runs=Config.SANDBOX_MAX_RUNS_PER_WORKER,
+    timeout=Config.SANDBOX_TIMEOUT,
+    cpu_limit=Config.SANDBOX_CPU_SECONDS,
+    memory_limit=Config.SANDBOX_MEMORY_BYTES,
+    python=Config.SANDBOX_PYTHON
+)
+
 # Language-Specific Code Execution Functions
 def execute_python_code(code):
     """
     Executes Python code with resource limits in place.
     """
+    if Config.SANDBOX_POOL_SIZE > 0:
+        return sandbox_pool.run(code)
+
+    # Pool disabled: one interpreter per run, with a private temp file so concurrent runs don't collide
     try:
-        # Write code to a temporary file
-        with open('temp_code.py', 'w') as file:
+        with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as file:
             file.write(code)
-
-        result = subprocess.run(
-            ['python3', 'temp_code.py'],
-            # preexec_fn=limit_resources,  # Comment out for testing
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        os.remove('temp_code.py')  # Clean up the file
+        try:
+            result = subprocess.run(
+                [Config.SANDBOX_PYTHON, file.name],
+                # preexec_fn=limit_resources,  # Comment out for testing
+                capture_output=True,
+                text=True,
+                env=sandbox_environment(),
+                timeout=Config.SANDBOX_TIMEOUT
+            )
+        finally:
+            os.remove(file.name)  # Clean up the file
         if result.returncode == 0:
             return {"status": "success", "output": result.stdout}
         else:
@@ -245,6 +448,88 @@ def execute_js_code(js_code):
     except Exception as e:
         return {"status": "error", "output": str(e)}
 
+# Streaming execution, used by background execution jobs
+def stream_process(args, on_output, timeout=10, cancel_event=None, shell=False, env=None):
+    """
+    Run a resource-limited subprocess, passing stdout/stderr chunks to `on_output(stream_name, text)`
+    as they arrive. Stops early on timeout or when `cancel_event` is set.
+    """
+    try:
+        process = subprocess.Popen(
+            args,
+            preexec_fn=limit_resources,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            shell=shell,
+            env=env,
+            start_new_session=True  # Own process group, so cancelling also stops any children
+        )
+    except Exception as e:
+        return {"status": "error", "output": str(e)}
+
+    streams = {process.stdout.fileno(): 'stdout', process.stderr.fileno(): 'stderr'}
+    captured = {'stdout': [], 'stderr': []}
+    deadline = time.monotonic() + timeout
+    outcome = None
+    while streams:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            outcome = {"status": "error", "output": "Execution timeout"}
+            break
+        if cancel_event is not None and cancel_event.is_set():
+            outcome = {"status": "cancelled", "output": "Execution cancelled"}
+            break
+        ready, _, _ = select.select(list(streams), [], [], min(remaining, 0.1))
+        for fd in ready:
+            data = os.read(fd, 4096)
+            if not data:
+                del streams[fd]
+                continue
+            text = data.decode('utf-8', errors='replace')
+            captured[streams[fd]].append(text)
+            on_output(streams[fd], text)
+
+    if outcome is not None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    returncode = process.wait()
+    process.stdout.close()
+    process.stderr.close()
+    if outcome is not None:
+        return outcome
+    if returncode == 0:
+        return {"status": "success", "output": ''.join(captured['stdout'])}
+    return {"status": "error", "output": ''.join(captured['stderr'])}
+
+def execute_code_streaming(code, language, on_output, cancel_event=None, use_cache=None, deterministic=None,
+                           user_id=None):
+    """
+    Like `execute_code`, but streams output through `on_output(stream_name, text)` and can be
+    cancelled through `cancel_event`. A cache hit is delivered as a single output chunk.
+    """
+    result = with_execution_cache(
+        code, language, lambda: _execute_code_streaming(code, language, on_output, cancel_event),
+        use_cache, deterministic, user_id
+    )
+    if result.get('cache', {}).get('hit') and result.get('output'):
+        on_output('stdout' if result['status'] == 'success' else 'stderr', result['output'])
+    return result
+
+def _execute_code_streaming(code, language, on_output, cancel_event):
+    if language == 'python':
+        if Config.SANDBOX_POOL_SIZE > 0:
+            return sandbox_pool.run(code, on_output=on_output, cancel_event=cancel_event)
+        return stream_process([Config.SANDBOX_PYTHON, '-u', '-c', code], on_output, Config.SANDBOX_TIMEOUT, cancel_event,
+                              env=sandbox_environment())
+    elif language == 'bash':
+        return stream_process(code, on_output, Config.SANDBOX_TIMEOUT, cancel_event, shell=True)
+    elif language == 'javascript':
+        return stream_process(['node', '-e', code], on_output, Config.SANDBOX_TIMEOUT, cancel_event)
+    else:
+        return {"status": "error", "output": "Unsupported language"}
+
 # Task Logging Function (Assuming you have a logging mechanism)
 def log_task_result(task_name, execution_result):
     """
@@ -0,0 +1,163 @@
+# backend/tools/execution_jobs.py
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from backend.config import Config
+from backend.tools.code_execution import execute_code_streaming
+
+ACTIVE_STATES = ('queued', 'running')
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+class ExecutionJob:
+    """A code execution submitted to the job manager, with its streamed output."""
+
+    def __init__(self, code, language, user_id, use_cache=None, deterministic=None):
+        self.id = uuid.uuid4().hex
+        self.code = code
+        self.language = language
+        self.user_id = user_id
+        self.use_cache = use_cache
+        self.deterministic = deterministic
+        self.status = 'queued'
+        self.chunks = []
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+
+    def snapshot(self, offset=0):
+        """Serializable view of the job, including output chunks from `offset` onwards."""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'language': self.language,
+            'chunks': self.chunks[offset:],
+            'next_offset': len(self.chunks),
+            'result': self.result,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class ExecutionJobManager:
+    """
+    Runs code executions on a bounded thread pool.
+
+    Each user (the client key of a session, see `session_store.client_key`) may have at most
+    `per_user_limit` queued or running jobs and the manager accepts at most `max_pending`
+    active jobs overall. Finished jobs are kept (up to `retain`) so clients can poll their
+    results; `get` and `cancel` take the requesting user as `owner` and ignore other users' jobs.
+    """
+
+    def __init__(self, max_workers=4, per_user_limit=2, max_pending=100, retain=500):
+        self.per_user_limit = per_user_limit
+        self.max_pending = max_pending
+        self.retain = retain
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='exec-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'submitted': 0, 'rejected': 0, 'success': 0, 'error': 0, 'cancelled': 0}
+
+    def submit(self, code, language='python', user_id='anonymous', on_output=None, on_complete=None,
+               use_cache=None, deterministic=None):
+        """
+        Queue a job and return it immediately. `on_output(job, stream_name, text)` is called for
+        each output chunk and `on_complete(job)` once the job has finished. `use_cache` and
+        `deterministic` are passed on to the execution result cache.
+        """
+        job = ExecutionJob(code, language, user_id, use_cache, deterministic)
+        with self._lock:
+            active = [j for j in self._jobs.values() if j.status in ACTIVE_STATES]
+            if len(active) >= self.max_pending:
+                self._counters['rejected'] += 1
+                raise JobLimitExceeded("Too many executions queued, please try again shortly.")
+            if sum(1 for j in active if j.user_id == user_id) >= self.per_user_limit:
+                self._counters['rejected'] += 1
+                raise JobLimitExceeded(f"At most {self.per_user_limit} executions may run at once.")
+            self._jobs[job.id] = job
+            self._counters['submitted'] += 1
+            self._trim()
+        self._executor.submit(self._run, job, on_output, on_complete)
+        return job
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATES]
+        for job_id in finished[:max(len(self._jobs) - self.retain, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, on_output, on_complete):
+        if job.cancel_event.is_set():
+            result = {"status": "cancelled", "output": "Execution cancelled"}
+        else:
+            job.status = 'running'
+            job.started_at = time.time()
+
+            def forward(stream, text):
+                job.chunks.append({'stream': stream, 'data': text})
+                if on_output is not None:
+                    on_output(job, stream, text)
+
+            try:
+                result = execute_code_streaming(
+                    job.code, job.language, forward, job.cancel_event, job.use_cache, job.deterministic,
+                    job.user_id
+                )
+            except Exception as e:
+                logging.error(f"Execution job {job.id} failed: {e}")
+                result = {"status": "error", "output": str(e)}
+
+        job.result = result
+        job.status = result.get('status', 'error')
+        job.finished_at = time.time()
+        with self._lock:
+            self._counters[job.status if job.status in self._counters else 'error'] += 1
+        job.done.set()
+        if on_complete is not None:
+            try:
+                on_complete(job)
+            except Exception as e:
+                logging.error(f"Completion callback for job {job.id} failed: {e}")
+
+    def get(self, job_id, owner=None):
+        """The job with `job_id`, or None if it is unknown or (given `owner`) someone else's."""
+        job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.user_id != owner):
+            return None
+        return job
+
+    def cancel(self, job_id, owner=None):
+        """Request cancellation; returns False if the job is unknown, someone else's or already finished."""
+        job = self.get(job_id, owner)
+        if job is None or job.status not in ACTIVE_STATES:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def metrics(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                **self._counters,
+                'queued': statuses.count('queued'),
+                'running': statuses.count('running'),
+                'retained': len(statuses),
+            }
+
+
+execution_jobs = ExecutionJobManager(
+    max_workers=Config.EXEC_JOB_WORKERS,
+    per_user_limit=Config.EXEC_JOB_PER_USER_LIMIT,
+    max_pending=Config.EXEC_JOB_MAX_PENDING,
+    retain=Config.EXEC_JOB_RETAIN
+)
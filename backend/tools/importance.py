@@ -0,0 +1,237 @@
+# backend/tools/importance.py
+#
+# Per-token signals behind WordLlama pruning decisions. Counts are kept in the tokenizer's id
+# space (so they stay valid after the embedding matrix is pruned and re-indexed) and persisted
+# next to the model as increments: every serving process only records what it saw since its
+# last flush and writes that as a new delta file under `<signals path>.deltas/`, so processes
+# and nodes never overwrite each other's counts. The model maintenance worker folds the deltas
+# into the `.npz` totals file (`TokenSignals.compact`); readers add pending deltas to it.
+
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from backend.config import Config
+
+SIGNALS = ('usage', 'hits', 'successes', 'failures')
+
+
+class TokenSignals:
+    """
+    Running counts per token id:
+      usage      - times the token was embedded (every prompt, query and memory entry)
+      hits       - times it occurred in an interaction returned by a memory search
+      successes  - times it occurred in the prompt of a successful task
+      failures   - times it occurred in the prompt of a failed task
+
+    With `load=True` the persisted totals and all pending delta files of `path` are read. A
+    recording instance (`load=False`) starts from zero and `flush()` writes its increments as a
+    delta file, also automatically every `flush_interval` seconds while recording.
+    """
+
+    def __init__(self, path=None, initial_size=1024, load=True, flush_interval=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counts = {name: np.zeros(initial_size, dtype=np.int64) for name in SIGNALS}
+        self._merged = []
+        self._already_merged = []
+        self._last_flush = time.monotonic()
+        self.enabled = True
+        self.dirty = False
+        if path and load:
+            if os.path.exists(path):
+                self.load(path)
+            self._merged += self._load_deltas()
+
+    def _grow(self, size):
+        current = len(self._counts['usage'])
+        if size <= current:
+            return
+        capacity = max(size, current * 2)
+        for name, counts in self._counts.items():
+            grown = np.zeros(capacity, dtype=np.int64)
+            grown[:current] = counts
+            self._counts[name] = grown
+
+    def _add(self, name, ids):
+        if not self.enabled:
+            return
+        ids = np.asarray(ids, dtype=np.int64).ravel()
+        ids = ids[ids >= 0]
+        if not len(ids):
+            return
+        increments = np.bincount(ids)
+        with self._lock:
+            self._grow(len(increments))
+            self._counts[name][:len(increments)] += increments
+            self.dirty = True
+        if self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def disable(self):
+        """Stop recording (processes whose embeddings are not user traffic, e.g. benchmarks)."""
+        self.enabled = False
+
+    def record_usage(self, ids):
+        self._add('usage', ids)
+
+    def record_hits(self, ids):
+        self._add('hits', ids)
+
+    def record_outcome(self, ids, success):
+        self._add('successes' if success else 'failures', ids)
+
+    def counts(self, size=None):
+        """Copy of all counts as `{signal: array}`, padded or truncated to `size` token ids."""
+        with self._lock:
+            size = size if size is not None else len(self._counts['usage'])
+            result = {}
+            for name, counts in self._counts.items():
+                padded = np.zeros(size, dtype=np.int64)
+                n = min(size, len(counts))
+                padded[:n] = counts[:n]
+                result[name] = padded
+            return result
+
+    @property
+    def total(self):
+        with self._lock:
+            return int(sum(int(counts.sum()) for counts in self._counts.values()))
+
+    def scores(self, size, usage_weight=1.0, hit_weight=1.0, success_weight=1.0):
+        """
+        Importance in [0, 1] for token ids `0..size-1`: a weighted mean of log-scaled usage,
+        log-scaled retrieval hits and a success score (smoothed success rate times log-scaled
+        task count), each normalised by its maximum. All zeros when nothing was recorded.
+        """
+        counts = self.counts(size)
+        outcomes = counts['successes'] + counts['failures']
+        components = [
+            (usage_weight, np.log1p(counts['usage'])),
+            (hit_weight, np.log1p(counts['hits'])),
+            (success_weight, (counts['successes'] + 1) / (outcomes + 2) * np.log1p(outcomes)),
+        ]
+        scores = np.zeros(size, dtype=np.float64)
+        total_weight = 0.0
+        for weight, component in components:
+            if weight <= 0:
+                continue
+            total_weight += weight
+            peak = component.max() if size else 0.0
+            if peak > 0:
+                scores += weight * (component / peak)
+        return scores / total_weight if total_weight else scores
+
+    @staticmethod
+    def _write(path, arrays):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temporary, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temporary, path)
+
+    @property
+    def delta_dir(self):
+        return f"{os.path.splitext(self.path)[0]}.deltas"
+
+    def delta_files(self):
+        try:
+            names = sorted(name for name in os.listdir(self.delta_dir) if name.endswith('.npz'))
+        except FileNotFoundError:
+            return []
+        return names
+
+    def flush(self):
+        """Write the counts recorded since the last flush as a new delta file and start again from zero."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self.dirty or not self.path:
+                return
+            counts = self._counts
+            self._counts = {name: np.zeros(len(values), dtype=np.int64) for name, values in counts.items()}
+            self.dirty = False
+        name = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}.npz"
+        try:
+            self._write(os.path.join(self.delta_dir, name), counts)
+        except OSError as e:
+            logging.error(f"Could not write token signals to {self.delta_dir}: {e}")
+
+    def save(self, path=None):
+        """Write all counts as the totals file, recording which delta files they already include."""
+        path = path or self.path
+        if not path:
+            return
+        self._write(path, {**self.counts(), 'merged': np.array(self._merged, dtype=str)})
+        self.dirty = False
+
+    def compact(self):
+        """
+        Fold the delta files read by this instance into the totals file and delete them. Only one
+        process (the model maintenance worker) may compact a signals path. A delta file that is
+        already listed in the totals file is skipped on load, so a crash between writing the
+        totals and deleting the deltas does not count them twice.
+        """
+        if not self.path or not self._merged:
+            return 0
+        self.save()
+        for name in self._merged:
+            try:
+                os.remove(os.path.join(self.delta_dir, name))
+            except FileNotFoundError:
+                pass
+        merged, self._merged = len(self._merged), []
+        return merged
+
+    def _add_counts(self, loaded):
+        size = max(len(counts) for counts in loaded.values()) if loaded else 0
+        with self._lock:
+            self._grow(size)
+            for name, counts in loaded.items():
+                self._counts[name][:len(counts)] += counts
+
+    @staticmethod
+    def _read(path):
+        with np.load(path) as data:
+            counts = {name: data[name].astype(np.int64) for name in SIGNALS if name in data}
+            merged = [str(name) for name in data['merged']] if 'merged' in data else []
+        return counts, merged
+
+    def load(self, path):
+        try:
+            counts, self._already_merged = self._read(path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not load token signals from {path}: {e}")
+            return
+        self._add_counts(counts)
+
+    def _load_deltas(self):
+        already_merged = set(self._already_merged)
+        loaded = []
+        for name in self.delta_files():
+            if name in already_merged:
+                loaded.append(name)  # Counted in the totals; deleted by the next compaction
+                continue
+            try:
+                counts, _ = self._read(os.path.join(self.delta_dir, name))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not load token signals delta {name}: {e}")
+                continue
+            self._add_counts(counts)
+            loaded.append(name)
+        return loaded
+
+    def reset(self):
+        with self._lock:
+            for counts in self._counts.values():
+                counts[:] = 0
+
+
+# This process's increments; the persisted totals are read with TokenSignals(path)
+token_signals = TokenSignals(
+    Config.PRUNING_SIGNALS_PATH, load=False, flush_interval=Config.PRUNING_SIGNALS_FLUSH_INTERVAL
+)
+atexit.register(token_signals.flush)
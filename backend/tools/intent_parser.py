@@ -2,8 +2,16 @@
 
 import logging
 import re
-from backend.models.observer import gpt2_restructure_prompt, process_with_wordllama
+import threading
+import time
+from flask import session
+from backend.config import Config
+from backend.models.observer import gpt2_restructure_prompt, gpt2_cache, wordllama_engine
+from backend.models.model_registry import registry
 from .file_operations import write_file, read_file
+from .memory import retrieve_memory
+from .intent_router import route_intent
+from .cache import TTLCache, message_key
 from .code_execution import (
     execute_code,
     create_folder,
@@ -20,12 +28,8 @@ def parse_intent_with_wordllama(message):
     """
     Use WordLlama to analyze the message and determine if an action is required.
     """
-    embeddings = process_with_wordllama(message)
-    # Use embeddings to refine intent identification logic
-    # For example, cluster or rank possible intents based on the embeddings
-    
-    # Placeholder: Just return "api_request" for now
-    return "api_request"
+    intent, _ = route_intent(message)
+    return intent or "api_request"
 
 # Update the handle_task function to use the new parser
 def handle_task_with_wordllama(intent, message):
@@ -36,7 +40,12 @@ def handle_task_with_wordllama(intent, message):
 
 def parse_intent_with_gpt2(message):
     """Use GPT-2 to analyze the message and determine if an action is required."""
-    restructured_message = gpt2_restructure_prompt(message)
+    return intent_from_restructured(gpt2_restructure_prompt(message))
+
+def intent_from_restructured(restructured_message):
+    """Intent named by GPT-2's restructured message ("api_request" if none, or if GPT-2 failed)."""
+    if not restructured_message:
+        return "api_request"
 
     if "create" in restructured_message.lower() and "folder" in restructured_message.lower():
         return "create_folder"
@@ -46,34 +55,131 @@ def parse_intent_with_gpt2(message):
 
     return "api_request"  # Default to API request if no action is identified
 
+# Fast-path rules, in priority order. They are compiled into one alternation so a message
+# is scanned once no matter how many intents we recognise.
+FAST_PATH_RULES = [
+    ("create_folder", r'create folder\s+"(?:.*?)"'),
+    ("delete_folder", r'delete folder\s+"(?:.*?)"'),
+    ("create_file", r'create file\s+"(?:.*?)"'),
+    ("delete_file", r'delete file\s+"(?:.*?)"'),
+    ("execute_python_code", r'execute python code'),
+    ("execute_bash_code", r'execute bash code'),
+    ("execute_js_code", r'execute javascript code'),
+    ("feedback", r'^\s*(?:yes|no)\s*[.!]?\s*$'),
+]
+FAST_PATH_PATTERN = re.compile(
+    "|".join(f"(?P<{intent}>{pattern})" for intent, pattern in FAST_PATH_RULES),
+    re.IGNORECASE
+)
+_FAST_PATH_PRIORITY = {intent: rank for rank, (intent, _) in enumerate(FAST_PATH_RULES)}
+
+# Intents with side effects are only dispatched on their explicit fast-path command. When a model
+# tier (WordLlama router, GPT-2) suggests one, classify_intent returns CONFIRM_PREFIX + intent and
+# the user is shown the command that performs it instead
+TASK_COMMANDS = {
+    "create_folder": 'create folder "<name>"',
+    "delete_folder": 'delete folder "<name>"',
+    "create_file": 'create file "<name>"',
+    "delete_file": 'delete file "<name>"',
+    "execute_python_code": "execute python code ```<code>```",
+    "execute_bash_code": "execute bash code ```<code>```",
+    "execute_js_code": "execute javascript code ```<code>```",
+}
+CONFIRM_PREFIX = "confirm:"
+
+# Per-tier hit counters for classify_intent
+INTENT_TIERS = ("fast_path", "cache", "wordllama", "gpt2")
+_tier_stats = {tier: {"hits": 0, "time_s": 0.0} for tier in INTENT_TIERS}
+_tier_stats_lock = threading.Lock()
+
+# Model-tier results keyed on the templated message, so repeated commands with different
+# names or code bodies reuse one classification
+intent_cache = TTLCache(maxsize=Config.INTENT_CACHE_SIZE, ttl=Config.INTENT_CACHE_TTL)
+
+def invalidate_intent_caches(*_):
+    """Drop cached intents and GPT-2 outputs (called when model files change)."""
+    intent_cache.clear()
+    gpt2_cache.clear()
+
+registry.add_listener(invalidate_intent_caches)
+wordllama_engine.add_listener(invalidate_intent_caches)
+
+def match_fast_path(message):
+    """Return the distinct intents matched by the fast-path rules, in priority order."""
+    matched = {match.lastgroup for match in FAST_PATH_PATTERN.finditer(message)}
+    return sorted(matched, key=_FAST_PATH_PRIORITY.get)
+
 def parse_intent(message):
     """Parse the message to check if it should trigger tool usage."""
     logging.debug(f"Parsing intent for message: {message.lower()}")
+    matched = [intent for intent in match_fast_path(message) if intent != "feedback"]
 
-    # Check for file management commands with more dynamic handling
-    if re.search(r'create folder\s+"(.*?)"', message.lower()):
-        return "create_folder"
-    if re.search(r'delete folder\s+"(.*?)"', message.lower()):
-        return "delete_folder"
-    if re.search(r'create file\s+"(.*?)"', message.lower()):
-        return "create_file"
-    if re.search(r'delete file\s+"(.*?)"', message.lower()):
-        return "delete_file"
+    # Fallback to default API request for unrecognized commands
+    return matched[0] if matched else "api_request"
 
-    # Check for code execution commands, including specifying language
-    if "execute python code" in message.lower():
-        return "execute_python_code"
-    if "execute bash code" in message.lower():
-        return "execute_bash_code"
-    if "execute javascript code" in message.lower():
-        return "execute_js_code"
+def confirmation_prompt(intent):
+    """Message asking the user to confirm a suggested task (`CONFIRM_PREFIX + task`) with its command."""
+    task = intent[len(CONFIRM_PREFIX):]
+    return f"It looks like you want to {task.replace('_', ' ')}. To do that, send: {TASK_COMMANDS[task]}"
 
-    # Fallback to default API request for unrecognized commands
-    return "api_request"
+def _require_confirmation(intent):
+    return CONFIRM_PREFIX + intent if intent in TASK_COMMANDS else intent
+
+def _record_tier(tier, started):
+    with _tier_stats_lock:
+        _tier_stats[tier]["hits"] += 1
+        _tier_stats[tier]["time_s"] += time.perf_counter() - started
+
+def classify_intent(message):
+    """
+    Tiered intent classification. Messages that match exactly one fast-path rule are
+    answered without touching a model; the rest go to the WordLlama nearest-neighbour
+    router, and only messages it is not confident about fall through to GPT-2. Tasks suggested
+    by a model tier come back as `CONFIRM_PREFIX + intent` and are never dispatched.
+    """
+    started = time.perf_counter()
+    matched = match_fast_path(message)
+    if len(matched) == 1:
+        _record_tier("fast_path", started)
+        return matched[0]
+
+    key = message_key(message)
+    cached = intent_cache.get(key)
+    if cached is not None:
+        _record_tier("cache", started)
+        return _require_confirmation(cached)
+
+    intent, _ = route_intent(message)
+    if intent:
+        _record_tier("wordllama", started)
+    else:
+        restructured = gpt2_restructure_prompt(message)
+        intent = intent_from_restructured(restructured)
+        _record_tier("gpt2", started)
+        if not restructured:
+            # GPT-2 failed (error or timeout): use the default this time, but don't cache it
+            return _require_confirmation(intent)
+    intent_cache.set(key, intent)
+    return _require_confirmation(intent)
+
+def get_intent_tier_stats():
+    """Return hit counts, hit rates and average latency for each classification tier."""
+    with _tier_stats_lock:
+        stats = {tier: dict(values) for tier, values in _tier_stats.items()}
+    total = sum(values["hits"] for values in stats.values())
+    for values in stats.values():
+        values["hit_rate"] = round(values["hits"] / total, 4) if total else 0.0
+        values["avg_latency_ms"] = round(1000 * values["time_s"] / values["hits"], 3) if values["hits"] else 0.0
+    return {"total": total, "tiers": stats, "intent_cache": intent_cache.stats(), "gpt2_cache": gpt2_cache.stats()}
 
 def handle_task(intent, message):
-    past_interactions = retrieve_memory(session.get('user_id'), session_id=session.get('session_id'), task_type=intent)
-    if past_interactions and past_interactions[-1].task_outcome == "failure":
+    # Never act on a default name or on the whole message as code
+    argument = r"```(.*?)```" if intent.startswith("execute_") else r'\"(.*?)\"'
+    if intent in TASK_COMMANDS and not re.search(argument, message, re.DOTALL):
+        return f"Please send the command as: {TASK_COMMANDS[intent]}"
+
+    past_interactions = retrieve_memory(session.get('user_id'), session_id=session.get('session_id'), task_type=intent, limit=1)
+    if past_interactions and past_interactions[0]['task_outcome'] == "failure":
         return "Previous task failed, adjusting approach."
     # Execute original task logic
     """Handle task based on GPT-2 inferred intent."""
@@ -0,0 +1,188 @@
+# backend/tools/intent_router.py
+
+import logging
+import threading
+import numpy as np
+from backend.config import Config
+from backend.models.observer import wordllama_engine
+from backend.tools import binary_similarity
+
+# Example phrasings per intent. Their embeddings form the matrix incoming messages are matched against.
+INTENT_EXEMPLARS = {
+    "create_folder": [
+        "create a folder named reports",
+        "make a new directory for my project",
+        "please add a folder called archive",
+        "mkdir a directory for the photos",
+    ],
+    "delete_folder": [
+        "delete the folder named reports",
+        "remove the directory called old_stuff",
+        "get rid of the empty folder temp",
+        "rmdir the build directory",
+    ],
+    "create_file": [
+        "create a file called notes.txt",
+        "make a new empty file named todo.md",
+        "touch a file called config.yaml",
+        "add a new file for the readme",
+    ],
+    "delete_file": [
+        "delete the file notes.txt",
+        "remove the file called draft.docx",
+        "erase the log file",
+        "rm the temporary file",
+    ],
+    "execute_python_code": [
+        "run this python script",
+        "execute the following python snippet",
+        "can you run my python code",
+        "evaluate this python function",
+    ],
+    "execute_bash_code": [
+        "run this shell command",
+        "execute the bash script below",
+        "run ls -la in the terminal",
+        "execute this command line",
+    ],
+    "execute_js_code": [
+        "run this javascript code",
+        "execute the following node script",
+        "evaluate this js snippet",
+        "run my javascript function in node",
+    ],
+    "retrieve_memory": [
+        "what did we talk about before",
+        "show me my previous conversations",
+        "recall what I asked you yesterday",
+        "show my chat history",
+    ],
+    "api_request": [
+        "explain how neural networks learn",
+        "write a short poem about the sea",
+        "what is the capital of france",
+        "summarize this article for me",
+        "help me plan a trip to japan",
+        "tell me a joke",
+    ],
+}
+
+# Default minimum neighbour similarity per metric. Hamming similarity of unrelated sign vectors
+# is about 0.5 (half the bits agree), so it needs a much higher bar than cosine
+DEFAULT_MIN_SIMILARITY = {"cosine": 0.5, "hamming": 0.8}
+
+class IntentRouter:
+    """
+    Nearest-neighbour intent router over WordLlama embeddings.
+
+    The exemplar matrix is built once per embedding-model version. Incoming messages
+    are scored against every exemplar in one vectorized operation (cosine on float
+    embeddings, XOR+popcount Hamming over uint64-packed sign bits on binary ones; see
+    binary_similarity.py) and the top-k neighbours vote. `route_many` routes a batch of
+    messages with one embedding call and one scoring pass. Without an explicit `min_similarity`
+    the threshold of the resolved metric in DEFAULT_MIN_SIMILARITY applies.
+    """
+
+    def __init__(self, engine, exemplars=None, top_k=5, min_similarity=None, min_vote_share=0.6, metric="auto"):
+        self.engine = engine
+        self.exemplars = exemplars or INTENT_EXEMPLARS
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.min_vote_share = min_vote_share
+        self.metric = metric
+        self._lock = threading.Lock()
+        self._built_version = None
+        self._labels = None
+        self._matrix = None
+        self._dim = None
+
+    def _resolve_metric(self):
+        if self.metric != "auto":
+            return self.metric
+        return "hamming" if self.engine.config.get("binary") else "cosine"
+
+    def _min_similarity(self):
+        if self.min_similarity is not None:
+            return self.min_similarity
+        return DEFAULT_MIN_SIMILARITY[self._resolve_metric()]
+
+    def _ensure_built(self):
+        self.engine.embeddings  # Picks up a hot-reloaded model before comparing versions
+        if self._built_version == self.engine.version and self._matrix is not None:
+            return
+        with self._lock:
+            if self._built_version == self.engine.version and self._matrix is not None:
+                return
+            texts, labels = [], []
+            for intent, phrases in self.exemplars.items():
+                texts.extend(phrases)
+                labels.extend([intent] * len(phrases))
+            matrix = self.engine.embed(texts)
+            self._dim = matrix.shape[1]
+            self._labels = np.array(labels)
+            self._matrix = self._encode(matrix)
+            self._built_version = self.engine.version
+            logging.info(f"Built intent router matrix with {len(labels)} exemplars ({self._resolve_metric()})")
+
+    def _encode(self, vectors):
+        if self._resolve_metric() == "hamming":
+            return binary_similarity.pack_bits(vectors)
+        return vectors
+
+    def similarities(self, message):
+        """Return the similarity of `message` to every exemplar, in [0, 1] for Hamming, [-1, 1] for cosine."""
+        return self.similarities_many([message])[0]
+
+    def similarities_many(self, messages):
+        """`(messages, exemplars)` similarity matrix for a batch of messages."""
+        self._ensure_built()
+        queries = self._encode(self.engine.embed(list(messages)))
+        if self._resolve_metric() == "hamming":
+            return binary_similarity.hamming_similarities(self._matrix, queries, self._dim)
+        return queries @ self._matrix.T
+
+    def route(self, message):
+        """
+        Return `(intent, confidence)` for the message. `intent` is None when the vote
+        is not confident enough.
+        """
+        return self._vote(self.similarities(message))
+
+    def route_many(self, messages):
+        """`[(intent, confidence), ...]` for a batch of messages (see `route`)."""
+        return [self._vote(similarities) for similarities in self.similarities_many(messages)]
+
+    def _vote(self, similarities):
+        k = min(self.top_k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[similarities[top] >= self._min_similarity()]
+        if not len(top):
+            return None, 0.0
+
+        weights = {}
+        for index in top:
+            label = self._labels[index]
+            weights[label] = weights.get(label, 0.0) + float(similarities[index])
+        intent, weight = max(weights.items(), key=lambda item: item[1])
+        confidence = weight / sum(weights.values())
+        if confidence < self.min_vote_share:
+            return None, confidence
+        return str(intent), confidence
+
+
+intent_router = IntentRouter(
+    wordllama_engine,
+    top_k=Config.INTENT_ROUTER_TOP_K,
+    min_similarity=Config.INTENT_ROUTER_MIN_SIMILARITY,
+    min_vote_share=Config.INTENT_ROUTER_MIN_VOTE_SHARE,
+    metric=Config.INTENT_ROUTER_METRIC
+)
+
+
+def route_intent(message):
+    """Route a message with the shared router; returns `(None, 0.0)` if WordLlama is unavailable."""
+    try:
+        return intent_router.route(message)
+    except Exception as e:
+        logging.error(f"Error routing intent with WordLlama: {e}")
+        return None, 0.0
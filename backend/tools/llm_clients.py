@@ -0,0 +1,317 @@
+# backend/tools/llm_clients.py
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from backend.config import Config
+
+# HTTP statuses worth retrying: timeouts, rate limiting and transient server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+# Transient error types raised by the provider SDKs (matched by name so neither SDK is imported here)
+RETRYABLE_ERROR_NAMES = {
+    'APIConnectionError', 'APITimeoutError', 'RateLimitError', 'InternalServerError',
+    'ServiceUnavailable', 'DeadlineExceeded', 'TooManyRequests', 'ResourceExhausted',
+    'ConnectError', 'ReadTimeout', 'ConnectTimeout', 'RemoteProtocolError',
+}
+
+
+class ProviderUnavailable(Exception):
+    """Raised without contacting the provider: its circuit is open or no request slot freed up."""
+    pass
+
+
+def is_retryable(error):
+    """True for connection failures, timeouts, rate limiting and 5xx responses."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'code', None)
+    if isinstance(status, int) and status in RETRYABLE_STATUSES:
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and rejects requests for
+    `reset_timeout` seconds; then a single trial request is let through, closing the circuit
+    on success and re-opening it on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self.opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self.opened += 1
+            self._trial_running = False
+
+
+_END = object()
+
+
+class ProviderClient:
+    """
+    One long-lived SDK client per provider, shared by all requests.
+
+    The client (and its keep-alive connection pool) is built on first use by `factory`. At most
+    `max_concurrency` requests run at once; others wait up to `queue_timeout` seconds for a slot.
+    Transient failures are retried up to `max_retries` times with full-jitter exponential backoff,
+    but only before the first token, since tokens already sent to the client cannot be taken back.
+    """
+
+    def __init__(self, name, factory, max_concurrency=16, queue_timeout=30.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, breaker=None):
+        self.name = name
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._in_flight = 0
+        self._latencies = deque(maxlen=1000)
+        self._counters = {'requests': 0, 'success': 0, 'failures': 0, 'retries': 0, 'rejected': 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count('rejected')
+            raise ProviderUnavailable(f"{self.name}: too many concurrent requests")
+        with self._lock:
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _attempts(self, start):
+        """Call `start(client)` until it succeeds, retrying transient failures, and return its result."""
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count('rejected')
+                raise ProviderUnavailable(f"{self.name}: circuit open after repeated failures")
+            try:
+                return start(self.client)
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The provider answered, so it is healthy even though the request was rejected
+                    self.breaker.record_success()
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._count('retries')
+                logging.warning(f"{self.name} request failed ({e}); retry {attempt}/{self.max_retries}")
+                time.sleep(self._backoff(attempt))
+
+    def call(self, fn):
+        """Run `fn(client)` with the concurrency limit, retries and circuit breaker; returns its result."""
+        self._acquire()
+        self._count('requests')
+        started = time.perf_counter()
+        try:
+            result = self._attempts(fn)
+        except Exception:
+            self._count('failures')
+            raise
+        finally:
+            self._release()
+        self.breaker.record_success()
+        self._count('success')
+        self._latencies.append(time.perf_counter() - started)
+        return result
+
+    def stream(self, start):
+        """
+        Yield from the iterator returned by `start(client)`. Opening the stream and reading its
+        first item are retried; the request slot is held until the stream is exhausted or closed.
+        """
+        self._acquire()
+        self._count('requests')
+        started = time.perf_counter()
+        try:
+            def first_item(client):
+                iterator = iter(start(client))
+                return iterator, next(iterator, _END)
+
+            try:
+                iterator, first = self._attempts(first_item)
+            except Exception:
+                self._count('failures')
+                raise
+
+            if first is not _END:
+                yield first
+            try:
+                yield from iterator
+            except Exception as e:
+                self._count('failures')
+                if is_retryable(e):
+                    self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            self._count('success')
+            self._latencies.append(time.perf_counter() - started)
+        finally:
+            self._release()
+
+    def metrics(self):
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return round(1000 * latencies[min(int(fraction * len(latencies)), len(latencies) - 1)], 2)
+
+        with self._lock:
+            return {
+                **self._counters,
+                'in_flight': self._in_flight,
+                'max_concurrency': self.max_concurrency,
+                'circuit': self.breaker.state,
+                'circuit_opened': self.breaker.opened,
+                'latency_p50_ms': percentile(0.5),
+                'latency_p99_ms': percentile(0.99),
+            }
+
+
+def _openai_factory():
+    import httpx
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=Config.OPENAI_API_KEY,
+        base_url=Config.OPENAI_BASE_URL,
+        # Retries are handled by ProviderClient so they can respect the first-token rule
+        max_retries=0,
+        timeout=httpx.Timeout(Config.LLM_READ_TIMEOUT, connect=Config.LLM_CONNECT_TIMEOUT),
+        http_client=httpx.Client(limits=httpx.Limits(
+            max_connections=Config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.LLM_MAX_CONNECTIONS
+        ))
+    )
+
+
+class GoogleModels:
+    """Configures the Gemini SDK once and caches one GenerativeModel per model name."""
+
+    def __init__(self):
+        import google.generativeai as genai
+
+        options = {'api_key': Config.GOOGLE_API_KEY}
+        if Config.GOOGLE_API_ENDPOINT:
+            options.update(transport='rest', client_options={'api_endpoint': Config.GOOGLE_API_ENDPOINT})
+        genai.configure(**options)
+        self._genai = genai
+        self._models = {}
+        self._lock = threading.Lock()
+        self.request_options = {'timeout': Config.LLM_READ_TIMEOUT}
+
+    def get(self, model):
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = self._genai.GenerativeModel(model)
+            return self._models[model]
+
+
+def _client_settings():
+    return {
+        'max_concurrency': Config.LLM_MAX_CONCURRENCY,
+        'queue_timeout': Config.LLM_QUEUE_TIMEOUT,
+        'max_retries': Config.LLM_MAX_RETRIES,
+        'backoff_base': Config.LLM_RETRY_BACKOFF_BASE,
+        'backoff_max': Config.LLM_RETRY_BACKOFF_MAX,
+    }
+
+
+_PROVIDER_FACTORIES = {
+    'openai': _openai_factory,
+    'google': GoogleModels,
+}
+_provider_clients = {}
+_provider_lock = threading.Lock()
+
+
+def get_provider_client(provider):
+    """Return the shared ProviderClient for 'openai' or 'google', creating it on first use."""
+    with _provider_lock:
+        if provider not in _provider_clients:
+            _provider_clients[provider] = ProviderClient(
+                provider,
+                _PROVIDER_FACTORIES[provider],
+                breaker=CircuitBreaker(Config.LLM_BREAKER_FAILURE_THRESHOLD, Config.LLM_BREAKER_RESET_TIMEOUT),
+                **_client_settings()
+            )
+        return _provider_clients[provider]
+
+
+def reset_provider_clients():
+    """Drop the shared clients so the next request rebuilds them from the current Config."""
+    with _provider_lock:
+        _provider_clients.clear()
+
+
+def provider_client_metrics():
+    with _provider_lock:
+        clients = dict(_provider_clients)
+    return {name: client.metrics() for name, client in clients.items()}
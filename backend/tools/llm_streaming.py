@@ -0,0 +1,304 @@
+# backend/tools/llm_streaming.py
+
+import json
+import logging
+import queue
+import threading
+import time
+from backend.config import Config
+from backend.models.model_registry import get_gpt2
+from backend.tools import offload
+from backend.tools.llm_clients import get_provider_client
+
+
+class ProviderError(Exception):
+    pass
+
+
+# Provider token generators: each yields text fragments as the provider produces them.
+# OpenAI and Google requests go through the pooled, retrying clients in llm_clients.
+
+def openai_tokens(prompt, model, temperature, max_tokens, top_p):
+    def start(client):
+        raw = client.chat.completions.with_raw_response.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": Config.SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            stream=True
+        )
+        # The SDK's Stream closes the response at [DONE] before the body is fully read, which
+        # discards the keep-alive connection; reading the events to the end keeps it pooled
+        response = raw.http_response
+        try:
+            for line in response.iter_lines():
+                if not line.startswith('data:') or line == 'data: [DONE]':
+                    continue
+                data = json.loads(line[len('data:'):])
+                if data.get('error'):
+                    raise ProviderError(data['error'].get('message', 'OpenAI stream error'))
+                if data.get('choices'):
+                    delta_content = data['choices'][0].get('delta', {}).get('content')
+                    if delta_content:
+                        yield delta_content
+        finally:
+            response.close()
+
+    return get_provider_client('openai').stream(start)
+
+
+def google_tokens(prompt, model, temperature, max_tokens, top_p):
+    def start(models):
+        response = models.get(model).generate_content(
+            prompt,
+            generation_config={'temperature': temperature, 'max_output_tokens': max_tokens, 'top_p': top_p},
+            request_options=models.request_options,
+            stream=True
+        )
+        produced = False
+        for chunk in response:
+            if getattr(chunk, 'candidates', None) and chunk.candidates[0].content.parts:
+                produced = True
+                yield chunk.candidates[0].content.parts[0].text
+        if not produced:
+            raise ProviderError('No valid response from Google API')
+
+    return get_provider_client('google').stream(start)
+
+
+def _gpt2_generate_text(gpt2_tokenizer, gpt2_model, prompt, max_new_tokens):
+    inputs = gpt2_tokenizer(prompt, return_tensors='pt')
+    outputs = gpt2_model.generate(**inputs, max_new_tokens=max_new_tokens, pad_token_id=gpt2_tokenizer.eos_token_id)
+    return gpt2_tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+
+def gpt2_tokens(prompt, max_new_tokens):
+    if offload.is_green():
+        # A green thread can't wait on a native generate thread without blocking the hub,
+        # so generate on the native pool and deliver the text in one piece
+        gpt2_tokenizer, gpt2_model = get_gpt2()
+        yield offload.run_blocking(_gpt2_generate_text, gpt2_tokenizer, gpt2_model, prompt, max_new_tokens)
+        return
+
+    from transformers import TextIteratorStreamer
+
+    gpt2_tokenizer, gpt2_model = get_gpt2()
+    inputs = gpt2_tokenizer(prompt, return_tensors='pt')
+    streamer = TextIteratorStreamer(gpt2_tokenizer, skip_special_tokens=True, timeout=Config.STREAM_TOKEN_TIMEOUT)
+    errors = []
+
+    def generate():
+        try:
+            gpt2_model.generate(**inputs, max_new_tokens=max_new_tokens, streamer=streamer,
+                                pad_token_id=gpt2_tokenizer.eos_token_id)
+        except Exception as e:
+            errors.append(e)
+            streamer.end()  # Wake the consumer instead of leaving it waiting for tokens
+
+    worker = threading.Thread(target=generate, daemon=True)
+    worker.start()
+    try:
+        yield from streamer
+    except queue.Empty:
+        raise ProviderError(f"GPT-2 produced no output for {Config.STREAM_TOKEN_TIMEOUT:g} seconds")
+    worker.join()
+    if errors:
+        raise ProviderError(f"GPT-2 generation failed: {errors[0]}") from errors[0]
+
+
+def provider_tokens(prompt, model, provider, config):
+    """Return the token generator for a provider, using the request config or the defaults."""
+    temperature = config.get('temperature', Config.TEMPERATURE)
+    max_tokens = config.get('maxTokens', Config.MAX_TOKENS)
+    top_p = config.get('topP', Config.TOP_P)
+
+    if provider == 'openai':
+        return openai_tokens(prompt, model, temperature, max_tokens, top_p)
+    if provider == 'google':
+        return google_tokens(prompt, model, temperature, max_tokens, top_p)
+    if provider in ['local', 'gpt-2-local']:
+        return gpt2_tokens(prompt, config.get('max_new_tokens', 100))
+    raise ProviderError(f"Unsupported provider '{provider}'")
+
+
+class TokenRelay:
+    """
+    Coalesces tokens into frames and sends them with flow control.
+
+    A frame is sent once `max_frame_chars` characters are pending or `max_frame_interval`
+    seconds passed since the last frame. At most `max_in_flight` frames may be waiting for
+    the client's acknowledgement; while the window is full tokens keep coalescing into the
+    pending frame, and once `max_buffer_chars` are pending the producer blocks, which stops
+    reading from the provider stream. A missing acknowledgement is given up on after
+    `ack_timeout` seconds. With `max_in_flight=None` (clients that don't acknowledge frames)
+    there is no flow control and frames are sent as soon as they are due.
+    """
+
+    def __init__(self, send, max_frame_chars=64, max_frame_interval=0.05, max_in_flight=4,
+                 max_buffer_chars=16384, ack_timeout=2.0):
+        self._send = send
+        self.max_frame_chars = max_frame_chars
+        self.max_frame_interval = max_frame_interval
+        self.max_in_flight = max_in_flight
+        self.max_buffer_chars = max_buffer_chars
+        self.ack_timeout = ack_timeout
+        self._parts = []
+        self._pending = []
+        self._pending_chars = 0
+        self._in_flight = {}
+        self._condition = threading.Condition()
+        self._last_frame = time.monotonic()
+        self._frame_id = 0
+        self.frames_sent = 0
+        self.backpressure_waits = 0
+
+    def _ack(self, frame_id):
+        with self._condition:
+            self._in_flight.pop(frame_id, None)
+            self._condition.notify_all()
+
+    def _expire_acks(self):
+        """Forget frames whose acknowledgement is overdue (caller holds the condition)."""
+        cutoff = time.monotonic() - self.ack_timeout
+        for frame_id, sent_at in list(self._in_flight.items()):
+            if sent_at < cutoff:
+                del self._in_flight[frame_id]
+
+    def _window_open(self):
+        if self.max_in_flight is None:
+            return True
+        self._expire_acks()
+        return len(self._in_flight) < self.max_in_flight
+
+    def push(self, token):
+        self._parts.append(token)
+        self._pending.append(token)
+        self._pending_chars += len(token)
+        due = (self._pending_chars >= self.max_frame_chars
+               or time.monotonic() - self._last_frame >= self.max_frame_interval)
+        if due:
+            self._flush(block=self._pending_chars >= self.max_buffer_chars)
+
+    def _flush(self, block):
+        if not self._pending:
+            return
+        with self._condition:
+            if not self._window_open():
+                if not block:
+                    return
+                self.backpressure_waits += 1
+                while not self._window_open():
+                    self._condition.wait(timeout=self.ack_timeout / 4)
+
+            self._frame_id += 1
+            frame_id = self._frame_id
+            if self.max_in_flight is not None:
+                self._in_flight[frame_id] = time.monotonic()
+
+        frame = ''.join(self._pending)
+        self._pending, self._pending_chars = [], 0
+        self._last_frame = time.monotonic()
+        self.frames_sent += 1
+        self._send(frame, (lambda *_: self._ack(frame_id)) if self.max_in_flight is not None else None)
+
+    def close(self):
+        """Send whatever is still pending and return the full text."""
+        self._flush(block=True)
+        return ''.join(self._parts)
+
+
+class StreamingMetrics:
+    """Per-provider time-to-first-token and throughput."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers = {}
+
+    def record(self, provider, ttft, duration, tokens, failed=False):
+        with self._lock:
+            stats = self._providers.setdefault(provider, {
+                'requests': 0, 'failures': 0, 'tokens': 0, 'ttft_total_s': 0.0, 'duration_total_s': 0.0
+            })
+            stats['requests'] += 1
+            stats['failures'] += int(failed)
+            stats['tokens'] += tokens
+            stats['ttft_total_s'] += ttft or 0.0
+            stats['duration_total_s'] += duration
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for provider, stats in self._providers.items():
+                requests = stats['requests']
+                result[provider] = {
+                    'requests': requests,
+                    'failures': stats['failures'],
+                    'tokens': stats['tokens'],
+                    'avg_ttft_ms': round(1000 * stats['ttft_total_s'] / requests, 1) if requests else 0.0,
+                    'tokens_per_second': (
+                        round(stats['tokens'] / stats['duration_total_s'], 1) if stats['duration_total_s'] else 0.0
+                    ),
+                }
+            return result
+
+
+streaming_metrics = StreamingMetrics()
+
+
+def relay_tokens(tokens, send, provider, acks=False):
+    """
+    Pump a token iterator through a TokenRelay and return `(text, metrics)`. Flow control is
+    only applied when the client declared that it acknowledges frames (`acks`).
+    Exceptions from the iterator propagate after the metrics are recorded.
+    """
+    relay = TokenRelay(
+        send,
+        max_frame_chars=Config.STREAM_FRAME_CHARS,
+        max_frame_interval=Config.STREAM_FRAME_INTERVAL,
+        max_in_flight=Config.STREAM_MAX_IN_FLIGHT if acks else None,
+        max_buffer_chars=Config.STREAM_MAX_BUFFER_CHARS,
+        ack_timeout=Config.STREAM_ACK_TIMEOUT
+    )
+    started = time.perf_counter()
+    ttft = None
+    token_count = 0
+    try:
+        for token in tokens:
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            token_count += 1
+            relay.push(token)
+        text = relay.close()
+    except Exception:
+        streaming_metrics.record(provider, ttft, time.perf_counter() - started, token_count, failed=True)
+        raise
+
+    duration = time.perf_counter() - started
+    streaming_metrics.record(provider, ttft, duration, token_count)
+    metrics = {
+        'ttft_ms': round(1000 * ttft, 1) if ttft is not None else None,
+        'tokens': token_count,
+        'frames': relay.frames_sent,
+        'tokens_per_second': round(token_count / duration, 1) if duration else 0.0,
+        'duration_ms': round(1000 * duration, 1),
+        'backpressure_waits': relay.backpressure_waits,
+    }
+    return text, metrics
+
+
+def stream_llm_response(prompt, model, provider, config, send, acks=False):
+    """
+    Stream a completion from any provider to `send(frame_text, ack_callback)` and return
+    `{'code': full_text, 'metrics': {...}}` or `{'error': ...}`. `ack_callback` is None unless
+    the client acknowledges frames (`acks`).
+    """
+    try:
+        text, metrics = relay_tokens(provider_tokens(prompt, model, provider, config), send, provider, acks)
+        return {'code': text, 'metrics': metrics}
+    except Exception as e:
+        logging.error(f"Error generating response with provider {provider} and model {model}: {str(e)}")
+        return {'error': f"Error generating response with {provider} and {model}: {str(e)}"}
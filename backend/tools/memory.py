@@ -1,80 +1,134 @@
 # backend/tools/memory.py
 
+from backend.config import Config
+from backend.models.db import db
 from backend.models.models import User, UserSession, Interaction  # Corrected import
-from backend.models.observer import process_with_wordllama, load_wordllama_model  # Corrected import
-from backend.tools.pruning_utils import prune_wordllama_embeddings, get_importance_scores, should_prune_based_on_size  # Corrected import
+from backend.models.observer import process_with_wordllama, load_wordllama_model, record_token_hits
+from backend.models.model_maintenance import model_maintenance
+from backend.tools.pruning_utils import should_prune_based_on_size
 from backend.tools.task_logging import log_task_execution 
+from backend.tools.vector_memory import vector_memory
+from backend.tools import success_stats
+from datetime import datetime
+import logging
 import numpy as np
-import os
-import pickle
+
+# Query builders for the hot memory lookups (audited by backend/benchmarks/query_plan_audit.py)
+def todays_session_query(user_id):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return (UserSession.query
+            .filter(UserSession.user_id == user_id, UserSession.start_time >= today)
+            .order_by(UserSession.start_time.desc()))
+
+def interaction_history_query(user_id, session_id=None, task_type=None):
+    """Interactions of a session (or of all the user's sessions), newest first."""
+    q = Interaction.query
+    if session_id:
+        q = q.filter_by(session_id=session_id)
+    else:
+        q = q.filter(Interaction.user_id == user_id)
+    
+    # Filter by task type if provided
+    if task_type:
+        q = q.filter(Interaction.task_outcome == task_type)
+    return q.order_by(Interaction.timestamp.desc())
+
+def latest_interaction_query(user_id=None):
+    """The most recent interaction of a user (or overall without one)."""
+    q = Interaction.query
+    if user_id:
+        q = q.filter(Interaction.user_id == user_id)
+    return q.order_by(Interaction.timestamp.desc()).limit(1)
 
 # Create or fetch session data
-def create_or_fetch_session():
-    user_id = session.get('user_id')
+def create_or_fetch_session(user_id):
+    """Return the id of the user's session for today, creating it if needed (None without a user)."""
     if not user_id:
         logging.error("User ID not found in session.")
-        return jsonify({"error": "User not logged in. Please create a profile."}), 401
+        return None
 
-    session_data = UserSession.query.filter_by(user_id=user_id, start_time=datetime.utcnow().date()).first()
+    session_data = todays_session_query(user_id).first()
     if not session_data:
         session_data = UserSession(user_id=user_id, topic="Default", model_used="gpt-2")
         db.session.add(session_data)
         db.session.commit()
     return session_data.id
 
-def retrieve_memory(user_id, session_id=None, task_type=None):
+def serialize_interaction(interaction, score=None):
+    """JSON-safe view of an interaction for the client."""
+    data = {
+        'id': interaction.id,
+        'session_id': interaction.session_id,
+        'prompt': interaction.prompt,
+        'response': interaction.response,
+        'task_outcome': interaction.task_outcome,
+        'feedback': interaction.feedback,
+        'timestamp': interaction.timestamp.isoformat() if interaction.timestamp else None,
+    }
+    if score is not None:
+        data['score'] = round(score, 4)
+    return data
+
+def retrieve_memory(user_id, session_id=None, task_type=None, query=None, limit=None, offset=0):
     """
-    Retrieve interactions based on user ID, session ID, and task type.
+    Retrieve a page of past interactions as dicts, newest first.
+
+    With `query`, the interactions most relevant to it are returned instead (vector search over
+    the user's interaction embeddings, weighted towards recent ones), each with a `score`.
     """
-    query = Interaction.query
-    if session_id:
-        query = query.filter_by(session_id=session_id)
-    else:
-        query = query.join(UserSession).filter(UserSession.user_id == user_id)
-    
-    # Filter by task type if provided
-    if task_type:
-        query = query.filter(Interaction.task_outcome == task_type)
+    limit = limit or Config.MEMORY_PAGE_SIZE
+    if query and user_id:
+        return search_memory(user_id, query, limit, offset, session_id, task_type)
+
+    interactions = interaction_history_query(user_id, session_id, task_type).offset(offset).limit(limit).all()
+    return [serialize_interaction(interaction) for interaction in interactions]
 
-    interactions = query.all()
-    return interactions
+def search_memory(user_id, query, limit, offset=0, session_id=None, task_type=None):
+    """Top-k relevant interactions for `query`; optional filters are applied after ranking."""
+    filtered = bool(session_id or task_type)
+    # Over-fetch when filtering so a page is still full after dropping non-matching hits
+    fetch = (limit + offset) * 4 if filtered else limit
+    hits = vector_memory.search(user_id, query, k=fetch, offset=0 if filtered else offset)
+    if not hits:
+        return []
+
+    interactions = {i.id: i for i in Interaction.query.filter(Interaction.id.in_([h[0] for h in hits])).all()}
+    results = []
+    for interaction_id, score, _ in hits:
+        interaction = interactions.get(interaction_id)
+        if interaction is None:
+            continue
+        if session_id and interaction.session_id != session_id:
+            continue
+        if task_type and interaction.task_outcome != task_type:
+            continue
+        results.append(serialize_interaction(interaction, score))
+    results = results[offset:offset + limit] if filtered else results
+    record_token_hits([result['prompt'] for result in results])
+    return results
 
 def log_wordllama_interaction(user_id, message, task_success):
     """
-    Log WordLlama interactions in the system memory and trigger pruning based on model size and task success rate.
+    Log WordLlama interactions in the system memory and request pruning (done by the model
+    maintenance worker) based on model size and task success rate.
     """
-    embeddings, tokenizer = load_wordllama_model()
+    embeddings, _ = load_wordllama_model()
     wordllama_output = process_with_wordllama(message)
 
     # Log the interaction with the embeddings
     log_task_execution(user_id, 'WordLlama', message, str(wordllama_output), 'success')
 
     # Get the success rate (this should be calculated based on past task successions)
-    success_rate = calculate_success_rate(user_id)  # Implement this function
+    success_rate = calculate_success_rate(user_id, window_days=Config.SUCCESS_RATE_WINDOW_DAYS)
 
     # Trigger pruning based on model size, growth rate, and success rate
     if should_prune_based_on_size(embeddings, success_rate):
-        importance_scores = get_importance_scores(embeddings)
-        pruned_embeddings = prune_wordllama_embeddings(embeddings, importance_scores, threshold=0.01)
-        
-        # Save pruned embeddings
-        save_path = os.path.expanduser('~/O.A.I.S./models/wordllama_model.pkl')
-        with open(save_path, 'wb') as file:
-            model_data = {
-                'embeddings': pruned_embeddings,
-                'tokenizer': tokenizer,
-                'config': {'dim': 1024, 'binary': True}
-            }
-            pickle.dump(model_data, file)
-
-        print(f"Pruned and saved embeddings to {save_path}")
-
-def calculate_success_rate(user_id):
+        model_maintenance.schedule_pruning(reason=f"success rate {success_rate:.2f} for user {user_id}")
+
+def calculate_success_rate(user_id, intent=None, window_days=None):
     """
     Calculate the success rate of tasks based on past interactions.
+    Reads the maintained counters (see success_stats.py) instead of scanning interactions;
+    `window_days` limits it to the most recent days.
     """
-    interactions = Interaction.query.join(UserSession).filter(UserSession.user_id == user_id).all()
-    if not interactions:
-        return 1.0  # Default to perfect success rate if no interactions
-    success_count = sum(1 for i in interactions if i.task_outcome == 'success')
-    return success_count / len(interactions)
+    return success_stats.success_rate(user_id, intent=intent, window_days=window_days)
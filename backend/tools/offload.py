@@ -0,0 +1,36 @@
+# backend/tools/offload.py
+#
+# Run blocking work without stalling the Socket.IO event loop. Under eventlet or gevent a CPU-bound
+# call (such as GPT-2 generation) inside a green thread blocks every connection served by the
+# process, so such calls are pushed to a native thread pool. In threading mode every handler
+# already has its own OS thread and the call runs inline.
+
+import os
+
+_async_mode = os.getenv('SOCKETIO_ASYNC_MODE', 'threading')
+
+
+def configure(async_mode):
+    """Record the Socket.IO async mode in use (called from create_app)."""
+    global _async_mode
+    _async_mode = async_mode or 'threading'
+
+
+def is_green():
+    return _async_mode in ('eventlet', 'gevent')
+
+
+def run_blocking(fn, *args, **kwargs):
+    """
+    Call `fn(*args, **kwargs)` on a native thread when running under eventlet/gevent.
+    `fn` must not wait on locks or queues shared with green threads (those are monkey-patched),
+    so pass pure compute such as a model forward pass, not code that takes application locks.
+    """
+    if _async_mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(fn, *args, **kwargs)
+    if _async_mode == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+    return fn(*args, **kwargs)
+
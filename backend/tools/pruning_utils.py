@@ -1,6 +1,7 @@
 import os
 import numpy as np
 from backend.config import Config
+from backend.tools.importance import TokenSignals
 
 def get_model_growth_rate(embeddings, initial_size=1000):
     """
@@ -16,117 +17,204 @@ def should_prune_based_on_size(embeddings, success_rate, prune_threshold=0.1):
     """
     # Growth rate calculation
     growth_rate = get_model_growth_rate(embeddings)
-    
+
     # Task success-based decision
     if success_rate < 0.9:  # Example: only prune if success rate drops below 90%
         prune_trigger = (growth_rate >= prune_threshold)
         return prune_trigger
     return False
 
-def prune_wordllama_embeddings(embeddings, importance_scores):
-    """
-    Prune embeddings based on their importance scores using the configured threshold.
-    """
-    pruned_embeddings = [emb for emb, score in zip(embeddings, importance_scores) if score >= Config.PRUNING_THRESHOLD]
-    print(f"Pruned embeddings from {len(embeddings)} to {len(pruned_embeddings)}")
-    return np.array(pruned_embeddings)
+def row_importance(token_scores, index_map=None, rows=None):
+    """
+    Map importance per token id onto embedding rows. Without an index map row i is token i;
+    with one (from an earlier pruning), row `index_map[t]` takes the score of token t.
+    """
+    rows = rows if rows is not None else len(token_scores)
+    if index_map is None:
+        scores = np.zeros(rows, dtype=np.float64)
+        n = min(rows, len(token_scores))
+        scores[:n] = token_scores[:n]
+        return scores
+    scores = np.zeros(rows, dtype=np.float64)
+    index_map = np.asarray(index_map)
+    tokens = np.flatnonzero(index_map >= 0)
+    tokens = tokens[tokens < len(token_scores)]
+    scores[index_map[tokens]] = token_scores[tokens]
+    return scores
 
-def get_importance_scores(embeddings):
-    """
-    Compute importance scores for embeddings based on task execution success.
-    This is a placeholder function and should be modified as needed.
+def get_importance_scores(embeddings, index_map=None, signals=None):
+    """
+    Importance in [0, 1] of every embedding row, from recorded token usage, memory retrieval
+    hits and task success attribution (see tools/importance.py). Deterministic for given counts.
+    Without `signals` the persisted counts of all processes are used.
+    """
+    signals = signals or TokenSignals(Config.PRUNING_SIGNALS_PATH)
+    size = len(index_map) if index_map is not None else len(embeddings)
+    token_scores = signals.scores(
+        size,
+        usage_weight=Config.PRUNING_USAGE_WEIGHT,
+        hit_weight=Config.PRUNING_HIT_WEIGHT,
+        success_weight=Config.PRUNING_SUCCESS_WEIGHT
+    )
+    return row_importance(token_scores, index_map, rows=len(embeddings))
+
+def select_rows(scores, policy='threshold', threshold=None, top_k=None, percentile=None, keep=None, min_keep=0):
     """
-    # In this example, each embedding's "importance" is determined by some
-    # heuristic (e.g., task relevance, task success rate, etc.)
-    # For now, we'll assign random importance values.
-    importance_scores = np.random.rand(len(embeddings))
-    return importance_scores
+    Boolean mask of rows to keep.
 
-def prune_wordllama_embeddings(embeddings, importance_scores, threshold=0.01):
+    policy='threshold'  keeps rows scoring >= `threshold`
+    policy='top_k'      keeps the `top_k` highest-scoring rows
+    policy='percentile' keeps rows scoring >= the `percentile`-th percentile of all scores
+    Rows listed in `keep` are always kept, and at least `min_keep` rows survive (highest
+    scores first). Ties are broken by row index, so the result only depends on the scores.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n = len(scores)
+    if policy == 'threshold':
+        mask = scores >= (Config.PRUNING_THRESHOLD if threshold is None else threshold)
+    elif policy == 'top_k':
+        if top_k is None:
+            raise ValueError("top_k policy requires top_k")
+        mask = np.zeros(n, dtype=bool)
+        mask[np.argsort(-scores, kind='stable')[:max(int(top_k), 0)]] = True
+    elif policy == 'percentile':
+        if percentile is None:
+            raise ValueError("percentile policy requires percentile")
+        mask = scores >= np.percentile(scores, percentile) if n else np.zeros(0, dtype=bool)
+    else:
+        raise ValueError(f"Unknown pruning policy: {policy}")
+
+    if keep is not None:
+        mask[np.asarray(keep, dtype=np.int64)] = True
+    shortfall = min(int(min_keep), n) - int(mask.sum())
+    if shortfall > 0:
+        candidates = np.flatnonzero(~mask)
+        best = candidates[np.argsort(-scores[candidates], kind='stable')[:shortfall]]
+        mask[best] = True
+    return mask
+
+def build_index_map(mask):
+    """Old row -> new row (-1 for pruned rows)."""
+    index_map = np.full(len(mask), -1, dtype=np.int64)
+    index_map[mask] = np.arange(int(np.count_nonzero(mask)), dtype=np.int64)
+    return index_map
+
+def compose_index_maps(first, second):
+    """Index map equivalent to applying `first` and then `second`."""
+    first = np.asarray(first)
+    composed = np.full(len(first), -1, dtype=np.int64)
+    kept = first >= 0
+    composed[kept] = np.asarray(second)[first[kept]]
+    return composed
+
+def apply_mask(embeddings, mask, out_path=None, in_place=False, chunk_rows=65536):
     """
-    Prune embeddings based on their importance scores.
+    Copy the rows selected by `mask` into a new array (default), into a new `.npy` file opened
+    as a memory map (`out_path`), or to the front of `embeddings` itself (`in_place`; the
+    returned array is a view). Rows are moved in chunks of `chunk_rows`, so at most one chunk
+    is held in memory besides the source and destination.
     """
-    # Identify embeddings with importance below the threshold
-    important_embeddings = []
-    for emb, score in zip(embeddings, importance_scores):
-        if score >= threshold:
-            important_embeddings.append(emb)
-    
-    pruned_embeddings = np.array(important_embeddings)
-    print(f"Pruned embeddings from {len(embeddings)} to {len(pruned_embeddings)}")
-    return pruned_embeddings
+    mask = np.asarray(mask, dtype=bool)
+    if len(mask) != len(embeddings):
+        raise ValueError(f"Mask has {len(mask)} rows, embeddings have {len(embeddings)}")
+    kept = np.flatnonzero(mask)
+
+    if in_place:
+        if not embeddings.flags.writeable:
+            raise ValueError("Embeddings are read-only; prune into a new array or out_path instead")
+        # kept[i] >= i, so copying front to back never overwrites a row that is still to be read
+        for start in range(0, len(kept), chunk_rows):
+            rows = kept[start:start + chunk_rows]
+            embeddings[start:start + len(rows)] = embeddings[rows]
+        return embeddings[:len(kept)]
+
+    if out_path is None:
+        return embeddings[mask]
+
+    directory = os.path.dirname(out_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    out = np.lib.format.open_memmap(out_path, mode='w+', dtype=embeddings.dtype,
+                                    shape=(len(kept),) + tuple(embeddings.shape[1:]))
+    for start in range(0, len(kept), chunk_rows):
+        rows = kept[start:start + chunk_rows]
+        out[start:start + len(rows)] = embeddings[rows]
+    out.flush()
+    return out
+
+def prune_wordllama_embeddings(embeddings, importance_scores, threshold=None, policy=None, top_k=None,
+                               percentile=None, keep=None, min_keep=None, out_path=None, in_place=False):
+    """
+    Prune embedding rows by importance. Returns `(pruned_embeddings, index_map)` where
+    `index_map[old_row]` is the row in the pruned matrix, or -1 if the row was removed.
+    Policy defaults come from Config (PRUNING_POLICY, PRUNING_THRESHOLD, PRUNING_TOP_K,
+    PRUNING_PERCENTILE, PRUNING_MIN_KEEP_RATIO).
+    """
+    policy = policy or Config.PRUNING_POLICY
+    if min_keep is None:
+        min_keep = int(np.ceil(len(embeddings) * Config.PRUNING_MIN_KEEP_RATIO))
+    mask = select_rows(
+        importance_scores, policy,
+        threshold=threshold,
+        top_k=top_k if top_k is not None else Config.PRUNING_TOP_K,
+        percentile=percentile if percentile is not None else Config.PRUNING_PERCENTILE,
+        keep=keep,
+        min_keep=min_keep
+    )
+    pruned = apply_mask(embeddings, mask, out_path=out_path, in_place=in_place)
+    print(f"Pruned embeddings from {len(embeddings)} to {len(pruned)}")
+    return pruned, build_index_map(mask)
 
 def fine_tune_embeddings(embeddings, execution_result, task_details):
     """
-    Fine-tune embeddings based on task execution results.
+    Fine-tune embeddings based on task execution results. Not implemented yet: the embeddings
+    are returned unchanged, so self-training never produces a new model version.
     """
     # Update embeddings based on performance of tasks (placeholder logic)
     # Use task details and results to adjust embeddings
     return embeddings  # Modify this logic based on your use case
 
-def validate_model(embeddings, validation_tasks):
-    """
-    Validate the model by running test tasks and measuring success rate and speed.
-    """
-    start_time = time.time()
-    successful_tasks = 0
+QUALITY_METRICS = ('intent_accuracy', 'retrieval_recall_at_1', 'retrieval_mrr')
 
-    for task in validation_tasks:
-        # Perform task using embeddings (simulated task logic)
-        result = run_validation_task(task, embeddings)
-        if result == 'success':
-            successful_tasks += 1
-    
-    # Calculate success rate
-    success_rate = successful_tasks / len(validation_tasks)
-    
-    # Calculate time taken
-    elapsed_time = time.time() - start_time
-    
-    return success_rate, elapsed_time
-
-def run_validation_task(task, embeddings):
+def pre_and_post_pruning_validation(embeddings, tokenizer, config, index_map=None, signals=None, **policy):
     """
-    Simulate a validation task using embeddings. 
-    Task logic should be replaced with your specific validation task logic.
+    Evaluate the model before and after pruning it with `policy` (scored with `signals`) on the
+    fixed intent and retrieval corpora (accuracy, recall, embedding latency, size, load time).
+    Returns the report of `backend.benchmarks.pruning_bench.validate_pruning`; nothing is saved.
     """
-    # Placeholder logic (randomized success/failure)
-    task_embedding = np.random.choice(embeddings)  # Simulate using the embeddings
-    return 'success' if np.random.rand() > 0.2 else 'failure'  # Simulate success rate of 80%
+    from backend.benchmarks.pruning_bench import validate_pruning
 
-def prune_wordllama_embeddings(embeddings, importance_scores, threshold=0.01):
-    """
-    Prune embeddings based on their importance scores.
-    """
-    important_embeddings = [emb for emb, score in zip(embeddings, importance_scores) if score >= threshold]
-    pruned_embeddings = np.array(important_embeddings)
-    print(f"Pruned embeddings from {len(embeddings)} to {len(pruned_embeddings)}")
-    return pruned_embeddings
+    report = validate_pruning(embeddings, tokenizer, config, index_map, signals=signals, **policy)
+    before, after = report['before'], report['after']
+    print(
+        f"Pruning validation: rows {before['rows']} -> {after['rows']}, "
+        f"intent accuracy {before['intent_accuracy']} -> {after['intent_accuracy']}, "
+        f"retrieval recall@1 {before['retrieval_recall_at_1']} -> {after['retrieval_recall_at_1']}, "
+        f"embed p50 {before['embed_p50_ms']}ms -> {after['embed_p50_ms']}ms"
+    )
+    return report
 
-def pre_and_post_pruning_validation(embeddings, tokenizer, validation_tasks):
+def fine_tuning_validation(embeddings, updated_embeddings, tokenizer, config, index_map=None):
     """
-    Perform validation pre and post pruning to evaluate effectiveness.
+    Evaluate the current and the fine-tuned embeddings on the same corpora as the pruning
+    validation. The report has the same `before`, `after` and `changes` entries, so
+    `quality_regressions` applies to it; nothing is saved.
     """
-    # Pre-pruning validation
-    pre_pruning_success_rate, pre_pruning_time = validate_model(embeddings, validation_tasks)
-    print(f"Pre-Pruning Success Rate: {pre_pruning_success_rate}, Time: {pre_pruning_time}s")
-    
-    # Prune embeddings
-    importance_scores = get_importance_scores(embeddings)
-    pruned_embeddings = prune_wordllama_embeddings(embeddings, importance_scores)
-
-    # Post-pruning validation
-    post_pruning_success_rate, post_pruning_time = validate_model(pruned_embeddings, validation_tasks)
-    print(f"Post-Pruning Success Rate: {post_pruning_success_rate}, Time: {post_pruning_time}s")
+    from backend.benchmarks.pruning_bench import compare, evaluate_model
 
-    # Save pruned embeddings
-    save_path = os.path.expanduser('~/O.A.I.S./models/wordllama_model.pkl')
-    with open(save_path, 'wb') as file:
-        model_data = {
-            'embeddings': pruned_embeddings,
-            'tokenizer': tokenizer,
-            'config': {'dim': 1024, 'binary': True}
-        }
-        pickle.dump(model_data, file)
+    before = evaluate_model(embeddings, tokenizer, config, index_map)
+    after = evaluate_model(updated_embeddings, tokenizer, config, index_map)
+    return {'before': before, 'after': after, 'changes': compare(before, after)}
 
-    return pre_pruning_success_rate, post_pruning_success_rate, pre_pruning_time, post_pruning_time
\ No newline at end of file
+def quality_regressions(report, max_drop=None):
+    """
+    Quality metrics of a validation report that dropped by more than `max_drop`
+    (PRUNING_MAX_QUALITY_DROP by default), as `{metric: {'before': ..., 'after': ...}}`.
+    """
+    max_drop = Config.PRUNING_MAX_QUALITY_DROP if max_drop is None else max_drop
+    before, after = report['before'], report['after']
+    return {
+        metric: {'before': before[metric], 'after': after[metric]}
+        for metric in QUALITY_METRICS
+        if before[metric] - after[metric] > max_drop
+    }
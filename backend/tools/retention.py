@@ -0,0 +1,237 @@
+# backend/tools/retention.py
+#
+# Retention for the tables that grow with every request (interactions, code execution logs, task
+# history). Rows past a table's age or row-count limit are written to the compressed archive in
+# batches and then deleted, followed by ANALYZE (and VACUUM once enough of a SQLite file is free)
+# so the live database stays small and its statistics current.
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, or_, func
+from backend.config import Config
+from backend.models.db import db
+from backend.models.models import Interaction, UserSession, InteractionEmbedding, CodeExecutionLog, CodeBody, TaskHistory
+from backend.tools.archive import RowArchive
+from backend.tools.code_bodies import delete_orphaned_code_bodies
+from backend.tools.vector_memory import vector_memory
+
+
+class RetentionPolicy:
+    """Keep rows of `model` for `ttl_days` (0: no age limit) and at most `max_rows` (0: no limit)."""
+
+    def __init__(self, model, ttl_days=0, max_rows=0, select_rows=None, before_delete=None, after_delete=None):
+        self.model = model
+        self.table = model.__table__
+        self.ttl_days = ttl_days
+        self.max_rows = max_rows
+        # select_rows(ids) -> statement producing the archived rows; defaults to all columns
+        self.select_rows = select_rows or (lambda ids: select(self.table).where(self.table.c.id.in_(ids)))
+        self.before_delete = before_delete
+        self.after_delete = after_delete
+
+    @property
+    def enabled(self):
+        return bool(self.ttl_days or self.max_rows)
+
+    def expired(self, now):
+        """SQL condition matching the rows this policy retires, or None when nothing is expired."""
+        conditions = []
+        if self.ttl_days:
+            conditions.append(self.table.c.timestamp < now - timedelta(days=self.ttl_days))
+        if self.max_rows:
+            boundary = db.session.execute(
+                select(self.table.c.id).order_by(self.table.c.id.desc()).offset(self.max_rows).limit(1)
+            ).scalar()
+            if boundary is not None:
+                conditions.append(self.table.c.id <= boundary)
+        return or_(*conditions) if conditions else None
+
+
+def _interaction_rows(ids):
+    # Include the owner so archived interactions can still be queried per user
+    table = Interaction.__table__
+    columns = [column for column in table.c if column.name != 'user_id']
+    return (select(*columns, func.coalesce(table.c.user_id, UserSession.user_id).label('user_id'))
+            .join(UserSession, table.c.session_id == UserSession.id, isouter=True)
+            .where(table.c.id.in_(ids)))
+
+
+def _drop_interaction_embeddings(ids):
+    owners = db.session.execute(
+        select(InteractionEmbedding.user_id, InteractionEmbedding.interaction_id)
+        .where(InteractionEmbedding.interaction_id.in_(ids))
+    ).all()
+    db.session.execute(delete(InteractionEmbedding.__table__).where(InteractionEmbedding.interaction_id.in_(ids)))
+    by_user = {}
+    for user_id, interaction_id in owners:
+        by_user.setdefault(user_id, []).append(interaction_id)
+    for user_id, interaction_ids in by_user.items():
+        vector_memory.discard(user_id, interaction_ids)
+
+
+def _execution_log_rows(ids):
+    # Archive the code text itself rather than a hash into code_bodies
+    table = CodeExecutionLog.__table__
+    columns = [column for column in table.c if column.name not in ('code', 'code_hash')]
+    return (select(*columns, func.coalesce(CodeBody.code, table.c.code).label('code'))
+            .join(CodeBody, table.c.code_hash == CodeBody.hash, isouter=True)
+            .where(table.c.id.in_(ids)))
+
+
+def default_policies():
+    return [
+        RetentionPolicy(Interaction, Config.RETENTION_INTERACTIONS_DAYS, Config.RETENTION_INTERACTIONS_MAX_ROWS,
+                        select_rows=_interaction_rows, before_delete=_drop_interaction_embeddings),
+        RetentionPolicy(CodeExecutionLog, Config.RETENTION_EXECUTION_LOGS_DAYS, Config.RETENTION_EXECUTION_LOGS_MAX_ROWS,
+                        select_rows=_execution_log_rows, after_delete=lambda ids: delete_orphaned_code_bodies()),
+        RetentionPolicy(TaskHistory, Config.RETENTION_TASK_HISTORY_DAYS, Config.RETENTION_TASK_HISTORY_MAX_ROWS),
+    ]
+
+
+class RetentionManager:
+    """
+    Applies retention policies every `interval` seconds on a background thread (started by
+    `start()` when RETENTION_ENABLED is set) or on demand with `run()` inside an app context.
+
+    Each batch is archived before its rows are deleted, so a crash can at worst leave a batch in
+    both places, never in neither; when the delete fails the batch's archive file is removed again. Success-rate counters are not decremented for archived
+    interactions: they keep describing the whole history.
+    """
+
+    def __init__(self, archive, policies=None, batch_size=5000, interval=3600, vacuum_min_free_ratio=0.2):
+        self.archive = archive
+        self.policies = policies if policies is not None else default_policies()
+        self.batch_size = batch_size
+        self.interval = interval
+        self.vacuum_min_free_ratio = vacuum_min_free_ratio
+        self._app = None
+        self._enabled = True
+        self._thread = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._last_run = None
+
+    def init_app(self, app):
+        self.batch_size = app.config.get('RETENTION_BATCH_SIZE', self.batch_size)
+        self.interval = app.config.get('RETENTION_INTERVAL', self.interval)
+        self._enabled = app.config.get('RETENTION_ENABLED', True)
+        self._app = app
+
+    def start(self):
+        if not self._enabled or self._app is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='db-retention', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self._app.app_context():
+                    self.run()
+            except Exception as e:
+                logging.error(f"Retention run failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+    def _apply(self, policy, now):
+        archived, files = 0, []
+        condition = policy.expired(now)
+        if condition is None:
+            return archived, files
+        id_column = policy.table.c.id
+        while True:
+            ids = db.session.execute(
+                select(id_column).where(condition).order_by(id_column).limit(self.batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            rows = [dict(row._mapping) for row in db.session.execute(policy.select_rows(ids))]
+            path = self.archive.write(policy.table.name, rows)
+            try:
+                if policy.before_delete:
+                    policy.before_delete(ids)
+                db.session.execute(delete(policy.table).where(id_column.in_(ids)))
+                if policy.after_delete:
+                    policy.after_delete(ids)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # The rows stay live, so drop their copy; the next run archives them again
+                self.archive.discard(path)
+                raise
+            files.append(path)
+            archived += len(ids)
+        return archived, files
+
+    def run(self, now=None):
+        """Archive expired rows of every policy, then compact; returns a report."""
+        with self._run_lock:
+            started = time.perf_counter()
+            now = now or datetime.utcnow()
+            tables = {}
+            for policy in self.policies:
+                if not policy.enabled:
+                    continue
+                archived, files = self._apply(policy, now)
+                tables[policy.table.name] = {'archived': archived, 'files': len(files)}
+            touched = [name for name, result in tables.items() if result['archived']]
+            compaction = self.compact(touched) if touched else None
+            self._last_run = {
+                'at': now.isoformat(),
+                'tables': tables,
+                'compaction': compaction,
+                'duration_s': round(time.perf_counter() - started, 3),
+            }
+            return self._last_run
+
+    def _free_ratio(self, connection):
+        page_count = connection.exec_driver_sql("PRAGMA page_count").scalar() or 0
+        free_pages = connection.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+        return free_pages / page_count if page_count else 0.0
+
+    def compact(self, tables=None, vacuum=None):
+        """
+        Refresh planner statistics and reclaim space. SQLite: ANALYZE, then VACUUM when at least
+        `vacuum_min_free_ratio` of the file is free pages (or `vacuum=True`). PostgreSQL:
+        VACUUM (ANALYZE) of `tables` (all tables when None).
+        """
+        db.session.remove()
+        started = time.perf_counter()
+        with db.engine.connect() as connection:
+            connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+            if connection.dialect.name == 'sqlite':
+                connection.exec_driver_sql("ANALYZE")
+                free_ratio = self._free_ratio(connection)
+                vacuumed = vacuum if vacuum is not None else free_ratio >= self.vacuum_min_free_ratio
+                if vacuumed:
+                    connection.exec_driver_sql("VACUUM")
+                result = {'analyzed': True, 'vacuumed': bool(vacuumed), 'free_ratio_before': round(free_ratio, 3)}
+            elif connection.dialect.name == 'postgresql':
+                for table in tables or [None]:
+                    connection.exec_driver_sql(f'VACUUM (ANALYZE) "{table}"' if table else "VACUUM (ANALYZE)")
+                result = {'analyzed': True, 'vacuumed': True}
+            else:
+                result = {'analyzed': False, 'vacuumed': False}
+        result['duration_s'] = round(time.perf_counter() - started, 3)
+        return result
+
+    def stats(self):
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval_s': self.interval,
+            'policies': {policy.table.name: {'ttl_days': policy.ttl_days, 'max_rows': policy.max_rows}
+                         for policy in self.policies},
+            'last_run': self._last_run,
+            'archive': self.archive.stats(),
+        }
+
+
+retention = RetentionManager(
+    RowArchive(Config.ARCHIVE_DIR, compression=Config.ARCHIVE_COMPRESSION),
+    batch_size=Config.RETENTION_BATCH_SIZE,
+    interval=Config.RETENTION_INTERVAL,
+    vacuum_min_free_ratio=Config.RETENTION_VACUUM_MIN_FREE_RATIO
+)
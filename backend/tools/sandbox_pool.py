@@ -0,0 +1,274 @@
+# backend/tools/sandbox_pool.py
+
+import atexit
+import json
+import logging
+import os
+import queue
+import select
+import subprocess
+import threading
+import time
+from collections import deque
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_worker.py')
+
+# Seconds between cancellation checks while waiting on a worker
+CANCEL_POLL_INTERVAL = 0.1
+# Extra seconds the pool waits for a worker to report a run it timed out or cancelled itself
+RESPONSE_GRACE = 2.0
+
+
+def sandbox_environment():
+    """Environment for sandboxed Python, with a fixed hash seed so set iteration order is reproducible."""
+    return {**os.environ, 'PYTHONHASHSEED': '0'}
+
+
+class SandboxTimeout(Exception):
+    pass
+
+
+class SandboxCrashed(Exception):
+    pass
+
+
+class SandboxCancelled(Exception):
+    pass
+
+
+class SandboxWorker:
+    """
+    One pre-started, memory-limited Python interpreter running sandbox_worker.py. It forks a new
+    child for every run, so snippets never share an interpreter; the worker is replaced only if
+    it stops answering or after `max_runs` runs.
+    """
+
+    def __init__(self, python, cpu_limit, memory_limit):
+        read_fd, write_fd = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [python, '-u', WORKER_SCRIPT, str(write_fd), str(cpu_limit), str(memory_limit)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(write_fd,),
+                env=sandbox_environment(),
+                text=True
+            )
+        finally:
+            os.close(write_fd)
+        self._response_fd = read_fd
+        self._buffer = b''
+        self.runs = 0
+
+    def _read_message(self, deadline, cancel_event=None):
+        """Read one JSON line from the response pipe, honouring the run deadline and cancellation."""
+        while b'\n' not in self._buffer:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if cancel_event is not None:
+                # Wake up regularly to notice cancellation
+                remaining = CANCEL_POLL_INTERVAL if remaining is None else min(remaining, CANCEL_POLL_INTERVAL)
+            ready, _, _ = select.select([self._response_fd], [], [], remaining)
+            if cancel_event is not None and cancel_event.is_set():
+                raise SandboxCancelled()
+            if not ready:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise SandboxTimeout()
+                continue
+            chunk = os.read(self._response_fd, 65536)
+            if not chunk:
+                raise SandboxCrashed(self._exit_reason())
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b'\n')
+        return json.loads(line)
+
+    def _send(self, request):
+        try:
+            self.process.stdin.write(json.dumps(request) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise SandboxCrashed(self._exit_reason())
+
+    def run(self, code, timeout=None, on_output=None, cancel_event=None):
+        """
+        Send code to the worker and wait for its result message. With `on_output`, output is
+        streamed as `on_output(stream_name, text)` calls while the code runs. The worker enforces
+        `timeout` and cancellation itself; SandboxTimeout and SandboxCrashed mean the worker
+        itself stopped answering.
+        """
+        self.runs += 1
+        self._send({'code': code, 'stream': on_output is not None, 'timeout': timeout})
+
+        deadline = None if timeout is None else time.monotonic() + timeout + RESPONSE_GRACE
+        while True:
+            try:
+                message = self._read_message(deadline, cancel_event)
+            except SandboxCancelled:
+                self._send({'cancel': True})
+                cancel_event = None
+                deadline = time.monotonic() + RESPONSE_GRACE
+                continue
+            if message.get('type') == 'result':
+                return message
+            if message.get('type') == 'chunk' and on_output is not None:
+                on_output(message['stream'], message['data'])
+
+    def _exit_reason(self):
+        try:
+            returncode = self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            return "Sandbox worker stopped responding"
+        return f"Sandbox worker exited with code {returncode}"
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        os.close(self._response_fd)
+
+
+class SandboxPool:
+    """
+    Pool of pre-started Python sandbox workers.
+
+    Each worker forks a new child under RLIMIT_AS/RLIMIT_CPU limits for every snippet and reaps
+    it afterwards (see sandbox_worker.py), so no run can observe or alter another run's
+    interpreter. The pool never relies on what a run reports about itself: a worker is replaced
+    after `max_runs` runs or when it stops answering. Callers block while every worker is busy;
+    the number of such callers is reported as the queue depth.
+    """
+
+    def __init__(self, size=2, max_runs=50, timeout=10, cpu_limit=5, memory_limit=256 * 1024 * 1024, python='python3'):
+        self.size = size
+        self.max_runs = max_runs
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.python = python
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._waiting = 0
+        self._busy = 0
+        self._latencies = deque(maxlen=1000)
+        self._counters = {'runs': 0, 'timeouts': 0, 'crashes': 0, 'cancelled': 0, 'recycled': 0}
+
+    def _spawn(self):
+        try:
+            self._idle.put(SandboxWorker(self.python, self.cpu_limit, self.memory_limit))
+        except Exception as e:
+            logging.error(f"Failed to start sandbox worker: {e}")
+
+    def _replace(self, worker):
+        """Close a worker and start its replacement off the request path."""
+        worker.close()
+        with self._lock:
+            self._counters['recycled'] += 1
+        threading.Thread(target=self._spawn, name='sandbox-spawn', daemon=True).start()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._spawn()
+        atexit.register(self.shutdown)
+
+    def run(self, code, timeout=None, on_output=None, cancel_event=None):
+        """
+        Execute Python code on a pooled worker; returns the usual `{"status", "output"}` dict.
+        `on_output(stream_name, text)` receives output as it is produced; setting `cancel_event`
+        kills the run.
+        """
+        self.start()
+        with self._lock:
+            self._waiting += 1
+        try:
+            worker = self._idle.get(timeout=timeout or self.timeout)
+        except queue.Empty:
+            return {"status": "error", "output": "No sandbox worker available"}
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        with self._lock:
+            self._busy += 1
+
+        started = time.perf_counter()
+        recycle = False
+        try:
+            message = worker.run(code, timeout or self.timeout, on_output, cancel_event)
+            result = self._result(message)
+        except SandboxTimeout:
+            recycle = True
+            self._count('timeouts')
+            result = {"status": "error", "output": "Execution timeout"}
+        except SandboxCrashed as e:
+            recycle = True
+            self._count('crashes')
+            result = {"status": "error", "output": str(e)}
+        finally:
+            self._latencies.append(time.perf_counter() - started)
+            with self._lock:
+                self._busy -= 1
+                self._counters['runs'] += 1
+
+        if recycle or worker.runs >= self.max_runs or not worker.alive():
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def _result(self, message):
+        """Translate a worker's result message into the `{"status", "output"}` dict callers expect."""
+        status = message.get('status')
+        if status == 'success':
+            return {"status": "success", "output": message['stdout']}
+        if status == 'error':
+            return {"status": "error", "output": message['stderr'] or message['stdout']}
+        if status == 'timeout':
+            self._count('timeouts')
+            return {"status": "error", "output": "Execution timeout"}
+        if status == 'cancelled':
+            self._count('cancelled')
+            return {"status": "cancelled", "output": "Execution cancelled"}
+        self._count('crashes')
+        return {"status": "error", "output": message.get('reason') or "Sandbox run failed"}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def shutdown(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def metrics(self):
+        """Pool size, queue depth, counters and per-run latency percentiles."""
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return round(1000 * latencies[min(int(fraction * len(latencies)), len(latencies) - 1)], 2)
+
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': self._idle.qsize(),
+                'busy': self._busy,
+                'queue_depth': self._waiting,
+                **self._counters,
+                'latency_p50_ms': percentile(0.5),
+                'latency_p99_ms': percentile(0.99),
+            }
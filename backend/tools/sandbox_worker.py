@@ -0,0 +1,272 @@
+# backend/tools/sandbox_worker.py
+#
+# Pre-forked Python sandbox started by sandbox_pool.py. It deliberately imports nothing from
+# the backend so it starts fast. The process itself never runs user code: it warms up once and
+# then forks a new child for every request, so each run starts from the same pristine
+# interpreter and nothing a snippet changes (modules, globals, threads, files it opened) can be
+# seen by the next one. Requests arrive on stdin as one JSON object per line
+# ({"code": ..., "stream": bool, "timeout": seconds}); a {"cancel": true} line sent while a run
+# is in progress stops it.
+#
+# The child runs in its own process group, closes the parent's pipes before executing the
+# snippet and reports through a pipe of its own. The parent relays only well-formed "chunk"
+# and the first "result" message from it, kills the whole process group and reaps the child
+# once the run is over, and then writes the final {"type": "result"} message to the response
+# file descriptor given on the command line. Its status is "success" or "error" as reported
+# by the snippet, or "timeout", "cancelled" or "crashed" as determined by the parent.
+#
+# Usage: python sandbox_worker.py <response_fd> <cpu_seconds_per_run> <memory_bytes>
+
+import builtins
+import io
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+
+PR_SET_DUMPABLE = 4
+
+# Seconds to wait for a child that closed its pipe without reporting a result to exit
+EXIT_GRACE = 1.0
+
+
+def apply_limits(memory_limit):
+    """Cap the address space of this process and of every child it forks."""
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def hide_descriptors():
+    """Stop processes started by snippets from opening this process's pipes via /proc (Linux)."""
+    try:
+        import ctypes
+        ctypes.CDLL(None, use_errno=True).prctl(PR_SET_DUMPABLE, 0, 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
+
+
+class StreamingCapture(io.StringIO):
+    """StringIO that also forwards output as chunk messages, a line (or 4 KiB) at a time."""
+
+    def __init__(self, name, send):
+        super().__init__()
+        self.name = name
+        self._send = send
+        self._pending = []
+        self._pending_size = 0
+
+    def write(self, text):
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if '\n' in text or self._pending_size >= 4096:
+            self.flush()
+        return super().write(text)
+
+    def flush(self):
+        if self._pending:
+            self._send({'type': 'chunk', 'stream': self.name, 'data': ''.join(self._pending)})
+            self._pending, self._pending_size = [], 0
+
+
+def run_code(code, send=None):
+    """Execute `code` in a fresh namespace and capture what it prints (streaming it if `send` is given)."""
+    if send is None:
+        stdout, stderr = io.StringIO(), io.StringIO()
+    else:
+        stdout, stderr = StreamingCapture('stdout', send), StreamingCapture('stderr', send)
+    namespace = {'__name__': '__main__', '__builtins__': builtins.__dict__.copy()}
+    status = 'success'
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO('')
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                exec(compile(code, '<sandbox>', 'exec'), namespace)
+            except SystemExit as e:
+                if e.code not in (None, 0):
+                    status = 'error'
+                    if not isinstance(e.code, int):
+                        print(e.code, file=sys.stderr)
+            except BaseException:
+                status = 'error'
+                # Skip this module's frame so the traceback starts in the user's code
+                error_type, error, tb = sys.exc_info()
+                traceback.print_exception(error_type, error, tb.tb_next)
+    finally:
+        sys.stdin = saved_stdin
+        stdout.flush()
+        stderr.flush()
+    return {'type': 'result', 'status': status, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+
+def run_child(request, write_fd, inherited_fds, cpu_limit):
+    """Body of a forked child: run one snippet and report through `write_fd`. Never returns."""
+    try:
+        os.setpgid(0, 0)
+        for fd in inherited_fds:
+            os.close(fd)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+        output = os.fdopen(write_fd, 'w', buffering=1)
+
+        def send(message):
+            output.write(json.dumps(message) + '\n')
+
+        send(run_code(request['code'], send if request.get('stream') else None))
+        output.flush()
+    except BaseException:
+        os._exit(1)
+    os._exit(0)
+
+
+class LineReader:
+    """Buffered reader of JSON lines from a raw file descriptor, usable together with select()."""
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.buffer = b''
+
+    def fill(self):
+        """Read what is available; returns False at end of input."""
+        chunk = os.read(self.fd, 65536)
+        self.buffer += chunk
+        return bool(chunk)
+
+    def has_line(self):
+        return b'\n' in self.buffer
+
+    def next_line(self):
+        line, _, self.buffer = self.buffer.partition(b'\n')
+        return line
+
+
+def relayable(message):
+    """Return the parts of a child's message the parent passes on, or None to drop it."""
+    if not isinstance(message, dict):
+        return None
+    if message.get('type') == 'chunk' and message.get('stream') in ('stdout', 'stderr') \
+            and isinstance(message.get('data'), str):
+        return {'type': 'chunk', 'stream': message['stream'], 'data': message['data']}
+    if message.get('type') == 'result' and message.get('status') in ('success', 'error') \
+            and isinstance(message.get('stdout'), str) and isinstance(message.get('stderr'), str):
+        return {'type': 'result', 'status': message['status'],
+                'stdout': message['stdout'], 'stderr': message['stderr']}
+    return None
+
+
+def wait_for_exit(pid, deadline):
+    """Poll for the child's exit until `deadline`; returns its wait status or None if still running."""
+    while True:
+        reaped, status = os.waitpid(pid, os.WNOHANG)
+        if reaped:
+            return status
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+        time.sleep(0.01)
+
+
+def crash_reason(status):
+    if os.WIFSIGNALED(status) and os.WTERMSIG(status) in (signal.SIGXCPU, signal.SIGKILL):
+        return "CPU time limit exceeded"
+    if os.WIFSIGNALED(status):
+        return f"Sandbox run killed by signal {os.WTERMSIG(status)}"
+    return f"Sandbox run exited with code {os.WEXITSTATUS(status)}"
+
+
+def supervise(request, requests, send, response_fd, cpu_limit):
+    """Fork a child for one request, relay its output and report how the run ended."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        run_child(request, write_fd, (read_fd, requests.fd, response_fd), cpu_limit)
+    os.close(write_fd)
+    try:
+        # Also set here so that the group exists before the parent may need to kill it
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+
+    timeout = request.get('timeout')
+    deadline = None if not timeout else time.monotonic() + timeout
+    output = LineReader(read_fd)
+    result, outcome, status = None, None, None
+    while result is None and outcome is None:
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        ready, _, _ = select.select([read_fd, requests.fd], [], [], remaining)
+        if not ready:
+            outcome = 'timeout'
+            break
+        if requests.fd in ready and (not requests.fill() or requests.has_line()):
+            # The only request accepted while a run is in progress is a cancellation
+            requests.buffer = b''
+            outcome = 'cancelled'
+            break
+        if read_fd in ready:
+            if not output.fill():
+                status = wait_for_exit(pid, time.monotonic() + EXIT_GRACE)
+                outcome = 'crashed'
+                break
+            while result is None and output.has_line():
+                try:
+                    message = relayable(json.loads(output.next_line()))
+                except ValueError:
+                    message = None
+                if message is None:
+                    continue
+                if message['type'] == 'result':
+                    result = message
+                else:
+                    send(message)
+
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    if status is None:
+        _, status = os.waitpid(pid, 0)
+    os.close(read_fd)
+
+    if result is not None:
+        return result
+    if outcome == 'timeout':
+        return {'type': 'result', 'status': 'timeout'}
+    if outcome == 'cancelled':
+        return {'type': 'result', 'status': 'cancelled'}
+    return {'type': 'result', 'status': 'crashed', 'reason': crash_reason(status)}
+
+
+def main():
+    response_fd, cpu_limit, memory_limit = (int(arg) for arg in sys.argv[1:4])
+    apply_limits(memory_limit)
+    hide_descriptors()
+    responses = os.fdopen(response_fd, 'w', buffering=1)
+    # Read requests from a private copy of the pipe and leave /dev/null on fd 0
+    requests = LineReader(os.dup(0))
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+
+    def send(message):
+        responses.write(json.dumps(message) + '\n')
+
+    # Warm up what a run uses (tracebacks import their helpers lazily) so every child inherits it
+    run_code('raise Exception()')
+    while True:
+        while not requests.has_line():
+            if not requests.fill():
+                return
+        line = requests.next_line()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            continue
+        if 'code' not in request:
+            continue  # A cancellation that arrived after its run had already finished
+        send(supervise(request, requests, send, response_fd, cpu_limit))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+# backend/tools/semantic_cache.py
+
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from backend.config import Config
+from backend.models.observer import embed_with_coverage, wordllama_engine
+from backend.tools.cache import message_key
+
+_CHUNK_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class SemanticCache:
+    """
+    Cache of LLM responses looked up by prompt embedding similarity.
+
+    Entries are grouped by scope (client, provider, model, temperature); a prompt hits when the
+    normalized prompt text of an unexpired entry of its scope matches exactly, or when an entry
+    has cosine similarity >= `threshold` with it. `embed(prompt)` returns `(vector, coverage)`;
+    pooled embeddings of prompts whose in-vocabulary token share is below `min_coverage` collapse
+    onto a few token rows, so such prompts (and entries stored for them) only match exactly.
+    At most `max_entries` entries are kept across all scopes, evicting the least recently used first.
+    """
+
+    def __init__(self, embed, threshold=0.95, min_coverage=0.8, max_entries=2048, ttl=86400):
+        self._embed = embed
+        self.threshold = threshold
+        self.min_coverage = min_coverage
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        # entry id -> entry dict, in least- to most-recently-used order
+        self._entries = OrderedDict()
+        # scope -> {'ids': [...], 'matrix': ndarray | None, 'matrix_ids': [...], 'exact': {prompt_key: id}}
+        self._scopes = {}
+        self._counters = {
+            'lookups': 0, 'hits': 0, 'exact_hits': 0, 'misses': 0, 'low_coverage': 0, 'stores': 0,
+            'evictions': 0, 'expired': 0, 'latency_saved_s': 0.0, 'lookup_time_s': 0.0,
+        }
+
+    def _scope_index(self, scope):
+        return self._scopes.setdefault(scope, {'ids': [], 'matrix': None, 'matrix_ids': [], 'exact': {}})
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        index = self._scopes[entry['scope']]
+        index['ids'].remove(entry_id)
+        index['matrix'] = None
+        if index['exact'].get(entry['key']) == entry_id:
+            del index['exact'][entry['key']]
+        if not index['ids']:
+            del self._scopes[entry['scope']]
+
+    def _expire(self, scope):
+        now = time.monotonic()
+        index = self._scopes.get(scope)
+        if index is None:
+            return
+        for entry_id in [i for i in index['ids'] if self._entries[i]['expires'] <= now]:
+            self._remove(entry_id)
+            self._counters['expired'] += 1
+
+    def _best_match(self, scope, vector):
+        """Return (entry_id, similarity) of the closest entry in scope, or (None, 0.0)."""
+        index = self._scopes.get(scope)
+        if index is None or vector is None:
+            return None, 0.0
+        if index['matrix'] is None:
+            # Exact-only entries (no reliable vector) are left out of the similarity search
+            index['matrix_ids'] = [i for i in index['ids'] if self._entries[i]['vector'] is not None]
+            index['matrix'] = np.stack([self._entries[i]['vector'] for i in index['matrix_ids']]) \
+                if index['matrix_ids'] else np.empty((0, len(vector)), dtype=np.float32)
+        if not index['matrix_ids']:
+            return None, 0.0
+        similarities = index['matrix'] @ vector
+        best = int(np.argmax(similarities))
+        return index['matrix_ids'][best], float(similarities[best])
+
+    def _hit(self, entry_id, similarity, exact):
+        entry = self._entries[entry_id]
+        self._entries.move_to_end(entry_id)
+        entry['hits'] += 1
+        self._counters['hits'] += 1
+        self._counters['exact_hits'] += int(exact)
+        self._counters['latency_saved_s'] += entry['duration']
+        return {'response': entry['response'], 'similarity': round(similarity, 4), 'exact': exact}
+
+    def lookup(self, prompt, scope):
+        """
+        Return `(hit, vector)`: `hit` is `{'response', 'similarity', 'exact'}` or None and `vector`
+        is the prompt embedding (None if it is too unreliable to match on), to be passed back to
+        `store` after a miss.
+        """
+        started = time.perf_counter()
+        key = message_key(prompt, template=False)
+        with self._lock:
+            self._counters['lookups'] += 1
+            self._expire(scope)
+            entry_id = self._scopes.get(scope, {}).get('exact', {}).get(key)
+            if entry_id is not None:
+                hit = self._hit(entry_id, 1.0, exact=True)
+                self._counters['lookup_time_s'] += time.perf_counter() - started
+                return hit, None
+
+        # Embed outside the lock; concurrent lookups only share the read-only model
+        vector = self._vector(prompt)
+
+        with self._lock:
+            if vector is None:
+                self._counters['low_coverage'] += 1
+            entry_id, similarity = self._best_match(scope, vector)
+            hit = None
+            if entry_id is not None and similarity >= self.threshold:
+                hit = self._hit(entry_id, similarity, exact=False)
+            else:
+                self._counters['misses'] += 1
+            self._counters['lookup_time_s'] += time.perf_counter() - started
+        return hit, vector
+
+    def _vector(self, prompt):
+        vector, coverage = self._embed(prompt)
+        if vector is None or coverage < self.min_coverage:
+            return None
+        return np.asarray(vector, dtype=np.float32)
+
+    def store(self, prompt, scope, response, duration, vector=None):
+        """
+        Cache `response`, which took `duration` seconds to generate, for `prompt` in `scope`.
+        Without a (reliable) `vector` the entry is only served for the exact same prompt.
+        """
+        if vector is None:
+            vector = self._vector(prompt)
+        key = message_key(prompt, template=False)
+        with self._lock:
+            index = self._scope_index(scope)
+            if key in index['exact']:
+                self._remove(index['exact'][key])
+                index = self._scope_index(scope)
+            entry_id = next(self._ids)
+            self._entries[entry_id] = {
+                'scope': scope,
+                'key': key,
+                'vector': vector,
+                'response': response,
+                'duration': duration,
+                'expires': time.monotonic() + self.ttl,
+                'hits': 0,
+            }
+            index['ids'].append(entry_id)
+            index['exact'][key] = entry_id
+            index['matrix'] = None
+            self._counters['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def clear(self, *_):
+        """Drop every entry (used when the embedding model changes and old vectors no longer compare)."""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size, scopes = len(self._entries), len(self._scopes)
+        lookups = counters['lookups']
+        return {
+            **counters,
+            'size': size,
+            'scopes': scopes,
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'min_coverage': self.min_coverage,
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            'latency_saved_s': round(counters['latency_saved_s'], 3),
+            'lookup_time_s': round(counters['lookup_time_s'], 3),
+            'avg_lookup_ms': round(1000 * counters['lookup_time_s'] / lookups, 3) if lookups else 0.0,
+        }
+
+
+def response_chunks(text):
+    """Split a cached response into word-sized pieces so it streams like a live completion."""
+    return _CHUNK_PATTERN.findall(text)
+
+
+semantic_cache = SemanticCache(
+    embed_with_coverage,
+    threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+    min_coverage=Config.SEMANTIC_CACHE_MIN_COVERAGE,
+    max_entries=Config.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=Config.SEMANTIC_CACHE_TTL
+)
+wordllama_engine.add_listener(semantic_cache.clear)
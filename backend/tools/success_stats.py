@@ -0,0 +1,160 @@
+# backend/tools/success_stats.py
+#
+# Success-rate counters maintained alongside interactions. An after_flush listener turns every
+# inserted interaction, and every change to an interaction's outcome or feedback, into counter
+# increments executed in the same transaction, so reading a success rate is a primary-key lookup.
+
+from datetime import datetime, timedelta
+from sqlalchemy import event, select, func, inspect
+from sqlalchemy.orm import Session
+from backend.models.db import db, dialect_insert
+from backend.models.models import Interaction, UserSession, SuccessCounter
+
+ALL_INTENTS = '*'
+ALL_TIME = 'all'
+
+
+def is_successful(task_outcome, feedback):
+    """Explicit user feedback ('yes'/'no') overrides the recorded task outcome."""
+    answer = (feedback or '').strip().lower()
+    if answer.startswith('yes'):
+        return True
+    if answer.startswith('no'):
+        return False
+    return task_outcome == 'success'
+
+
+def _counter_keys(user_id, intent, timestamp):
+    day = (timestamp or datetime.utcnow()).strftime('%Y-%m-%d')
+    for intent_key in {ALL_INTENTS, intent or ALL_INTENTS}:
+        for period in (ALL_TIME, day):
+            yield user_id, intent_key, period
+
+
+def _upsert_statement(connection, table):
+    statement = dialect_insert(connection, table)
+    return statement.on_conflict_do_update(
+        index_elements=['user_id', 'intent', 'period'],
+        set_={
+            'total': table.c.total + statement.excluded.total,
+            'successes': table.c.successes + statement.excluded.successes,
+        }
+    )
+
+
+def apply_counter_deltas(connection, deltas):
+    """Add `{(user_id, intent, period): [total, successes]}` to the counters with one upsert."""
+    rows = [
+        {'user_id': user_id, 'intent': intent, 'period': period, 'total': total, 'successes': successes}
+        for (user_id, intent, period), (total, successes) in deltas.items()
+        if total or successes
+    ]
+    if rows:
+        connection.execute(_upsert_statement(connection, SuccessCounter.__table__), rows)
+
+
+def _collect_deltas(session):
+    changes = []  # (interaction, total delta, success delta)
+    for obj in session.new:
+        if isinstance(obj, Interaction):
+            changes.append((obj, 1, int(is_successful(obj.task_outcome, obj.feedback))))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Interaction) or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        outcome, feedback = state.attrs.task_outcome.history, state.attrs.feedback.history
+        if not (outcome.has_changes() or feedback.has_changes()):
+            continue
+        old_outcome = outcome.deleted[0] if outcome.deleted else obj.task_outcome
+        old_feedback = feedback.deleted[0] if feedback.deleted else obj.feedback
+        delta = int(is_successful(obj.task_outcome, obj.feedback)) - int(is_successful(old_outcome, old_feedback))
+        if delta:
+            changes.append((obj, 0, delta))
+
+    for obj in session.deleted:
+        if isinstance(obj, Interaction):
+            changes.append((obj, -1, -int(is_successful(obj.task_outcome, obj.feedback))))
+    return changes
+
+
+# Load the previous value when these attributes are set on an expired instance, so the flush
+# history carries the old outcome/feedback needed to adjust the counters
+@event.listens_for(Interaction.task_outcome, 'set', active_history=True)
+@event.listens_for(Interaction.feedback, 'set', active_history=True)
+def _keep_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_success_counters(session, flush_context):
+    changes = _collect_deltas(session)
+    if not changes:
+        return
+
+    connection = session.connection()
+    session_ids = {interaction.session_id for interaction, _, _ in changes}
+    owners = dict(connection.execute(
+        select(UserSession.id, UserSession.user_id).where(UserSession.id.in_(session_ids))
+    ).all())
+
+    deltas = {}
+    for interaction, total, successes in changes:
+        user_id = owners.get(interaction.session_id)
+        if user_id is None:
+            continue
+        for key in _counter_keys(user_id, interaction.intent, interaction.timestamp):
+            counts = deltas.setdefault(key, [0, 0])
+            counts[0] += total
+            counts[1] += successes
+    apply_counter_deltas(connection, deltas)
+
+
+def success_counts(user_id, intent=None, window_days=None):
+    """
+    Return `(total, successes)` for a user (optionally one intent). With `window_days`, only the
+    last `window_days` UTC days (including today) are counted: at most that many rows are read.
+    """
+    intent = intent or ALL_INTENTS
+    if window_days is None:
+        counter = db.session.get(SuccessCounter, (user_id, intent, ALL_TIME))
+        return (counter.total, counter.successes) if counter else (0, 0)
+
+    first_day = (datetime.utcnow() - timedelta(days=window_days - 1)).strftime('%Y-%m-%d')
+    total, successes = db.session.execute(
+        select(func.coalesce(func.sum(SuccessCounter.total), 0), func.coalesce(func.sum(SuccessCounter.successes), 0))
+        .where(SuccessCounter.user_id == user_id, SuccessCounter.intent == intent,
+               SuccessCounter.period != ALL_TIME, SuccessCounter.period >= first_day)
+    ).one()
+    return int(total), int(successes)
+
+
+def success_rate(user_id, intent=None, window_days=None, default=1.0):
+    """Share of successful interactions, or `default` when there are none."""
+    total, successes = success_counts(user_id, intent, window_days)
+    return successes / total if total else default
+
+
+def rebuild_success_counters(user_id=None):
+    """Recompute the counters from the interactions table in one pass; returns the number of counter rows."""
+    query = (db.session.query(UserSession.user_id, Interaction.intent, Interaction.timestamp,
+                              Interaction.task_outcome, Interaction.feedback)
+             .join(UserSession, Interaction.session_id == UserSession.id))
+    if user_id is not None:
+        query = query.filter(UserSession.user_id == user_id)
+
+    deltas = {}
+    for owner, intent, timestamp, task_outcome, feedback in query.yield_per(1000):
+        success = int(is_successful(task_outcome, feedback))
+        for key in _counter_keys(owner, intent, timestamp):
+            counts = deltas.setdefault(key, [0, 0])
+            counts[0] += 1
+            counts[1] += success
+
+    delete = SuccessCounter.query
+    if user_id is not None:
+        delete = delete.filter(SuccessCounter.user_id == user_id)
+    delete.delete(synchronize_session=False)
+    apply_counter_deltas(db.session.connection(), deltas)
+    db.session.commit()
+    return len(deltas)
@@ -2,7 +2,7 @@
 
 from backend.models.models import CodeExecutionLog, TaskHistory  # Corrected import
 from datetime import datetime
-from backend.models.db import db
+from backend.models.batch_writer import batch_writer
 import logging
 
 
@@ -15,11 +15,10 @@ def log_task(user_input, intent, success):
     task_history = TaskHistory(
         user_input=user_input,
         intent=intent,
-        success=success,
-        timestamp=datetime.utcnow()
+        success=success
     )
-    db.session.add(task_history)
-    db.session.commit()
+    # Committed by the background batch writer together with other pending rows
+    batch_writer.add(task_history)
     logging.info(f"Logged task: {intent} with success status: {success}")
 
 def log_task_result(api_response, result):
@@ -32,13 +31,12 @@ def log_task_execution(user_id, task_type, input_code, output, status):
     Logs the execution of code or tasks performed by the user.
     """
     execution_log = CodeExecutionLog(
-        user_id=user_id,
-        task_type=task_type,
-        input_code=input_code,
+        user_id=str(user_id),
+        language=task_type,
+        code=input_code,
         output=output,
         status=status,
         timestamp=datetime.utcnow()
     )
-    db.session.add(execution_log)
-    db.session.commit()
+    batch_writer.add(execution_log)
     logging.info(f"Logged execution: {task_type} with status: {status}")
@@ -0,0 +1,192 @@
+# backend/tools/vector_index.py
+
+import threading
+import numpy as np
+from backend.tools import binary_similarity
+
+
+class VectorIndex:
+    """
+    In-memory index of L2-normalised vectors with integer ids and timestamps.
+
+    Vectors live in one contiguous float32 matrix that grows by doubling, so a search is a single
+    batched matrix-vector product. Once the index holds `ivf_min_size` vectors it also keeps an
+    IVF partition (k-means centroids with posting lists) and a search only scores the vectors
+    of the `nprobe` lists closest to the query. The partition is retrained whenever the index
+    has doubled in size since the last training.
+
+    With `binary_min_size` set, the index also keeps the sign bits of the first `coarse_bits`
+    dimensions of every vector, packed into uint64 words. A search over at least that many
+    vectors first shortlists `oversample` times the wanted results by Hamming distance on these
+    codes (see binary_similarity.py) and computes exact cosine similarities for the shortlist
+    only. The shortlist ignores recency, so a larger `oversample` gives recency more room.
+    """
+
+    def __init__(self, dim, ivf_min_size=50000, nlist=None, nprobe=8, kmeans_iterations=10,
+                 binary_min_size=None, coarse_bits=256, oversample=40):
+        self.dim = dim
+        self.ivf_min_size = ivf_min_size
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iterations = kmeans_iterations
+        self.binary_min_size = binary_min_size
+        self.coarse_bits = min(coarse_bits, dim)
+        self.oversample = oversample
+        self._code_words = binary_similarity.words_for(self.coarse_bits) if binary_min_size else 0
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._codes = np.empty((0, self._code_words), dtype=np.uint64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._timestamps = np.empty(0, dtype=np.float64)
+        self._size = 0
+        self._positions = {}
+        self._centroids = None
+        self._assignments = None
+        self._trained_size = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed <= len(self._ids):
+            return
+        capacity = max(needed, 2 * len(self._ids), 64)
+        for name in ('_vectors', '_codes', '_ids', '_timestamps'):
+            old = getattr(self, name)
+            grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+        if self._assignments is not None:
+            assignments = np.full(capacity, -1, dtype=np.int32)
+            assignments[:self._size] = self._assignments[:self._size]
+            self._assignments = assignments
+
+    def add(self, ids, vectors, timestamps):
+        """Add (or replace) vectors; `ids` and `timestamps` are sequences aligned with `vectors` rows."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            for item_id in ids:
+                if int(item_id) in self._positions:
+                    self.remove([item_id])
+            self._reserve(len(vectors))
+            start, end = self._size, self._size + len(vectors)
+            self._vectors[start:end] = vectors
+            if self._code_words:
+                self._codes[start:end] = self._encode(vectors)
+            self._ids[start:end] = ids
+            self._timestamps[start:end] = timestamps
+            for offset, item_id in enumerate(ids):
+                self._positions[int(item_id)] = start + offset
+            self._size = end
+
+            if self._centroids is not None:
+                self._assignments[start:end] = self._nearest_centroids(vectors)
+            if self._size >= self.ivf_min_size and self._size >= 2 * max(self._trained_size, self.ivf_min_size // 2):
+                self.train()
+
+    def remove(self, ids):
+        """Remove vectors by id (swap-with-last, so positions of other entries may change)."""
+        with self._lock:
+            for item_id in ids:
+                position = self._positions.pop(int(item_id), None)
+                if position is None:
+                    continue
+                last = self._size - 1
+                if position != last:
+                    self._vectors[position] = self._vectors[last]
+                    self._codes[position] = self._codes[last]
+                    self._ids[position] = self._ids[last]
+                    self._timestamps[position] = self._timestamps[last]
+                    if self._assignments is not None:
+                        self._assignments[position] = self._assignments[last]
+                    self._positions[int(self._ids[position])] = position
+                self._size = last
+
+    def _encode(self, vectors):
+        return binary_similarity.truncate(binary_similarity.pack_bits(vectors), self.coarse_bits)
+
+    def _shortlist(self, query, candidates, wanted, allowed):
+        """Positions of the `wanted * oversample` candidates nearest to `query` by coarse Hamming distance."""
+        positions = np.arange(self._size) if candidates is None else candidates
+        count = len(positions)
+        if not self._code_words or count < self.binary_min_size or wanted * self.oversample >= count:
+            return candidates
+        codes = self._codes[:self._size] if candidates is None else self._codes[candidates]
+        excluded = None
+        if allowed is not None:
+            excluded = ~np.isin(self._ids[positions], np.fromiter(allowed, dtype=np.int64))
+        best = binary_similarity.shortlist(codes, self._encode(query), wanted * self.oversample, excluded=excluded)
+        return positions[best[0]]
+
+    def _nearest_centroids(self, vectors):
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def train(self):
+        """(Re)build the IVF partition with spherical k-means over the current vectors."""
+        with self._lock:
+            vectors = self._vectors[:self._size]
+            nlist = self.nlist or max(int(np.sqrt(self._size)), 1)
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(self._size, size=min(self._size, nlist * 64), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)].copy()
+            for _ in range(self.kmeans_iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(len(centroids)):
+                    members = sample[labels == c]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        norm = np.linalg.norm(centroid)
+                        centroids[c] = centroid / norm if norm else centroid
+            self._centroids = centroids
+            self._assignments = np.full(len(self._ids), -1, dtype=np.int32)
+            self._assignments[:self._size] = self._nearest_centroids(vectors)
+            self._trained_size = self._size
+
+    def _candidates(self, query):
+        if self._centroids is None:
+            return None
+        probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        return np.flatnonzero(np.isin(self._assignments[:self._size], probes))
+
+    def search(self, query, k=5, offset=0, recency_weight=0.0, half_life=None, now=None, allowed=None):
+        """
+        Return `[(id, score, similarity), ...]` for results `offset` .. `offset + k` by descending score.
+
+        score = similarity + recency_weight * 0.5 ** (age / half_life), so with a non-zero weight
+        newer entries win among similar ones. `allowed` is an optional set of ids to restrict to.
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            candidates = self._shortlist(query, self._candidates(query), offset + k, allowed)
+            if candidates is None:
+                vectors, ids, timestamps = (self._vectors[:self._size], self._ids[:self._size],
+                                            self._timestamps[:self._size])
+            else:
+                vectors, ids, timestamps = self._vectors[candidates], self._ids[candidates], self._timestamps[candidates]
+            similarities = vectors @ query
+
+        scores = similarities
+        if recency_weight and half_life:
+            age = np.maximum((now or timestamps.max(initial=0.0)) - timestamps, 0.0)
+            scores = similarities + recency_weight * np.power(0.5, age / half_life)
+        if allowed is not None:
+            mask = np.isin(ids, np.fromiter(allowed, dtype=np.int64))
+            scores = np.where(mask, scores, -np.inf)
+
+        wanted = min(offset + k, len(scores))
+        if wanted <= 0:
+            return []
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top])][offset:]
+        return [(int(ids[i]), float(scores[i]), float(similarities[i])) for i in top if np.isfinite(scores[i])]
+
+    def stats(self):
+        return {
+            'size': self._size,
+            'dim': self.dim,
+            'ivf_lists': 0 if self._centroids is None else len(self._centroids),
+            'nprobe': self.nprobe,
+            'binary_codes': self._code_words > 0,
+            'bytes': int(self._vectors.nbytes + self._codes.nbytes + self._ids.nbytes + self._timestamps.nbytes),
+        }
@@ -0,0 +1,200 @@
+# backend/tools/vector_memory.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from sqlalchemy import func
+from backend.config import Config
+from backend.models.db import db
+from backend.models.models import InteractionEmbedding
+from backend.models.observer import process_with_wordllama
+from backend.tools.vector_index import VectorIndex
+
+
+class VectorMemory:
+    """
+    Relevance search over a user's past interactions.
+
+    Each interaction's prompt embedding is stored in `interaction_embeddings`; the embeddings of
+    a user are loaded into a VectorIndex on their first search (one indexed query) and kept up
+    to date as interactions are added. At most `max_users` indexes stay in memory.
+
+    Interactions may be added (or archived) by other processes and nodes, so each index
+    remembers the highest interaction id and the row count it has seen in the table. Every search
+    first compares them with the table: new rows above the high-water mark are added to the
+    index, and if the counts don't add up (rows deleted, or ids committed out of order) the index
+    is reloaded.
+    """
+
+    def __init__(self, embed, max_users=256, recency_weight=0.1, half_life=7 * 86400,
+                 ivf_min_size=50000, nprobe=8, binary_min_size=None, coarse_bits=256, oversample=40):
+        self._embed = embed
+        self.max_users = max_users
+        self.recency_weight = recency_weight
+        self.half_life = half_life
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self.binary_min_size = binary_min_size
+        self.coarse_bits = coarse_bits
+        self.oversample = oversample
+        self._indexes = OrderedDict()
+        self._synced = {}  # user_id -> (highest interaction id, row count) loaded from the table
+        self._lock = threading.Lock()
+
+    def _new_index(self, dim):
+        return VectorIndex(dim, ivf_min_size=self.ivf_min_size, nprobe=self.nprobe,
+                           binary_min_size=self.binary_min_size, coarse_bits=self.coarse_bits,
+                           oversample=self.oversample)
+
+    @staticmethod
+    def _vectors(rows, dim):
+        return np.frombuffer(b''.join(row.vector for row in rows), dtype=np.float32).reshape(-1, dim)
+
+    @staticmethod
+    def _timestamps(rows):
+        return [row.created_at.timestamp() if row.created_at else 0.0 for row in rows]
+
+    @staticmethod
+    def _table_state(user_id):
+        high_water, count = db.session.query(
+            func.max(InteractionEmbedding.interaction_id), func.count(InteractionEmbedding.interaction_id)
+        ).filter(InteractionEmbedding.user_id == user_id).one()
+        return high_water or 0, count
+
+    def _load(self, user_id):
+        """`(index, (high_water, count))` for a user, or `(None, state)` when they have no embeddings."""
+        rows = InteractionEmbedding.query.filter_by(user_id=user_id).all()
+        state = (max((row.interaction_id for row in rows), default=0), len(rows))
+        if not rows:
+            return None, state
+        dim = rows[-1].dim
+        rows = [row for row in rows if row.dim == dim]
+        index = self._new_index(dim)
+        index.add([row.interaction_id for row in rows], self._vectors(rows, dim), self._timestamps(rows))
+        return index, state
+
+    def _catch_up(self, user_id, index, synced):
+        """Bring a loaded index in line with the table; returns False when it has to be reloaded."""
+        state = self._table_state(user_id)
+        if state == synced:
+            return True
+        high_water, count = synced
+        rows = InteractionEmbedding.query.filter(
+            InteractionEmbedding.user_id == user_id, InteractionEmbedding.interaction_id > high_water
+        ).order_by(InteractionEmbedding.interaction_id).all()
+        if count + len(rows) != state[1] or any(row.dim != index.dim for row in rows):
+            return False
+        if rows:
+            index.add([row.interaction_id for row in rows], self._vectors(rows, index.dim), self._timestamps(rows))
+        with self._lock:
+            if self._indexes.get(user_id) is index:
+                self._synced[user_id] = (max(high_water, rows[-1].interaction_id if rows else 0), state[1])
+        return True
+
+    def _index_for(self, user_id):
+        with self._lock:
+            index = self._indexes.get(user_id)
+            synced = self._synced.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+        if index is not None and self._catch_up(user_id, index, synced):
+            return index
+        index, state = self._load(user_id)
+        with self._lock:
+            if index is None:
+                self._indexes.pop(user_id, None)
+                self._synced.pop(user_id, None)
+                return None
+            self._indexes[user_id] = index
+            self._synced[user_id] = state
+            while len(self._indexes) > self.max_users:
+                evicted, _ = self._indexes.popitem(last=False)
+                self._synced.pop(evicted, None)
+        return index
+
+    def add(self, interaction, user_id):
+        """Embed and store an interaction's prompt (caller commits). Returns False if embedding failed."""
+        vector = self._embed(interaction.prompt)
+        if vector is None:
+            return False
+        vector = np.asarray(vector, dtype=np.float32)
+        created_at = interaction.timestamp.timestamp() if interaction.timestamp else time.time()
+        db.session.add(InteractionEmbedding(
+            interaction_id=interaction.id,
+            user_id=user_id,
+            dim=len(vector),
+            vector=vector.tobytes()
+        ))
+        with self._lock:
+            index = self._indexes.get(user_id)
+        if index is not None:
+            if index.dim == len(vector):
+                # Searchable right away; the high-water mark only moves once the row is read back
+                index.add([interaction.id], vector, [created_at])
+            else:
+                # The embedding model changed dimension; reload from the table on the next search
+                self.forget(user_id)
+        return True
+
+    def search(self, user_id, query, k=5, offset=0, allowed=None):
+        """Return `[(interaction_id, score, similarity), ...]` most relevant to `query` for a user."""
+        index = self._index_for(user_id)
+        if index is None:
+            return []
+        vector = self._embed(query)
+        if vector is None or len(vector) != index.dim:
+            return []
+        return index.search(
+            vector, k=k, offset=offset, recency_weight=self.recency_weight,
+            half_life=self.half_life, now=time.time(), allowed=allowed
+        )
+
+    def discard(self, user_id, interaction_ids):
+        """Remove deleted interactions from a user's loaded index (their rows are deleted by the caller)."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove(interaction_ids)
+
+    def forget(self, user_id=None):
+        """Drop cached indexes (all, or one user's) so they are reloaded from the table."""
+        with self._lock:
+            if user_id is None:
+                self._indexes.clear()
+                self._synced.clear()
+            else:
+                self._indexes.pop(user_id, None)
+                self._synced.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            indexes = dict(self._indexes)
+        return {
+            'users_loaded': len(indexes),
+            'vectors': sum(len(index) for index in indexes.values()),
+            'bytes': sum(index.stats()['bytes'] for index in indexes.values()),
+        }
+
+
+def index_interaction(interaction, user_id):
+    """Add an interaction to the vector memory, logging instead of raising on failure."""
+    try:
+        return vector_memory.add(interaction, user_id)
+    except Exception as e:
+        logging.error(f"Failed to index interaction {interaction.id}: {e}")
+        return False
+
+
+vector_memory = VectorMemory(
+    process_with_wordllama,
+    max_users=Config.MEMORY_MAX_USERS_LOADED,
+    recency_weight=Config.MEMORY_RECENCY_WEIGHT,
+    half_life=Config.MEMORY_RECENCY_HALF_LIFE,
+    ivf_min_size=Config.MEMORY_IVF_MIN_SIZE,
+    nprobe=Config.MEMORY_IVF_NPROBE,
+    binary_min_size=Config.MEMORY_BINARY_MIN_SIZE,
+    coarse_bits=Config.MEMORY_BINARY_COARSE_BITS,
+    oversample=Config.MEMORY_BINARY_OVERSAMPLE
+)
@@ -0,0 +1,31 @@
+"""add server_sessions for database-backed Flask sessions
+
+Revision ID: 2d6f8b4a1e93
+Revises: 9a5c1e3b7d42
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d6f8b4a1e93'
+down_revision = '9a5c1e3b7d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('server_sessions',
+    sa.Column('session_id', sa.String(length=255), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('expiry', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index('ix_server_sessions_expiry', 'server_sessions', ['expiry'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_server_sessions_expiry', table_name='server_sessions')
+    op.drop_table('server_sessions')
@@ -0,0 +1,37 @@
+"""rename tables to the model table names and add task_history
+
+Revision ID: 3c1f0b7d9a24
+Revises: ade84b5f8620
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f0b7d9a24'
+down_revision = 'ade84b5f8620'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The models moved to plural table names after the initial schema was created
+    op.rename_table('user', 'users')
+    op.rename_table('session', 'user_sessions')
+    op.rename_table('interaction', 'interactions')
+    op.create_table('task_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_input', sa.String(length=500), nullable=True),
+    sa.Column('intent', sa.String(length=50), nullable=True),
+    sa.Column('success', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('task_history')
+    op.rename_table('interactions', 'interaction')
+    op.rename_table('user_sessions', 'session')
+    op.rename_table('users', 'user')
@@ -0,0 +1,67 @@
+"""add interactions.intent and success_counters
+
+Revision ID: 5b9d3e7f2c81
+Revises: 8e2a4c6d1b57
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9d3e7f2c81'
+down_revision = '8e2a4c6d1b57'
+branch_labels = None
+depends_on = None
+
+
+def _is_successful(task_outcome, feedback):
+    answer = (feedback or '').strip().lower()
+    if answer.startswith('yes'):
+        return True
+    if answer.startswith('no'):
+        return False
+    return task_outcome == 'success'
+
+
+def upgrade():
+    with op.batch_alter_table('interactions') as batch_op:
+        batch_op.add_column(sa.Column('intent', sa.String(length=50), nullable=True))
+
+    counters = op.create_table('success_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('intent', sa.String(length=50), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('successes', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'intent', 'period')
+    )
+
+    # Backfill from existing interactions (all predate the intent column, so only '*' rows)
+    interactions = sa.table('interactions', sa.column('session_id'), sa.column('task_outcome'),
+                            sa.column('feedback'), sa.column('timestamp'))
+    sessions = sa.table('user_sessions', sa.column('id'), sa.column('user_id'))
+    rows = op.get_bind().execute(
+        sa.select(sessions.c.user_id, interactions.c.timestamp, interactions.c.task_outcome, interactions.c.feedback)
+        .select_from(interactions.join(sessions, interactions.c.session_id == sessions.c.id))
+    )
+    totals = {}
+    for user_id, timestamp, task_outcome, feedback in rows:
+        day = str(timestamp)[:10] if timestamp else None
+        for period in filter(None, ('all', day)):
+            counts = totals.setdefault((user_id, period), [0, 0])
+            counts[0] += 1
+            counts[1] += int(_is_successful(task_outcome, feedback))
+    if totals:
+        op.bulk_insert(counters, [
+            {'user_id': user_id, 'intent': '*', 'period': period, 'total': total, 'successes': successes}
+            for (user_id, period), (total, successes) in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('success_counters')
+    with op.batch_alter_table('interactions') as batch_op:
+        batch_op.drop_column('intent')
@@ -0,0 +1,35 @@
+"""add interaction_embeddings for the vector memory
+
+Revision ID: 8e2a4c6d1b57
+Revises: 3c1f0b7d9a24
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2a4c6d1b57'
+down_revision = '3c1f0b7d9a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('interaction_embeddings',
+    sa.Column('interaction_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('dim', sa.Integer(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['interaction_id'], ['interactions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('interaction_id')
+    )
+    op.create_index(op.f('ix_interaction_embeddings_user_id'), 'interaction_embeddings', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_interaction_embeddings_user_id'), table_name='interaction_embeddings')
+    op.drop_table('interaction_embeddings')
@@ -0,0 +1,75 @@
+"""deduplicate code_execution_logs.code into code_bodies and add task_history.timestamp
+
+Revision ID: 9a5c1e3b7d42
+Revises: e7b2d94a6c10
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a5c1e3b7d42'
+down_revision = 'e7b2d94a6c10'
+branch_labels = None
+depends_on = None
+
+logs = sa.table('code_execution_logs', sa.column('id', sa.Integer), sa.column('code', sa.Text),
+                sa.column('code_hash', sa.String))
+
+
+def upgrade():
+    bodies = op.create_table('code_bodies',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('code', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    with op.batch_alter_table('code_execution_logs') as batch_op:
+        batch_op.add_column(sa.Column('code_hash', sa.String(length=64), nullable=True))
+        batch_op.alter_column('code', existing_type=sa.Text(), nullable=True)
+        batch_op.create_index('ix_code_execution_logs_code_hash', ['code_hash'], unique=False)
+        batch_op.create_foreign_key('fk_code_execution_logs_code_hash', 'code_bodies', ['code_hash'], ['hash'])
+
+    # Move existing code text into code_bodies, one row per distinct text
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(logs.c.id, logs.c.code).where(logs.c.code.isnot(None))).all()
+    texts = {}
+    updates = []
+    for log_id, code in rows:
+        digest = hashlib.sha256(code.encode('utf-8')).hexdigest()
+        texts[digest] = code
+        updates.append({'log_id': log_id, 'digest': digest})
+    if texts:
+        op.bulk_insert(bodies, [{'hash': digest, 'code': code} for digest, code in texts.items()])
+        bind.execute(
+            logs.update().where(logs.c.id == sa.bindparam('log_id'))
+            .values(code_hash=sa.bindparam('digest'), code=None),
+            updates
+        )
+
+    with op.batch_alter_table('task_history') as batch_op:
+        batch_op.add_column(sa.Column('timestamp', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_task_history_timestamp', ['timestamp'], unique=False)
+    # Existing task history has no recorded time; date it to the migration so retention keeps it
+    op.execute(sa.text("UPDATE task_history SET timestamp = CURRENT_TIMESTAMP"))
+
+
+def downgrade():
+    with op.batch_alter_table('task_history') as batch_op:
+        batch_op.drop_index('ix_task_history_timestamp')
+        batch_op.drop_column('timestamp')
+
+    bodies = sa.table('code_bodies', sa.column('hash', sa.String), sa.column('code', sa.Text))
+    op.execute(
+        logs.update().where(logs.c.code_hash.isnot(None))
+        .values(code=sa.select(bodies.c.code).where(bodies.c.hash == logs.c.code_hash).scalar_subquery())
+    )
+    with op.batch_alter_table('code_execution_logs') as batch_op:
+        batch_op.drop_constraint('fk_code_execution_logs_code_hash', type_='foreignkey')
+        batch_op.drop_index('ix_code_execution_logs_code_hash')
+        batch_op.drop_column('code_hash')
+        batch_op.alter_column('code', existing_type=sa.Text(), nullable=False)
+    op.drop_table('code_bodies')
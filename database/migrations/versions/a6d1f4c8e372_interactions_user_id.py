@@ -0,0 +1,34 @@
+"""copy the session owner into interactions.user_id and index it with the timestamp
+
+Revision ID: a6d1f4c8e372
+Revises: f3a8c2e6d915
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d1f4c8e372'
+down_revision = 'f3a8c2e6d915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('interactions') as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_interactions_user_id', 'users', ['user_id'], ['id'])
+    op.execute(sa.text(
+        "UPDATE interactions SET user_id = "
+        "(SELECT user_sessions.user_id FROM user_sessions WHERE user_sessions.id = interactions.session_id)"
+    ))
+    op.create_index('ix_interactions_user_id_timestamp', 'interactions', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_interactions_user_id_timestamp', table_name='interactions')
+    with op.batch_alter_table('interactions') as batch_op:
+        batch_op.drop_constraint('fk_interactions_user_id', type_='foreignkey')
+        batch_op.drop_column('user_id')
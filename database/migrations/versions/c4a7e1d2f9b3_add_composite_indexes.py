@@ -0,0 +1,33 @@
+"""add composite indexes for the hot interaction/session queries
+
+Revision ID: c4a7e1d2f9b3
+Revises: 5b9d3e7f2c81
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e1d2f9b3'
+down_revision = '5b9d3e7f2c81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_sessions_user_id_start_time', 'user_sessions', ['user_id', 'start_time'], unique=False)
+    op.create_index('ix_interactions_session_id_timestamp', 'interactions', ['session_id', 'timestamp'], unique=False)
+    op.create_index('ix_interactions_session_id_task_outcome_timestamp', 'interactions',
+                    ['session_id', 'task_outcome', 'timestamp'], unique=False)
+    op.create_index('ix_interactions_timestamp', 'interactions', ['timestamp'], unique=False)
+    op.create_index('ix_code_execution_logs_user_id_timestamp', 'code_execution_logs', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_code_execution_logs_user_id_timestamp', table_name='code_execution_logs')
+    op.drop_index('ix_interactions_timestamp', table_name='interactions')
+    op.drop_index('ix_interactions_session_id_task_outcome_timestamp', table_name='interactions')
+    op.drop_index('ix_interactions_session_id_timestamp', table_name='interactions')
+    op.drop_index('ix_user_sessions_user_id_start_time', table_name='user_sessions')
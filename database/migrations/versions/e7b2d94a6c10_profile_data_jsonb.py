@@ -0,0 +1,32 @@
+"""store users.profile_data as JSONB on PostgreSQL
+
+Revision ID: e7b2d94a6c10
+Revises: c4a7e1d2f9b3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b2d94a6c10'
+down_revision = 'c4a7e1d2f9b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite has a single JSON storage type, so only PostgreSQL changes
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column('users', 'profile_data', type_=postgresql.JSONB(), existing_type=sa.JSON(),
+                    existing_nullable=True, postgresql_using='profile_data::jsonb')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column('users', 'profile_data', type_=sa.JSON(), existing_type=postgresql.JSONB(),
+                    existing_nullable=True, postgresql_using='profile_data::json')
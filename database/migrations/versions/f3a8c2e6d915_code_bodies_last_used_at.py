@@ -0,0 +1,28 @@
+"""add code_bodies.last_used_at so orphan cleanup skips recently reused bodies
+
+Revision ID: f3a8c2e6d915
+Revises: 2d6f8b4a1e93
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c2e6d915'
+down_revision = '2d6f8b4a1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('code_bodies') as batch_op:
+        batch_op.add_column(sa.Column('last_used_at', sa.DateTime(), nullable=True))
+    # Existing bodies count as used when they were stored (or now, if that is unknown)
+    op.execute(sa.text("UPDATE code_bodies SET last_used_at = COALESCE(created_at, CURRENT_TIMESTAMP)"))
+
+
+def downgrade():
+    with op.batch_alter_table('code_bodies') as batch_op:
+        batch_op.drop_column('last_used_at')
@@ -8,13 +8,18 @@ const Chat = () => {
   const [input, setInput] = useState('');
 
   useEffect(() => {
-    socket.on('message', (message) => {
+    socket.on('message', (message, ack) => {
+      // Acknowledge streamed frames so the server can pace its output
+      if (typeof ack === 'function') {
+        ack();
+      }
       setMessages((prevMessages) => [...prevMessages, message]);
     });
   }, []);
 
   const sendMessage = () => {
-    socket.emit('message', input);
+    // `ack: true` tells the server this client acknowledges streamed frames
+    socket.emit('message', JSON.stringify({ message: input, ack: true }));
     setInput('');
   };
 
@@ -22,7 +27,9 @@ const Chat = () => {
     <div className="chat">
       <div className="messages">
         {messages.map((msg, index) => (
-          <div key={index} className="message">{msg}</div>
+          <div key={index} className="message">
+            {typeof msg === 'string' ? msg : msg.assistant || msg.response || msg.error || JSON.stringify(msg)}
+          </div>
         ))}
       </div>
       <input
@@ -1,10 +1,20 @@
 # run.py
 
-from backend.app import create_app
+import os
 
-app, socketio = create_app()
+# Green-thread servers must patch the standard library before anything else is imported
+async_mode = os.getenv('SOCKETIO_ASYNC_MODE', 'threading')
+if async_mode == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif async_mode == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+from backend.app import app, socketio, start_background_services
 
 if __name__ == '__main__':
     if not os.path.exists('uploads'):
         os.makedirs('uploads')
-    socketio.run(app, debug=True)
+    start_background_services(app)
+    socketio.run(app, debug=os.getenv('FLASK_DEBUG', '1') == '1')